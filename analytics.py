@@ -0,0 +1,225 @@
+"""Score analytics for teachers, computed on NumPy column arrays.
+
+The leaderboard is loaded once into four compact arrays (user id, quiz id,
+score, time taken), sliced straight from the mapped records when attempts
+are kept in a score log, and every statistic is computed with sorts, reductions
+and index arithmetic over those arrays, never a Python loop per attempt.
+On a million attempts the statistics take a fraction of a second; see
+benchmarks/bench_analytics.py.
+
+NumPy is only needed here, and this module is only imported when the
+Analytics tab is opened.
+"""
+from itertools import chain
+from operator import itemgetter
+
+import numpy as np
+
+from excel_db import attempt_records, iter_attempts
+from score_log import NULL_ID
+
+PERCENTILES = (25, 50, 75, 90)
+SCORE_BINS = np.linspace(0, 100, 11)
+
+
+class Attempts:
+    """Leaderboard rows as column arrays; attempts without a score are left out."""
+
+    __slots__ = ("user_id", "quiz_id", "score", "time_taken")
+
+    def __init__(self, user_id, quiz_id, score, time_taken):
+        self.user_id = user_id
+        self.quiz_id = quiz_id
+        self.score = score
+        self.time_taken = time_taken
+
+    def __len__(self):
+        return len(self.score)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build the columns from (id, user_id, quiz_id, score, time_taken, ...) rows."""
+        columns = list(map(itemgetter(1, 2, 3, 4), rows))
+        try:
+            # None becomes NaN; numeric strings typed into Excel are parsed.
+            table = np.fromiter(chain.from_iterable(columns), dtype=np.float64,
+                                count=4 * len(columns)).reshape(-1, 4)
+        except ValueError:
+            table = np.array([[_number(v) for v in row] for row in columns], dtype=np.float64).reshape(-1, 4)
+
+        table = table[~np.isnan(table[:, 0:3]).any(axis=1)]
+        return cls(table[:, 0].astype(np.int64),
+                   table[:, 1].astype(np.int64),
+                   table[:, 2].astype(np.float32),
+                   table[:, 3].astype(np.float32))
+
+    @classmethod
+    def from_records(cls, records):
+        """Build the columns from score log records (see score_log.py) without a row per attempt."""
+        keep = (records["user_id"] != NULL_ID) & (records["quiz_id"] != NULL_ID) & ~np.isnan(records["score"])
+        return cls(records["user_id"][keep],
+                   records["quiz_id"][keep],
+                   records["score"][keep].astype(np.float32),
+                   records["time_taken"][keep].astype(np.float32))
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def load_attempts():
+    records = attempt_records()
+    if records is not None:
+        return Attempts.from_records(records)
+    return Attempts.from_rows(iter_attempts())
+
+
+def _describe(values):
+    if not len(values):
+        return {"count": 0}
+    stats = {"count": int(len(values)), "mean": float(np.mean(values)),
+             "min": float(np.min(values)), "max": float(np.max(values))}
+    for pct, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        stats[f"p{pct}"] = float(value)
+    return stats
+
+
+def summary(attempts):
+    """Overall score and time-taken statistics."""
+    time_taken = attempts.time_taken[~np.isnan(attempts.time_taken)]
+    return {
+        "attempts": len(attempts),
+        "students": _distinct(attempts.user_id),
+        "quizzes": _distinct(attempts.quiz_id),
+        "score": _describe(attempts.score),
+        "time_taken": _describe(time_taken),
+    }
+
+
+def group_stats(keys, values, percentiles=PERCENTILES):
+    """Count, mean, min, max and percentiles of `values` grouped by `keys`.
+
+    Returns a dict of equal-length arrays, one entry per distinct key in
+    ascending order; NaN values are ignored. Sorting by (key, value) puts
+    every group's values in order in one contiguous run, so min, max and
+    each percentile are plain (fractional) indexes into that run.
+    """
+    valid = ~np.isnan(values)
+    keys, values = _sort_pairs(keys[valid], values[valid])
+    values = values.astype(np.float64)
+    groups, starts, counts = _runs(keys)
+    ends = starts + counts - 1
+
+    stats = {
+        "key": groups,
+        "count": counts,
+        "mean": np.add.reduceat(values, starts) / counts if len(groups) else np.array([]),
+        "min": values[starts],
+        "max": values[ends],
+    }
+    for pct in percentiles:
+        # Linear interpolation, as numpy.percentile does.
+        position = starts + (counts - 1) * (pct / 100)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, ends)
+        stats[f"p{pct}"] = values[lower] + (values[upper] - values[lower]) * (position - lower)
+    return stats
+
+
+def _sort_pairs(keys, values):
+    """Sort (key, value) pairs by key, then value; values must not be NaN.
+
+    Integer keys spanning less than 2**32 and float32 values are packed
+    into one uint64 per pair, so this is a single integer sort instead of
+    a much slower two-key lexsort.
+    """
+    if not len(keys):
+        return keys, values
+    low = keys.min()
+    if values.dtype != np.float32 or keys.max() - low >= 2 ** 32:
+        order = np.lexsort((values, keys))
+        return keys[order], values[order]
+    # Float bit patterns sort like the floats once negatives have all bits
+    # flipped and the rest just the sign bit.
+    bits = values.view(np.uint32).astype(np.uint64)
+    bits = np.where(bits >> 31, bits ^ 0xFFFFFFFF, bits | 0x80000000)
+    packed = np.sort(((keys - low).astype(np.uint64) << 32) | bits)
+    bits = packed & 0xFFFFFFFF
+    bits = np.where(bits >> 31, bits ^ 0x80000000, bits ^ 0xFFFFFFFF)
+    return (packed >> 32).astype(keys.dtype) + low, bits.astype(np.uint32).view(np.float32)
+
+
+def _runs(ordered):
+    """(values, starts, counts) of the runs of equal values in a sorted array.
+
+    Cheaper than np.unique, which would sort the already sorted input again.
+    """
+    if not len(ordered):
+        empty = np.array([], dtype=np.int64)
+        return ordered[:0], empty, empty
+    starts = np.flatnonzero(np.concatenate(([True], ordered[1:] != ordered[:-1])))
+    counts = np.diff(np.append(starts, len(ordered)))
+    return ordered[starts], starts, counts
+
+
+def _distinct(values):
+    return int(len(_runs(np.sort(values))[0]))
+
+
+def _distinct_per_group(keys, members):
+    """Number of distinct `members` for each distinct key, in key order."""
+    if not len(keys):
+        return np.array([], dtype=np.int64)
+    base = int(members.max()) + 1
+    pairs, _, _ = _runs(np.sort(keys * base + members))
+    _, _, counts = _runs(pairs // base)
+    return counts
+
+
+def per_quiz(attempts):
+    """Score and time statistics for every quiz that has attempts."""
+    scores = group_stats(attempts.quiz_id, attempts.score)
+    times = group_stats(attempts.quiz_id, attempts.time_taken, percentiles=(50,))
+    stats = dict(scores)
+    stats["students"] = _distinct_per_group(attempts.quiz_id, attempts.user_id)
+    # Quizzes whose every time_taken is blank have no time statistics.
+    has_times = np.isin(scores["key"], times["key"])
+    for name in ("mean", "p50"):
+        column = np.full(len(scores["key"]), np.nan)
+        column[has_times] = times[name]
+        stats[f"time_{name}"] = column
+    return stats
+
+
+def per_student(attempts):
+    """Score and time statistics for every student that has attempts."""
+    scores = group_stats(attempts.user_id, attempts.score)
+    times = group_stats(attempts.user_id, attempts.time_taken, percentiles=())
+    stats = dict(scores)
+    stats["quizzes"] = _distinct_per_group(attempts.user_id, attempts.quiz_id)
+    column = np.full(len(scores["key"]), np.nan)
+    column[np.isin(scores["key"], times["key"])] = times["mean"]
+    stats["time_mean"] = column
+    return stats
+
+
+def score_distribution(attempts, quiz_id=None):
+    """Attempt counts per 10-point score band, overall or for one quiz."""
+    scores = attempts.score if quiz_id is None else attempts.score[attempts.quiz_id == quiz_id]
+    counts, edges = np.histogram(np.clip(scores, 0, 100), bins=SCORE_BINS)
+    return edges, counts
+
+
+def analyze(attempts=None):
+    """Compute everything the Analytics tab shows."""
+    if attempts is None:
+        attempts = load_attempts()
+    return {
+        "summary": summary(attempts),
+        "per_quiz": per_quiz(attempts),
+        "per_student": per_student(attempts),
+        "distribution": score_distribution(attempts),
+    }
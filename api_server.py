@@ -0,0 +1,399 @@
+"""Headless JSON API over the excel_db and auth operations.
+
+One server process can stand in for a Tk app per lab machine, each
+opening the shared workbooks on its own:
+
+* reads are answered from an in-memory cache of encoded responses, built
+  on a reader thread on first use and dropped after every write made
+  through the server, or when the files in the data folder change (checked
+  every REVALIDATE_SECONDS, so edits by other processes show up within
+  that delay);
+* writes go through a single writer task, one at a time, so requests never
+  contend for the workbook locks; scores that queue up while a write is in
+  progress are saved together by one save_scores call;
+* passwords are checked on the auth login pool, off the event loop.
+
+    python api_server.py --host 127.0.0.1 --port 8765
+
+Endpoints (JSON in and out; everything but /health, /stats and /login
+needs the "Authorization: Bearer <token>" header returned by /login):
+
+    GET  /health
+    GET  /stats
+    POST /login                     {"username": ..., "password": ...}
+    GET  /quizzes
+    GET  /quizzes/<id>/questions
+    POST /scores                    {"quiz_id": ..., "score": ..., "time_taken": ...}
+    GET  /leaderboard?offset=0&limit=20
+    GET  /history                   the logged-in student's attempts, oldest first
+
+The HTTP support is minimal (HTTP/1.1 with keep-alive and Content-Length
+bodies only) and meant for a trusted lab network.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import secrets
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+import auth
+from config import DB_FOLDER
+from excel_db import (init_excel_db, get_all_quizzes, get_quiz_questions, get_leaderboard_page,
+                      get_user_history, save_scores, update_user_password)
+
+MAX_BODY = 64 * 1024
+MAX_PAGE = 100
+# Responses kept in memory; the cache is emptied when it grows past this.
+MAX_CACHED = 4096
+SCORE_BATCH = 500
+REVALIDATE_SECONDS = 1.0
+DATA_SUFFIXES = (".xlsx", ".journal", ".db", ".db-wal", ".json", ".scores")
+
+# Cached responses (by the first element of their key) that depend on each
+# workbook or partition folder; a change to any other data file (the SQLite
+# database, the partition manifest) drops all.
+DEPENDENTS = {
+    "users": ("leaderboard",),
+    "quizzes": ("quizzes", "leaderboard"),
+    "questions": ("questions",),
+    "leaderboard": ("leaderboard",),
+}
+# The same for writes made through the server; other writes drop all.
+WRITE_DEPENDENTS = {
+    save_scores: ("leaderboard",),
+    update_user_password: (),
+}
+
+REASONS = {
+    200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _encode(data):
+    return json.dumps(data, default=str).encode()
+
+
+def _call_encoded(fn, args):
+    return _encode(fn(*args))
+
+
+def _response(status, body, keep_alive):
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + body
+
+
+def _report_failure(message, future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"{message}: {future.exception()}")
+
+
+def _int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{name} must be an integer") from None
+
+
+def _number(value, name, optional=False):
+    if value is None and optional:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise HTTPError(400, f"{name} must be a number")
+    return value
+
+
+def folder_stamp(folder=DB_FOLDER):
+    """{name: (mtime, size)} of every data file, to notice writes by other processes.
+
+    Partitions are named after their folder ("questions/quiz_3.xlsx").
+    """
+    stamp = {}
+    for prefix, directory in (("", folder), ("questions/", folder / "questions"),
+                              ("leaderboard/", folder / "leaderboard")):
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.name.endswith(DATA_SUFFIXES):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                stamp[prefix + entry.name] = (st.st_mtime_ns, st.st_size)
+    return stamp
+
+
+class QuizServer:
+    def __init__(self, readers=4):
+        self.sessions = {}
+        self.stats = {"requests": 0, "errors": 0, "cache_hits": 0, "cache_misses": 0,
+                      "writes": 0, "write_batches": 0}
+        self._responses = {}
+        # key -> future of a response being built, shared by concurrent requests
+        self._loading = {}
+        # Bumped by every invalidation of a kind of response, so responses
+        # built before it are not stored.
+        self._generations = {}
+        self._stamp = {}
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="api-read")
+        self._write_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-write")
+        self._writes = None
+
+    # Reads
+
+    def invalidate(self, kinds=None):
+        """Drop the cached responses of the given kinds, or all of them."""
+        if kinds is None:
+            kinds = {key[0] for key in (*self._responses, *self._loading)} | set(self._generations)
+        for kind in kinds:
+            self._generations[kind] = self._generations.get(kind, 0) + 1
+        for cache in (self._responses, self._loading):
+            for key in [key for key in cache if key[0] in kinds]:
+                del cache[key]
+
+    async def cached(self, key, fn, *args):
+        """Return the encoded result of fn(*args), computing it at most once per key."""
+        body = self._responses.get(key)
+        if body is not None:
+            self.stats["cache_hits"] += 1
+            return body
+        self.stats["cache_misses"] += 1
+        pending = self._loading.get(key)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            pending = self._loading[key] = loop.run_in_executor(self._readers, _call_encoded, fn, args)
+            pending.add_done_callback(
+                functools.partial(self._loaded, key, self._generations.get(key[0], 0)))
+        # Shielded: a client hanging up must not cancel the others' wait.
+        return await asyncio.shield(pending)
+
+    def _loaded(self, key, generation, future):
+        if self._loading.get(key) is future:
+            del self._loading[key]
+        if (generation != self._generations.get(key[0], 0) or future.cancelled()
+                or future.exception() is not None):
+            return
+        if len(self._responses) >= MAX_CACHED:
+            self._responses.clear()
+        self._responses[key] = future.result()
+
+    async def _watch_folder(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            stamp = await loop.run_in_executor(self._readers, folder_stamp)
+            changed = {name for name in stamp.keys() | self._stamp.keys()
+                       if stamp.get(name) != self._stamp.get(name)}
+            self._stamp = stamp
+            kinds = set()
+            for name in changed:
+                dependents = DEPENDENTS.get(name.split("/")[0].split(".")[0])
+                if dependents is None:
+                    kinds = None
+                    break
+                kinds.update(dependents)
+            if kinds is None or kinds:
+                self.invalidate(kinds)
+            await asyncio.sleep(REVALIDATE_SECONDS)
+
+    # Writes
+
+    def write(self, fn, *args):
+        """Queue fn(*args) for the writer task; returns a future of its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._writes.put_nowait((fn, args, future))
+        return future
+
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._writes.get()]
+            while len(items) < SCORE_BATCH and not self._writes.empty():
+                items.append(self._writes.get_nowait())
+
+            scores = [(args[0], future) for fn, args, future in items if fn is save_scores]
+            calls = [(fn, args, [future]) for fn, args, future in items if fn is not save_scores]
+            if scores:
+                calls.insert(0, (save_scores, ([score for score, _ in scores],), [f for _, f in scores]))
+
+            for fn, args, futures in calls:
+                try:
+                    result = await loop.run_in_executor(self._write_thread, fn, *args)
+                except Exception as e:
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    # save_scores returns one id per score
+                    results = result if fn is save_scores else [result]
+                    for future, value in zip(futures, results):
+                        if not future.done():
+                            future.set_result(value)
+                self.stats["write_batches"] += 1
+                self.stats["writes"] += len(futures)
+                self.invalidate(WRITE_DEPENDENTS.get(fn))
+
+    # HTTP
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    writer.write(_response(400, _encode({"error": "malformed request"}), False))
+                    break
+                if length > MAX_BODY:
+                    writer.write(_response(413, _encode({"error": "request body too large"}), False))
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.dispatch(method, target, headers, body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, headers, body):
+        """Answer one request; returns (status, encoded JSON body)."""
+        self.stats["requests"] += 1
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        try:
+            if body:
+                try:
+                    body = json.loads(body)
+                except ValueError:
+                    raise HTTPError(400, "request body must be JSON") from None
+                if not isinstance(body, dict):
+                    raise HTTPError(400, "request body must be a JSON object")
+            else:
+                body = {}
+            return await self._route(method, parts, dict(parse_qsl(url.query)), headers, body)
+        except HTTPError as e:
+            self.stats["errors"] += 1
+            return e.status, _encode({"error": str(e)})
+        except Exception as e:
+            self.stats["errors"] += 1
+            traceback.print_exc()
+            return 500, _encode({"error": str(e)})
+
+    async def _route(self, method, parts, query, headers, body):
+        if parts == ["health"]:
+            return 200, _encode({"ok": True})
+        if parts == ["stats"]:
+            return 200, _encode(dict(self.stats, sessions=len(self.sessions), cached=len(self._responses),
+                                     queued_writes=self._writes.qsize()))
+        if parts == ["login"]:
+            if method != "POST":
+                raise HTTPError(405, "use POST")
+            return await self.login(body)
+
+        user = self._session(headers)
+        if parts == ["quizzes"] and method == "GET":
+            return 200, await self.cached(("quizzes",), get_all_quizzes)
+        if len(parts) == 3 and parts[0] == "quizzes" and parts[2] == "questions" and method == "GET":
+            quiz_id = _int(parts[1], "quiz id")
+            return 200, await self.cached(("questions", quiz_id), get_quiz_questions, quiz_id)
+        if parts == ["leaderboard"] and method == "GET":
+            offset = max(_int(query.get("offset", 0), "offset"), 0)
+            limit = min(max(_int(query.get("limit", 20), "limit"), 1), MAX_PAGE)
+            return 200, await self.cached(("leaderboard", offset, limit), get_leaderboard_page, offset, limit)
+        if parts == ["history"] and method == "GET":
+            return 200, await self.cached(("leaderboard", "history", user['id']), get_user_history, user['id'])
+        if parts == ["scores"] and method == "POST":
+            return await self.submit_score(user, body)
+        raise HTTPError(404, "no such endpoint")
+
+    def _session(self, headers):
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        user = self.sessions.get(token) if scheme.lower() == "bearer" else None
+        if user is None:
+            raise HTTPError(401, "log in first")
+        return user
+
+    async def login(self, body):
+        username, password = body.get("username"), body.get("password")
+        if not isinstance(username, str) or not isinstance(password, str) or not username.strip():
+            raise HTTPError(400, "username and password required")
+        user, new_hash = await asyncio.wrap_future(auth.check_login_async(username, password))
+        if user is None:
+            raise HTTPError(401, "invalid username or password")
+        if new_hash:
+            # Not awaited: the login does not depend on the upgrade.
+            self.write(update_user_password, user['id'], new_hash).add_done_callback(
+                functools.partial(_report_failure, f"Password upgrade for {user['name']} postponed"))
+        token = secrets.token_urlsafe(24)
+        self.sessions[token] = user
+        return 200, _encode({"token": token, "user": user})
+
+    async def submit_score(self, user, body):
+        quiz_id = _int(body.get("quiz_id"), "quiz_id")
+        score = _number(body.get("score"), "score")
+        time_taken = _number(body.get("time_taken"), "time_taken", optional=True)
+        new_id = await self.write(save_scores, (user['id'], user['name'], quiz_id, score, time_taken))
+        return 201, _encode({"id": new_id})
+
+    async def serve(self, host, port):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._readers, init_excel_db)
+        self._writes = asyncio.Queue()
+        background = [asyncio.create_task(self._writer()), asyncio.create_task(self._watch_folder())]
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        address = server.sockets[0].getsockname()
+        print(f"Serving on http://{address[0]}:{address[1]}", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in background:
+                task.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the quiz data over a local JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    parser.add_argument("--readers", type=int, default=4, help="threads building uncached responses")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(QuizServer(readers=args.readers).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,72 +1,114 @@
-from excel_db import init_excel_db, load_workbook
 import hashlib
-from openpyxl import Workbook, load_workbook
+import hmac
 import os
-from pathlib import Path
-from excel_db import (
-    USERS_FILE
-)
-
-DATA_DIR = Path(__file__).parent / "data"
-USERS_FILE = DATA_DIR / "users.xlsx"
-
-def init_excel_db():
-    if not DATA_DIR.exists():
-        os.makedirs(DATA_DIR)
-    
-    if not USERS_FILE.exists():
-        wb = Workbook()
-        ws = wb.active
-        ws.append(["id", "username", "password", "role"])
-        wb.save(USERS_FILE)
+from concurrent.futures import ThreadPoolExecutor
+from excel_db import init_excel_db, get_user, add_user_if_new, update_user_password
+from instrumentation import instrumented
 
+# Salted PBKDF2 replaces the original unsalted SHA-256 hashes, which are
+# still accepted and upgraded on the user's next successful login.
+PBKDF2_ITERATIONS = int(os.environ.get("QUIZ_PBKDF2_ITERATIONS", "200000"))
+HASH_SCHEME = "pbkdf2_sha256"
+
+# pbkdf2_hmac releases the GIL, so logins verified in this pool run in
+# parallel while the Tk thread stays free.
+_login_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="login")
+
+
+def hash_password(password, iterations=PBKDF2_ITERATIONS):
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return f"{HASH_SCHEME}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password, stored):
+    """Check `password` against a stored hash.
+
+    Returns (matches, needs_upgrade); needs_upgrade is set for legacy
+    SHA-256 hashes and for PBKDF2 hashes with fewer iterations than current.
+    """
+    stored = str(stored or "").strip()
+    if stored.startswith(HASH_SCHEME + "$"):
+        try:
+            _, iterations, salt, expected = stored.split("$")
+            iterations = int(iterations)
+            salt = bytes.fromhex(salt)
+        except ValueError:
+            return False, False
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations).hex()
+        return hmac.compare_digest(digest, expected), iterations < PBKDF2_ITERATIONS
+
+    legacy = hashlib.sha256(password.encode()).hexdigest()
+    return hmac.compare_digest(legacy, stored), True
+
+
+def check_login(username, password):
+    """Verify a username and password without writing anything.
+
+    Returns (user, new_hash): `user` is the login result, or None when the
+    credentials are wrong; `new_hash` is set when the stored hash should be
+    replaced (see verify_password) and is None otherwise.
+    """
+    # Served from the in-memory username index, which is built once and
+    # refreshed when users.xlsx or its journal changes. Stored names match
+    # as text without surrounding whitespace, as the original login did.
+    user = get_user(username)
+    if not user:
+        return None, None
+
+    matches, needs_upgrade = verify_password(password, user['password'])
+    if not matches:
+        return None, None
+
+    result = {
+        'id': user['id'],
+        'name': username,
+        'role': user['role']
+    }
+    return result, hash_password(password) if needs_upgrade else None
+
+
+def check_login_async(username, password):
+    """Run check_login in the login pool; returns a concurrent.futures.Future."""
+    return _login_pool.submit(check_login, username, password)
+
+
+@instrumented
 def login_user(username, password):
     try:
-        hashed_pw = hashlib.sha256(password.encode()).hexdigest()
-
-        init_excel_db()
-        
-        wb = load_workbook(USERS_FILE)
-        ws = wb.active
-        
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            if row and len(row) >= 4:
-                if str(row[1]).strip() == username.strip() and str(row[2]).strip() == hashed_pw:
-                    return {
-                        'id': row[0],
-                        'name': username,
-                        'role': row[3]
-                    }
-        return None
+        user, new_hash = check_login(username, password)
+        if user and new_hash:
+            try:
+                update_user_password(user['id'], new_hash)
+            except Exception as e:
+                print(f"Password upgrade for {username} postponed: {e}")
+        return user
     except Exception as e:
         print(f"Login error: {e}")
         return None
 
 
+def login_user_async(username, password):
+    """Run login_user in the login pool; returns a concurrent.futures.Future."""
+    return _login_pool.submit(login_user, username, password)
+
+
+@instrumented
 def register_user(username, password, role):
     try:
         # Password Hash
-        hashed_pw = hashlib.sha256(password.encode()).hexdigest()
-        
+        hashed_pw = hash_password(password)
+
         init_excel_db()
-        
-        wb = load_workbook(USERS_FILE)
-        ws = wb.active
-        
-        # Check Username
-        for row in ws.iter_rows(values_only=True):
-            if row and len(row) > 1 and row[1] == username:
-                return False
-                
-        # Create New id
-        existing_ids = [row[0] for row in ws.iter_rows(min_row=2, values_only=True) if row]
-        new_id = max(existing_ids) + 1 if existing_ids else 1
-        
-        # Create New Username
-        ws.append([new_id, username, hashed_pw, role])
-        wb.save(USERS_FILE)
-        return True
-        
+
+        # Create New Username unless it is already taken
+        return add_user_if_new(username, hashed_pw, role) is not None
+
     except Exception as e:
         print(f"Registration error: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+def register_user_async(username, password, role):
+    """Run register_user in the login pool; returns a concurrent.futures.Future."""
+    return _login_pool.submit(register_user, username, password, role)
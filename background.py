@@ -0,0 +1,127 @@
+"""Run data-layer calls off the Tk main thread.
+
+Workbook parsing and saving can take seconds on large files; doing it in a
+button handler freezes the window (and the quiz timer). BackgroundTasks runs
+the call on a worker thread and delivers the result to a callback on the Tk
+thread, by polling a queue with after() since Tk must only be touched from
+the thread running mainloop.
+"""
+import itertools
+import queue
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+
+POLL_MS = 30
+
+# One worker for the whole process: storage calls run in submission order,
+# so a refresh queued after a save sees the saved row.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quiz-io")
+
+_SKIPPED = object()
+
+
+class BackgroundTasks:
+    """Submit storage calls from a window and get the results back on the Tk thread.
+
+    A job submitted with a `key` supersedes earlier jobs with the same key:
+    one still queued is skipped without running and a running one has its
+    result dropped, so repeated Refresh clicks cost a single load and a slow
+    refresh never overwrites a newer one. Writes are submitted without a key
+    so they are never dropped.
+
+    `on_busy`, if given, is called with the labels of the jobs in flight
+    whenever that list changes, to drive a loading indicator.
+    """
+
+    def __init__(self, widget, on_busy=None):
+        self.widget = widget
+        self.on_busy = on_busy
+        self._results = queue.Queue()
+        self._ids = itertools.count(1)
+        self._latest = {}
+        self._pending = {}
+        self._poll_id = None
+        self._closed = False
+        widget.bind("<Destroy>", self._on_destroy, add="+")
+
+    def submit(self, fn, *args, key=None, label=None, on_done=None, on_error=None):
+        """Run fn(*args) in the background.
+
+        `on_done(result)` or `on_error(exception)` is then called on the Tk
+        thread; without `on_error` the error is shown in a message box.
+        """
+        if self._closed:
+            return
+        job = next(self._ids)
+        if key is not None:
+            self._latest[key] = job
+        self._pending[job] = (label, on_done, on_error)
+        _executor.submit(self._run, job, key, fn, args)
+        self._busy_changed()
+        if self._poll_id is None:
+            self._poll_id = self.widget.after(POLL_MS, self._poll)
+
+    def cancel(self, key):
+        """Drop the results of every job submitted so far under `key`."""
+        self._latest[key] = None
+
+    def busy(self):
+        return bool(self._pending)
+
+    def _current(self, job, key):
+        return key is None or self._latest.get(key) == job
+
+    def _run(self, job, key, fn, args):
+        # Reads for a closed window are pointless; writes still go through.
+        if key is not None and (self._closed or not self._current(job, key)):
+            self._results.put((job, key, _SKIPPED, None))
+            return
+        try:
+            self._results.put((job, key, fn(*args), None))
+        except Exception as e:
+            self._results.put((job, key, None, e))
+
+    def _poll(self):
+        self._poll_id = None
+        if self._closed:
+            return
+        done = []
+        while True:
+            try:
+                done.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        for job, key, result, error in done:
+            label, on_done, on_error = self._pending.pop(job)
+            if self._closed or result is _SKIPPED or not self._current(job, key):
+                continue
+            try:
+                if error is not None:
+                    (on_error or self.show_error)(error)
+                elif on_done is not None:
+                    on_done(result)
+            except Exception:
+                traceback.print_exc()
+        if done:
+            self._busy_changed()
+        if self._pending and not self._closed:
+            self._poll_id = self.widget.after(POLL_MS, self._poll)
+
+    def _busy_changed(self):
+        if self.on_busy is not None and not self._closed:
+            labels = [label for label, _, _ in self._pending.values() if label]
+            self.on_busy(list(dict.fromkeys(labels)))
+
+    def show_error(self, error):
+        print(f"Background task failed: {error}")
+        messagebox.showerror("Error", str(error), parent=self.widget)
+
+    def _on_destroy(self, event):
+        # <Destroy> on a toplevel also fires for each of its children.
+        if event.widget is not self.widget:
+            return
+        self._closed = True
+        if self._poll_id is not None:
+            self.widget.after_cancel(self._poll_id)
+            self._poll_id = None
@@ -0,0 +1,66 @@
+"""Time the teacher analytics on synthetic leaderboard rows.
+
+Rows are generated in memory in the shape the table cache serves them,
+so the numbers cover column extraction and the statistics, not workbook
+parsing (see bench_storage.py for that). With --score-log the rows are
+written to a score log in a temporary folder first, and the columns are
+read from its mapped records instead.
+
+    python benchmarks/bench_analytics.py --attempts 1000000
+    python benchmarks/bench_analytics.py --attempts 1000000 --score-log
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import analytics
+import score_log
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analytics module.")
+    parser.add_argument("--attempts", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--quizzes", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--score-log", action="store_true", help="load the columns from a score log")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    rows = [(i, rng.randint(1, args.users), rng.randint(1, args.quizzes), rng.randint(0, 100), rng.randint(10, 900))
+            for i in range(1, args.attempts + 1)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.score_log:
+            path = score_log.log_path(Path(tmp))
+            score_log.create(path, rows)
+            del rows
+            start = time.perf_counter()
+            attempts = analytics.Attempts.from_records(score_log.ScoreLog(path).records())
+        else:
+            start = time.perf_counter()
+            attempts = analytics.Attempts.from_rows(rows)
+        loaded = time.perf_counter()
+        result = analytics.analyze(attempts)
+        done = time.perf_counter()
+
+    print(json.dumps({
+        "source": "score_log" if args.score_log else "rows",
+        "attempts": len(attempts),
+        "columns_seconds": loaded - start,
+        "statistics_seconds": done - loaded,
+        "quizzes": len(result["per_quiz"]["key"]),
+        "students": len(result["per_student"]["key"]),
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""Load generator for api_server.py.
+
+Generates a data folder, starts the server on a free port and keeps
+--clients keep-alive connections busy for --duration seconds. Each client
+logs in as its own student and then loops over a request mix: the quiz
+list, a quiz's questions, a leaderboard page and, with probability
+--write-ratio, a score submission. Reports requests per second and latency
+percentiles per endpoint, plus the server's own counters.
+
+    python benchmarks/bench_api.py --clients 50 --duration 10
+    python benchmarks/bench_api.py --url http://127.0.0.1:8765 --clients 50
+
+With --url the load is sent to an already running server; its data folder
+must contain the generated student accounts (password "1234").
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks import datagen
+from benchmarks.bench_storage import percentile
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection speaking JSON."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.token = None
+        self._reader = self._writer = None
+
+    async def request(self, method, path, data=None):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(data).encode() if data is not None else b""
+        headers = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(body)}\r\n"
+        if self.token:
+            headers += f"Authorization: Bearer {self.token}\r\n"
+        self._writer.write(headers.encode() + b"\r\n" + body)
+
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self._reader.readexactly(length)) if length else None
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+async def login(client, username):
+    status, result = await client.request("POST", "/login", {"username": username, "password": datagen.PASSWORD})
+    if status != 200:
+        raise RuntimeError(f"login as {username} failed: {result}")
+    client.token = result["token"]
+
+
+async def run_client(client, quizzes, deadline, write_ratio, rng, latencies, errors):
+    while time.perf_counter() < deadline:
+        quiz_id = rng.randint(1, quizzes)
+        if rng.random() < write_ratio:
+            name, call = "submit_score", ("POST", "/scores", {"quiz_id": quiz_id, "score": rng.randint(0, 100),
+                                                             "time_taken": rng.randint(10, 900)})
+        else:
+            name, call = rng.choice([
+                ("quizzes", ("GET", "/quizzes")),
+                ("questions", ("GET", f"/quizzes/{quiz_id}/questions")),
+                ("leaderboard", ("GET", f"/leaderboard?offset={rng.choice([0, 0, 0, 20])}&limit=20")),
+            ])
+        t0 = time.perf_counter()
+        status, _ = await client.request(*call)
+        latencies.setdefault(name, []).append(time.perf_counter() - t0)
+        if status >= 400:
+            errors[name] = errors.get(name, 0) + 1
+
+
+async def generate_load(host, port, args):
+    rng = random.Random(args.seed)
+    students = [f"student{i}" for i in range(2, args.users + 1)]
+    clients = [Client(host, port) for _ in range(args.clients)]
+    latencies, errors = {}, {}
+    try:
+        # Logins (deliberately slow password hashing) happen before the clock starts.
+        await asyncio.gather(*(login(client, students[i % len(students)]) for i, client in enumerate(clients)))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            run_client(client, args.quizzes, start + args.duration, args.write_ratio,
+                       random.Random(rng.random()), latencies, errors)
+            for client in clients))
+        wall = time.perf_counter() - start
+    finally:
+        for client in clients:
+            client.close()
+
+    stats_client = Client(host, port)
+    _, server_stats = await stats_client.request("GET", "/stats")
+    stats_client.close()
+
+    total = sum(len(samples) for samples in latencies.values())
+    return {
+        "clients": args.clients,
+        "duration_seconds": wall,
+        "requests": total,
+        "requests_per_s": total / wall if wall else 0.0,
+        "errors": errors,
+        "endpoints": {
+            name: {
+                "requests": len(samples),
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p90_ms": percentile(samples, 90) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+            }
+            for name, samples in sorted(latencies.items())
+        },
+        "server": server_stats,
+    }
+
+
+def start_server(folder, storage):
+    env = dict(os.environ, QUIZ_DATA_DIR=str(folder), QUIZ_STORAGE=storage)
+    process = subprocess.Popen([sys.executable, str(ROOT / "api_server.py"), "--port", "0"],
+                               env=env, stdout=subprocess.PIPE, text=True)
+    for line in process.stdout:
+        match = re.search(r"Serving on http://([^:]+):(\d+)", line)
+        if match:
+            return process, match.group(1), int(match.group(2))
+    raise RuntimeError("api_server.py exited before it started serving")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure api_server.py requests per second.")
+    parser.add_argument("--url", help="load an already running server instead of starting one")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--quizzes", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=10000)
+    parser.add_argument("--attempts", type=int, default=10000)
+    parser.add_argument("--storage", choices=["excel", "sqlite"], default="excel")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.url:
+        url = urlsplit(args.url)
+        result = asyncio.run(generate_load(url.hostname, url.port or 80, args))
+    else:
+        folder = Path(tempfile.mkdtemp(prefix="quizbench-api-"))
+        process = None
+        try:
+            datagen.generate(folder, users=args.users, quizzes=args.quizzes,
+                             questions=args.questions, attempts=args.attempts, seed=args.seed)
+            if args.storage == "sqlite":
+                subprocess.run([sys.executable, str(ROOT / "sqlite_db.py"), "migrate"], check=True,
+                               env=dict(os.environ, QUIZ_DATA_DIR=str(folder), QUIZ_STORAGE="sqlite"),
+                               stdout=subprocess.DEVNULL)
+            process, host, port = start_server(folder, args.storage)
+            result = asyncio.run(generate_load(host, port, args))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+            shutil.rmtree(folder, ignore_errors=True)
+
+    result.update(storage=args.storage, write_ratio=args.write_ratio, cpus=os.cpu_count())
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
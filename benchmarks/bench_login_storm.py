@@ -0,0 +1,117 @@
+"""Simulate the burst of logins at the start of an exam.
+
+Generates a data folder with --users accounts (stored with the legacy
+SHA-256 hashes, as existing data folders are), then fires --logins logins
+from --concurrency threads, spread evenly over --window seconds. The first
+burst also upgrades every hash to PBKDF2; a second burst measures logins
+against the upgraded hashes.
+
+    python benchmarks/bench_login_storm.py --users 2000 --logins 300 --concurrency 32
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks import datagen
+from benchmarks.bench_storage import percentile
+
+
+def storm(auth, usernames, concurrency, window):
+    """Log every user in once; returns (latencies, failures, wall time)."""
+    latencies = []
+    failures = 0
+    lock = threading.Lock()
+    start = time.perf_counter()
+    spacing = window / len(usernames) if usernames else 0
+
+    def one(i, username):
+        nonlocal failures
+        # Arrivals are spread over the window like students clicking Login.
+        delay = start + i * spacing - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        t0 = time.perf_counter()
+        user = auth.login_user(username, datagen.PASSWORD)
+        elapsed = time.perf_counter() - t0
+        with lock:
+            latencies.append(elapsed)
+            if user is None:
+                failures += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(len(usernames)), usernames))
+    return latencies, failures, time.perf_counter() - start
+
+
+def report(name, latencies, failures, wall):
+    return {
+        "phase": name,
+        "logins": len(latencies),
+        "failures": failures,
+        "wall_seconds": wall,
+        "throughput_per_s": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark a burst of concurrent logins.")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--logins", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--window", type=float, default=0.0,
+                        help="seconds over which the logins arrive (0 = all at once)")
+    parser.add_argument("--storage", choices=["excel", "sqlite"], default="excel")
+    parser.add_argument("--pbkdf2-iterations", type=int,
+                        help="override QUIZ_PBKDF2_ITERATIONS for this run")
+    args = parser.parse_args(argv)
+
+    folder = Path(tempfile.mkdtemp(prefix="quizbench-login-"))
+    try:
+        datagen.generate(folder, users=args.users, quizzes=1, questions=1, attempts=1)
+        os.environ["QUIZ_DATA_DIR"] = str(folder)
+        os.environ["QUIZ_STORAGE"] = args.storage
+        if args.pbkdf2_iterations:
+            os.environ["QUIZ_PBKDF2_ITERATIONS"] = str(args.pbkdf2_iterations)
+        import auth
+        import excel_db
+
+        excel_db.init_excel_db()
+        # Students log in once each; wrap around if there are fewer of them.
+        students = [f"student{i}" for i in range(2, args.users + 1)]
+        usernames = [students[i % len(students)] for i in range(args.logins)]
+
+        results = [
+            report("legacy_hashes", *storm(auth, usernames, args.concurrency, args.window)),
+            report("upgraded_hashes", *storm(auth, usernames, args.concurrency, args.window)),
+        ]
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    print(json.dumps({
+        "storage": args.storage,
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "window": args.window,
+        "pbkdf2_iterations": auth.PBKDF2_ITERATIONS,
+        "cpus": os.cpu_count(),
+        "results": results,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""Benchmark suite for the storage layer.
+
+For each data size, fills a fresh data folder with synthetic workbooks
+(users, questions and attempts at N rows each, N/100 quizzes), then times
+the public excel_db/auth functions in a separate interpreter so every size
+starts cold. Results are written as JSON for comparison across versions.
+
+    python benchmarks/bench_storage.py --sizes 1000,10000,100000 --output run.json
+    python benchmarks/bench_storage.py --storage sqlite --output sqlite.json
+    python benchmarks/bench_storage.py --compare base.json run.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks import datagen
+
+FUNCTIONS = [
+    "login_user",
+    "login_upgrade",
+    "get_quiz_questions",
+    "save_score",
+    "get_leaderboard_data",
+    "delete_quiz",
+    "clean_student_data",
+]
+
+LOGIN_USERS = 5
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples):
+    return {
+        "n": len(samples),
+        "cold": samples[0],
+        "mean": statistics.fmean(samples),
+        "p50": percentile(samples, 50),
+        "p90": percentile(samples, 90),
+        "p99": percentile(samples, 99),
+        "max": max(samples),
+    }
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_size(folder, size, iterations):
+    """Time every function against `folder`; runs inside the child process."""
+    os.environ["QUIZ_DATA_DIR"] = str(folder)
+    import auth
+    import excel_db
+
+    excel_db.init_excel_db()
+    quizzes = max(size // 100, 1)
+    # Generated users have legacy SHA-256 hashes, replaced on their first
+    # login. login_user times steady-state logins of a few users upgraded
+    # here; login_upgrade times first logins of other users.
+    regulars = [f"student{size - i}" for i in range(LOGIN_USERS)]
+    for name in regulars:
+        auth.login_user(name, datagen.PASSWORD)
+    cases = {
+        "login_user": lambda i: auth.login_user(regulars[i % LOGIN_USERS], datagen.PASSWORD),
+        "login_upgrade": lambda i: auth.login_user(f"student{size - LOGIN_USERS - i}", datagen.PASSWORD),
+        "get_quiz_questions": lambda i: excel_db.get_quiz_questions(1 + i % quizzes),
+        "save_score": lambda i: excel_db.save_score(2 + i, None, 1 + i % quizzes, i % 101, 60),
+        "get_leaderboard_data": lambda i: excel_db.get_leaderboard_data(),
+        "delete_quiz": lambda i: excel_db.delete_quiz(quizzes - i),
+        "clean_student_data": lambda i: excel_db.clean_student_data(),
+    }
+
+    results = []
+    for name in FUNCTIONS:
+        fn = cases[name]
+        # clean_student_data rewrites the whole users table; a few runs suffice.
+        runs = min(iterations, 3) if name == "clean_student_data" else iterations
+        samples = []
+        for i in range(runs):
+            start = time.perf_counter()
+            fn(i)
+            samples.append(time.perf_counter() - start)
+        result = {"size": size, "function": name, **summarize(samples)}
+        result["peak_mb"] = round(peak_memory(lambda: fn(runs)) / 2**20, 3)
+        results.append(result)
+    return results
+
+
+def generate(size, cache_dir):
+    """Generate (or reuse) pristine data for `size` and return a working copy."""
+    pristine = cache_dir / f"data-{size}"
+    if not (pristine / "leaderboard.xlsx").exists():
+        print(f"Generating {size}-row data set...", file=sys.stderr)
+        datagen.generate(pristine, users=size, quizzes=max(size // 100, 1),
+                         questions=size, attempts=size)
+    work = Path(tempfile.mkdtemp(prefix=f"quizbench-{size}-"))
+    shutil.copytree(pristine, work, dirs_exist_ok=True)
+    return work
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(base_path, new_path):
+    base = {(r["size"], r["function"]): r for r in json.loads(Path(base_path).read_text())["results"]}
+    new = json.loads(Path(new_path).read_text())["results"]
+    print(f"{'size':>8} {'function':<22} {'p50 base':>10} {'p50 new':>10} {'ratio':>7}")
+    for r in new:
+        old = base.get((r["size"], r["function"]))
+        if old is None:
+            continue
+        ratio = r["p50"] / old["p50"] if old["p50"] else float("inf")
+        print(f"{r['size']:>8} {r['function']:<22} {old['p50'] * 1000:>9.2f}ms {r['p50'] * 1000:>9.2f}ms {ratio:>6.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the excel_db storage layer.")
+    parser.add_argument("--sizes", default="1000,10000",
+                        help="comma-separated row counts, e.g. 1000,10000,100000,1000000")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--storage", choices=["excel", "sqlite"], default="excel")
+    parser.add_argument("--cache-dir", default=Path(tempfile.gettempdir()) / "quizbench-data", type=Path,
+                        help="where generated data sets are kept between runs")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files")
+    parser.add_argument("--run-one", nargs=2, metavar=("FOLDER", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    if args.run_one:
+        folder, size = args.run_one
+        print(json.dumps(run_size(Path(folder), int(size), args.iterations)))
+        return 0
+
+    args.cache_dir.mkdir(parents=True, exist_ok=True)
+    env = dict(os.environ, QUIZ_STORAGE=args.storage)
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        work = generate(size, args.cache_dir)
+        try:
+            out = subprocess.run(
+                [sys.executable, __file__, "--run-one", str(work), str(size),
+                 "--iterations", str(args.iterations)],
+                env=env, capture_output=True, text=True, check=True).stdout
+            results.extend(json.loads(out.strip().splitlines()[-1]))
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+    report = json.dumps({
+        "revision": git_revision(),
+        "storage": args.storage,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "results": results,
+    }, indent=2)
+    if args.output:
+        Path(args.output).write_text(report)
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Peak memory and latency of the streaming readers on large workbooks.
+
+Compares, for each reader, the old full-model load (load_workbook without
+read_only), the streaming path used when a table does not fit in the cache,
+and a warm cache. Prints one JSON object per measurement.
+
+    python benchmarks/bench_streaming.py --rows 100000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks import datagen
+
+
+def measure(fn, reset):
+    """Return (seconds, peak bytes) for `fn`, timed without tracemalloc.
+
+    tracemalloc slows allocation-heavy code by several times, so latency and
+    peak memory come from two separate runs, each after `reset()`.
+    """
+    reset()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+
+    reset()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def full_model_scan(path, predicate):
+    """The pre-streaming reader: full cell model, then a values_only scan."""
+    from openpyxl import load_workbook
+    ws = load_workbook(path).active
+    return [row for row in ws.iter_rows(min_row=2, values_only=True) if predicate(row)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--data-dir", help="reuse an existing generated folder")
+    args = parser.parse_args(argv)
+
+    folder = Path(args.data_dir or tempfile.mkdtemp(prefix="quizbench-"))
+    if not (folder / "questions.xlsx").exists():
+        datagen.generate(folder, users=1000, quizzes=100, questions=args.rows, attempts=args.rows)
+
+    os.environ["QUIZ_DATA_DIR"] = str(folder)
+    import auth
+    import excel_db
+
+    quiz_id = 50
+    last_user = "student1000"
+    readers = {
+        "get_quiz_questions": (lambda: excel_db.get_quiz_questions(quiz_id),
+                               excel_db.QUESTIONS_FILE, lambda row: row[1] == quiz_id),
+        "get_top_scores": (lambda: excel_db.get_top_scores(quiz_id, 10),
+                           excel_db.LEADERBOARD_FILE, lambda row: row[2] == quiz_id),
+        "leaderboard_top20": (lambda: list(excel_db.iter_leaderboard_data(limit=20)),
+                              excel_db.LEADERBOARD_FILE, lambda row: True),
+        "get_all_students": (excel_db.get_all_students,
+                             excel_db.USERS_FILE, lambda row: row[3] == "student"),
+        "login_user": (lambda: auth.login_user(last_user, datagen.PASSWORD),
+                       excel_db.USERS_FILE, lambda row: row[1] == last_user),
+    }
+
+    cache = excel_db._table_cache
+    default_cap = cache.max_rows
+    for name, (reader, path, predicate) in readers.items():
+        modes = {
+            "full_model": lambda: full_model_scan(path, predicate),
+            "streaming": reader,
+            "cached": reader,
+        }
+        for mode, fn in modes.items():
+            def reset():
+                excel_db.clear_cache()
+                cache.max_rows = 0 if mode == "streaming" else default_cap
+                if mode == "cached":
+                    fn()
+
+            elapsed, peak = measure(fn, reset)
+            print(json.dumps({
+                "reader": name,
+                "mode": mode,
+                "rows": args.rows,
+                "seconds": round(elapsed, 4),
+                "peak_mb": round(peak / 2**20, 2),
+            }), flush=True)
+    cache.max_rows = default_cap
+
+
+if __name__ == "__main__":
+    sys.exit(main())
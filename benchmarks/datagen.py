@@ -0,0 +1,93 @@
+"""Synthetic data generators for the quiz workbooks.
+
+Writes users.xlsx, quizzes.xlsx, questions.xlsx and leaderboard.xlsx into a
+folder using openpyxl's write-only mode, so even very large files are
+produced in constant memory.
+
+    python benchmarks/datagen.py /tmp/quizdata --questions 100000 --attempts 100000
+"""
+import argparse
+import hashlib
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from openpyxl import Workbook
+
+HEADERS = {
+    "users.xlsx": ["id", "username", "password", "role"],
+    "quizzes.xlsx": ["id", "title", "description"],
+    "questions.xlsx": ["id", "quiz_id", "question_text", "option1", "option2", "option3", "option4", "correct_answer"],
+    "leaderboard.xlsx": ["id", "user_id", "quiz_id", "score", "time_taken", "taken_at"],
+}
+
+SUBJECTS = ["Mathematics", "Bangla", "English", "General Knowledge"]
+
+# Every generated account uses the password "1234".
+PASSWORD = "1234"
+PASSWORD_HASH = hashlib.sha256(PASSWORD.encode()).hexdigest()
+
+
+def _write(path, header, rows):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def user_rows(count, teachers=1):
+    for i in range(1, count + 1):
+        role = "teacher" if i <= teachers else "student"
+        yield [i, f"{role}{i}", PASSWORD_HASH, role]
+
+
+def quiz_rows(count):
+    for i in range(1, count + 1):
+        yield [i, f"{SUBJECTS[i % len(SUBJECTS)]}: Quiz {i}", f"Generated quiz {i}"]
+
+
+def question_rows(count, quizzes, rng):
+    # Questions are grouped by quiz, as they are when teachers save quizzes.
+    per_quiz = max(count // max(quizzes, 1), 1)
+    for i in range(1, count + 1):
+        quiz_id = min((i - 1) // per_quiz + 1, quizzes)
+        yield [i, quiz_id, f"Question {i}?", "A", "B", "C", "D", rng.randrange(4)]
+
+
+def attempt_rows(count, users, quizzes, rng, start=datetime(2025, 1, 1)):
+    # One attempt every five minutes, in id order.
+    for i in range(1, count + 1):
+        taken_at = (start + timedelta(minutes=5 * i)).isoformat(timespec="seconds")
+        yield [i, rng.randint(1, users), rng.randint(1, quizzes), rng.randint(0, 100), rng.randint(10, 900), taken_at]
+
+
+def generate(folder, users=1000, quizzes=100, questions=10000, attempts=10000, seed=42):
+    """Fill `folder` with the four workbooks at the requested sizes."""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    _write(folder / "users.xlsx", HEADERS["users.xlsx"], user_rows(users))
+    _write(folder / "quizzes.xlsx", HEADERS["quizzes.xlsx"], quiz_rows(quizzes))
+    _write(folder / "questions.xlsx", HEADERS["questions.xlsx"], question_rows(questions, quizzes, rng))
+    _write(folder / "leaderboard.xlsx", HEADERS["leaderboard.xlsx"], attempt_rows(attempts, users, quizzes, rng))
+    return folder
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic quiz workbooks.")
+    parser.add_argument("folder")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--quizzes", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=10000)
+    parser.add_argument("--attempts", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    generate(args.folder, args.users, args.quizzes, args.questions, args.attempts, args.seed)
+    print(f"Generated data in {args.folder}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
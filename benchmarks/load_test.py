@@ -0,0 +1,253 @@
+"""Simulate many students taking quizzes against one data folder at once.
+
+Each simulated student logs in with auth.login_user, then --attempts times
+fetches a random quiz's questions with get_quiz_questions, "answers" them
+(sleeping --think-time seconds per question) and records a score with
+save_score. Students run as threads of one process or, with --mode
+processes, each in its own process, like separate lab PCs sharing a
+folder. All of them start together once every student is ready.
+
+Afterwards the leaderboard is reloaded from disk and compared with the
+scores the students were told were saved:
+
+* lost: saved according to save_score but missing from the leaderboard;
+* unexpected: present but never reported saved (duplicates, or writes
+  that raised and still landed);
+* duplicate_ids: leaderboard ids used more than once;
+* corrupted: the leaderboard could not be read back at all.
+
+Lock contention is the file-lock statistics summed over all students'
+processes; the SQLite backend does its own locking, so there it shows up
+as latency and failed writes instead.
+
+    python benchmarks/load_test.py --students 50 --attempts 5 --mode processes
+    python benchmarks/load_test.py --students 50 --attempts 5 --storage sqlite
+    python benchmarks/load_test.py --students 50 --attempts 5 --partitioned
+    python benchmarks/load_test.py --students 50 --attempts 5 --score-log
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks import datagen
+from benchmarks.bench_storage import percentile
+
+OPERATIONS = ("login", "get_quiz_questions", "save_score", "attempt")
+BARRIER_TIMEOUT = 600
+
+
+def simulate_student(student, options, barrier):
+    """Run one student's session; returns latencies, saved scores and errors."""
+    # Imported here so worker processes pick up QUIZ_DATA_DIR and QUIZ_STORAGE.
+    import auth
+    from excel_db import get_quiz_questions, save_score
+    from locking import lock_stats
+
+    rng = random.Random(options["seed"] * 100003 + student)
+    username = f"student{student}"
+    latencies = {name: [] for name in OPERATIONS}
+    errors = Counter()
+    saved = []
+
+    barrier.wait(BARRIER_TIMEOUT)
+    started = time.time()
+
+    t0 = time.perf_counter()
+    user = auth.login_user(username, datagen.PASSWORD)
+    latencies["login"].append(time.perf_counter() - t0)
+    if user is None:
+        errors["login"] += 1
+        return {"latencies": latencies, "errors": errors, "saved": saved,
+                "started": started, "finished": time.time(), "locks": lock_stats()}
+
+    for _ in range(options["attempts"]):
+        quiz_id = rng.randint(1, options["quizzes"])
+        attempt_start = time.perf_counter()
+        try:
+            questions = get_quiz_questions(quiz_id)
+        except Exception:
+            errors["get_quiz_questions"] += 1
+            continue
+        latencies["get_quiz_questions"].append(time.perf_counter() - attempt_start)
+
+        time.sleep(options["think_time"] * len(questions))
+        correct = sum(rng.random() < 0.7 for _ in questions)
+        score = round(correct / len(questions) * 100) if questions else 0
+        time_taken = rng.randint(10, 900)
+
+        t0 = time.perf_counter()
+        try:
+            save_score(user['id'], user['name'], quiz_id, score, time_taken)
+        except Exception:
+            errors["save_score"] += 1
+            continue
+        latencies["save_score"].append(time.perf_counter() - t0)
+        latencies["attempt"].append(time.perf_counter() - attempt_start)
+        saved.append((user['id'], quiz_id, score, time_taken))
+
+    return {"latencies": latencies, "errors": errors, "saved": saved,
+            "started": started, "finished": time.time(), "locks": lock_stats()}
+
+
+def run_students(mode, students, options):
+    """Run every student concurrently; returns their results."""
+    ids = list(range(2, students + 2))
+    if mode == "threads":
+        from locking import reset_lock_stats
+
+        reset_lock_stats()
+        barrier = threading.Barrier(students)
+        with ThreadPoolExecutor(max_workers=students) as pool:
+            return list(pool.map(simulate_student, ids, [options] * students, [barrier] * students))
+
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        barrier = manager.Barrier(students)
+        with ProcessPoolExecutor(max_workers=students, mp_context=context) as pool:
+            return list(pool.map(simulate_student, ids, [options] * students, [barrier] * students))
+
+
+def combined_locks(mode, results):
+    if mode == "threads":
+        # Threads share one process, so every result holds the same totals.
+        return results[-1]["locks"] if results else {}
+    locks = {"acquisitions": 0, "contended": 0, "timeouts": 0, "total_wait": 0.0, "max_wait": 0.0}
+    for result in results:
+        for name in ("acquisitions", "contended", "timeouts", "total_wait"):
+            locks[name] += result["locks"][name]
+        locks["max_wait"] = max(locks["max_wait"], result["locks"]["max_wait"])
+    locks["mean_wait"] = locks["total_wait"] / locks["acquisitions"] if locks["acquisitions"] else 0.0
+    return locks
+
+
+def read_back():
+    """Reload the leaderboard from disk; returns (rows, error)."""
+    import excel_db
+
+    excel_db.clear_cache()
+    try:
+        return [tuple(row) for row in excel_db.iter_attempts()], None
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+
+
+def check_writes(baseline, rows, saved):
+    """Compare the leaderboard after the run with the scores reported saved."""
+    before = Counter(row[1:5] for row in baseline)
+    after = Counter(row[1:5] for row in rows)
+    added = after - before
+    expected = Counter(saved)
+    ids = Counter(row[0] for row in rows)
+    return {
+        "reported_saved": sum(expected.values()),
+        "found": sum((added & expected).values()),
+        "lost": sum((expected - added).values()),
+        "unexpected": sum((added - expected).values()),
+        "duplicate_ids": sum(count - 1 for count in ids.values() if count > 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent students against one data folder.")
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--attempts", type=int, default=5, help="quizzes taken by each student")
+    parser.add_argument("--think-time", type=float, default=0.05, help="seconds spent per question")
+    parser.add_argument("--mode", choices=["threads", "processes"], default="threads")
+    parser.add_argument("--storage", choices=["excel", "sqlite"], default="excel")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="split questions per quiz and attempts per month first (Excel only)")
+    parser.add_argument("--score-log", action="store_true",
+                        help="move attempts to the binary score log first (Excel only)")
+    parser.add_argument("--quizzes", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=500)
+    parser.add_argument("--attempts-before", type=int, default=1000,
+                        help="leaderboard rows generated before the run")
+    parser.add_argument("--checkpoint-bytes", type=int,
+                        help="override QUIZ_JOURNAL_CHECKPOINT_BYTES to checkpoint more often")
+    parser.add_argument("--pbkdf2-iterations", type=int,
+                        help="override QUIZ_PBKDF2_ITERATIONS for this run")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    folder = Path(tempfile.mkdtemp(prefix="quizbench-load-"))
+    try:
+        datagen.generate(folder, users=args.students + 1, quizzes=args.quizzes, questions=args.questions,
+                         attempts=args.attempts_before, seed=args.seed)
+        # Set before excel_db is imported here or in any worker process.
+        os.environ["QUIZ_DATA_DIR"] = str(folder)
+        os.environ["QUIZ_STORAGE"] = args.storage
+        if args.checkpoint_bytes:
+            os.environ["QUIZ_JOURNAL_CHECKPOINT_BYTES"] = str(args.checkpoint_bytes)
+        if args.pbkdf2_iterations:
+            os.environ["QUIZ_PBKDF2_ITERATIONS"] = str(args.pbkdf2_iterations)
+        if args.partitioned:
+            subprocess.run([sys.executable, str(ROOT / "excel_db.py"), "partition"], check=True,
+                           env=dict(os.environ, QUIZ_STORAGE="excel"), stdout=subprocess.DEVNULL)
+        if args.score_log:
+            subprocess.run([sys.executable, str(ROOT / "excel_db.py"), "scorelog"], check=True,
+                           env=dict(os.environ, QUIZ_STORAGE="excel"), stdout=subprocess.DEVNULL)
+        if args.storage == "sqlite":
+            subprocess.run([sys.executable, str(ROOT / "sqlite_db.py"), "migrate"], check=True,
+                           stdout=subprocess.DEVNULL)
+
+        baseline, error = read_back()
+        if error:
+            raise RuntimeError(f"could not read the generated leaderboard: {error}")
+        options = {"attempts": args.attempts, "think_time": args.think_time,
+                   "quizzes": args.quizzes, "seed": args.seed}
+        results = run_students(args.mode, args.students, options)
+        rows, corrupted = read_back()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    latencies = {name: [t for result in results for t in result["latencies"][name]] for name in OPERATIONS}
+    errors = sum((Counter(result["errors"]) for result in results), Counter())
+    wall = max(r["finished"] for r in results) - min(r["started"] for r in results)
+    writes = check_writes(baseline, rows, [score for result in results for score in result["saved"]])
+    writes["corrupted"] = corrupted
+
+    print(json.dumps({
+        "storage": args.storage,
+        "mode": args.mode,
+        "partitioned": args.partitioned,
+        "score_log": args.score_log,
+        "students": args.students,
+        "attempts_per_student": args.attempts,
+        "think_time": args.think_time,
+        "cpus": os.cpu_count(),
+        "wall_seconds": wall,
+        "attempts_per_s": len(latencies["attempt"]) / wall if wall else 0.0,
+        "saves_per_s": len(latencies["save_score"]) / wall if wall else 0.0,
+        "latency_ms": {
+            name: {
+                "count": len(samples),
+                "p50": percentile(samples, 50) * 1000,
+                "p90": percentile(samples, 90) * 1000,
+                "p99": percentile(samples, 99) * 1000,
+                "max": max(samples) * 1000,
+            }
+            for name, samples in latencies.items() if samples
+        },
+        "errors": dict(errors),
+        "locks": combined_locks(args.mode, results),
+        "writes": writes,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,8 @@
+import os
+from pathlib import Path
+
+# Folder holding the workbooks (and the SQLite file when that backend is used).
+DB_FOLDER = Path(os.environ.get("QUIZ_DATA_DIR") or Path(__file__).parent / "data")
+
+# Storage backend behind the excel_db API: "excel" (default) or "sqlite".
+STORAGE_BACKEND = os.environ.get("QUIZ_STORAGE", "excel").strip().lower()
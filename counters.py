@@ -0,0 +1,58 @@
+"""Persisted id counters, one small file next to each workbook.
+
+``<workbook>.next_id`` holds the id the next inserted row gets. excel_db
+raises it under the table's write lock before journaling new rows, and
+never lowers it, so:
+
+- allocating an id does not need the table's rows, even for a table too
+  large to cache;
+- checkpoints and compaction, which rewrite the workbook without its
+  deleted rows, never bring a deleted row's id round again.
+
+A table without a counter (written by an older version, or by hand) gets
+one from its rows on its next insert.
+"""
+import os
+from pathlib import Path
+
+import instrumentation
+
+
+def counter_path(path):
+    path = Path(path)
+    return path.with_name(path.name + ".next_id")
+
+
+def read(path):
+    """Return the stored next id of `path`, or None if it has no counter."""
+    try:
+        with open(counter_path(path), encoding="ascii") as f:
+            return int(f.read())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write(path, next_id):
+    counter = counter_path(path)
+    tmp_path = counter.with_name(counter.name + ".tmp")
+    data = str(next_id)
+    with open(tmp_path, "w", encoding="ascii") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, counter)
+    instrumentation.record(bytes_written=len(data))
+
+
+def raise_to(path, next_id):
+    """Store `next_id` as the counter of `path` unless it is already at least that."""
+    current = read(path)
+    if current is None or current < next_id:
+        write(path, next_id)
+
+
+def remove(path):
+    try:
+        os.remove(counter_path(path))
+    except FileNotFoundError:
+        pass
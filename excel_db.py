@@ -1,9 +1,23 @@
+import atexit
+import heapq
+from itertools import chain, islice
 import os
-from openpyxl import Workbook, load_workbook
-from pathlib import Path
+import threading
+import time
+import zipfile
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
+from config import DB_FOLDER, STORAGE_BACKEND
+from table_cache import TableCache
+from leaderboard_view import TopScores
+from locking import FileLock
+import counters
+import journal
+import partitions
+import score_log
+import snapshot
+import instrumentation
 
-DB_FOLDER = Path(__file__).parent / "data"
 DB_FOLDER.mkdir(exist_ok=True)  
 
 USERS_FILE = DB_FOLDER / "users.xlsx"
@@ -11,240 +25,1170 @@ QUIZZES_FILE = DB_FOLDER / "quizzes.xlsx"
 QUESTIONS_FILE = DB_FOLDER / "questions.xlsx"
 LEADERBOARD_FILE = DB_FOLDER / "leaderboard.xlsx"
 
+HEADERS = {
+    USERS_FILE: ["id", "username", "password", "role"],
+    QUIZZES_FILE: ["id", "title", "description"],
+    QUESTIONS_FILE: ["id", "quiz_id", "question_text", "option1", "option2", "option3", "option4", "correct_answer"],
+    LEADERBOARD_FILE: ["id", "user_id", "quiz_id", "score", "time_taken", "taken_at"],
+}
+
+# With a manifest, questions and attempts are partitioned; see partitions.py.
+MANIFEST_FILE = partitions.manifest_path(DB_FOLDER)
+_manifest = partitions.Manifest(DB_FOLDER)
+_PARTITIONED_TABLES = {
+    partitions.QUESTIONS_DIR: QUESTIONS_FILE,
+    partitions.LEADERBOARD_DIR: LEADERBOARD_FILE,
+}
+
+# With a score log, attempts are records in one binary file instead of
+# leaderboard workbooks; see score_log.py.
+SCORE_LOG_FILE = score_log.log_path(DB_FOLDER)
+_score_log = score_log.ScoreLog(SCORE_LOG_FILE)
+
+# Once a journal grows past this size it is folded back into its workbook.
+JOURNAL_CHECKPOINT_BYTES = int(os.environ.get("QUIZ_JOURNAL_CHECKPOINT_BYTES", str(1024 * 1024)))
+
+# Keep a binary snapshot next to each workbook and load it instead of the
+# .xlsx while the workbook is unchanged; see snapshot.py.
+SNAPSHOTS = os.environ.get("QUIZ_SNAPSHOTS", "1") != "0"
+
+# Rankings up to this length are served from an incrementally maintained view.
+LEADERBOARD_TOP_K = int(os.environ.get("QUIZ_LEADERBOARD_TOP_K", "100"))
+
+# Deleting a quiz compacts the workbooks in the background once the rows
+# that compaction would drop number at least this many and this fraction
+# of all quiz, question and leaderboard rows.
+COMPACT_MIN_GARBAGE_ROWS = int(os.environ.get("QUIZ_COMPACT_MIN_GARBAGE_ROWS", "1000"))
+COMPACT_GARBAGE_RATIO = float(os.environ.get("QUIZ_COMPACT_GARBAGE_RATIO", "0.2"))
+
+# One lock per workbook serializes id allocation, journal appends and
+# checkpoints across threads and app instances sharing the data folder.
+_locks = {path: FileLock(path) for path in HEADERS}
+_locks_guard = threading.Lock()
+
+# Parsed rows of the four workbooks, shared by every reader in the process.
+_table_cache = TableCache()
+
+_initialized = False
+_init_lock = threading.Lock()
+
+# Held while a background compaction runs, so deletes never start a second one.
+_compact_lock = threading.Lock()
+
+def _table_of(path):
+    """The table (a key of HEADERS) that a workbook or partition belongs to."""
+    if path in HEADERS:
+        return path
+    if path == SCORE_LOG_FILE:
+        return LEADERBOARD_FILE
+    return _PARTITIONED_TABLES[path.parent.name]
+
+def _headers(path):
+    return HEADERS[_table_of(path)]
+
+def _partitioned():
+    return _manifest.read() is not None
+
+def _logged():
+    return SCORE_LOG_FILE.exists()
+
+def _question_tables():
+    """The workbooks holding questions, quiz by quiz when partitioned."""
+    if not _partitioned():
+        return [QUESTIONS_FILE] if QUESTIONS_FILE.exists() else []
+    return [path for path in _manifest.question_paths().values() if path.exists()]
+
+def _attempt_tables():
+    """The workbooks holding leaderboard rows, oldest first; none with a score log."""
+    if _logged():
+        return []
+    if not _partitioned():
+        return [LEADERBOARD_FILE] if LEADERBOARD_FILE.exists() else []
+    return [path for path, _ in _manifest.leaderboard_partitions() if path.exists()]
+
+def _question_id_table():
+    """What to lock to allocate question ids: the manifest when partitioned."""
+    return MANIFEST_FILE if _partitioned() else QUESTIONS_FILE
+
+def _stream_rows(path):
+    """Yield the data rows of a workbook without building its cell model.
+
+    Read-only mode parses the sheet XML as it goes; rows are padded to the
+    header width because trailing empty cells are not reported. The parse
+    time recorded for instrumentation includes the consumer's time between
+    rows, which is negligible when loading into the cache.
+    """
+    from openpyxl import load_workbook
+
+    width = len(_headers(path))
+    start = time.perf_counter()
+    count = 0
+    wb = load_workbook(path, read_only=True)
+    try:
+        for row in wb.active.iter_rows(min_row=2, values_only=True):
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            count += 1
+            yield row
+    finally:
+        wb.close()
+        instrumentation.record(parse_seconds=time.perf_counter() - start,
+                               bytes_read=path.stat().st_size, rows_scanned=count)
+
+def _snapshot_rows(path):
+    """Yield the data rows of a workbook, from its snapshot while that is current.
+
+    Otherwise the workbook is parsed, and a snapshot of it written as the
+    rows go by; a caller that stops early leaves no snapshot behind.
+    """
+    if not SNAPSHOTS:
+        yield from _stream_rows(path)
+        return
+    start = time.perf_counter()
+    rows = snapshot.iter_rows(path, len(_headers(path)))
+    if rows is not None:
+        count = 0
+        for count, row in enumerate(rows, 1):
+            yield row
+        instrumentation.record(parse_seconds=time.perf_counter() - start,
+                               bytes_read=snapshot.sidecar_path(path).stat().st_size, rows_scanned=count)
+        return
+
+    source_stamp = snapshot.stamp(path)
+    writer = snapshot.Writer(path, len(_headers(path)))
+    try:
+        for row in _stream_rows(path):
+            writer.add(row)
+            yield row
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit(source_stamp)
+
+def _load_rows(path):
+    return list(_snapshot_rows(path))
+
+def _sheet_row_count(path):
+    if SNAPSHOTS:
+        count = snapshot.row_count(path)
+        if count is not None:
+            return count
+
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True)
+    try:
+        max_row = wb.active.max_row
+    finally:
+        wb.close()
+    if max_row is None:
+        # Saved in write-only mode (as by _rewrite_table), which records no
+        # dimension: count the row tags without parsing the XML.
+        max_row = _count_row_tags(path)
+    return max(max_row - 1, 0)
+
+def _count_row_tags(path, block=1024 * 1024):
+    with zipfile.ZipFile(path) as archive:
+        sheet = min(name for name in archive.namelist() if name.startswith("xl/worksheets/sheet"))
+        count, tail = 0, b""
+        with archive.open(sheet) as f:
+            while chunk := f.read(block):
+                data = tail + chunk
+                count += data.count(b"<row ") + data.count(b"<row>")
+                tail = data[-5:]
+                # A tag split across the boundary is counted with the next chunk.
+                count -= tail.count(b"<row ") + tail.count(b"<row>")
+        return count + tail.count(b"<row ") + tail.count(b"<row>")
+
+def _read_table(path):
+    """Return the data rows (header excluded) of a workbook, served from the cache."""
+    return _table_cache.get(path, _load_rows)
+
+def _cacheable(path):
+    return _table_cache.peek(path) is not None or _sheet_row_count(path) <= _table_cache.max_rows
+
+def _index(path, column):
+    """Return the {value: [rows]} index on `column`, or None if the table is too large to cache."""
+    if not _cacheable(path):
+        return None
+    return _table_cache.index(path, _load_rows, column)
+
+def _top_scores_view(path):
+    if not _cacheable(path):
+        return None
+    return _table_cache.view(path, _load_rows, "top_scores",
+                             lambda rows: TopScores(rows, LEADERBOARD_TOP_K))
+
+def username_key(value):
+    """How usernames are compared: as text, without surrounding whitespace.
+
+    Names typed into users.xlsx by hand may be stored as numbers or with
+    stray spaces; they still match what the user types at login.
+    """
+    return str(value).strip()
+
+class _Usernames(dict):
+    """{username_key: first row with that name} of users.xlsx, kept as a table cache view."""
+
+    def __init__(self, rows):
+        super().__init__()
+        self.add(rows)
+
+    def add(self, rows):
+        for row in rows:
+            if len(row) > 1 and row[1] is not None:
+                self.setdefault(username_key(row[1]), row)
+
+def _usernames_view():
+    if not _cacheable(USERS_FILE):
+        return None
+    return _table_cache.view(USERS_FILE, _load_rows, "usernames", _Usernames)
+
+def _rows_where(path, column, value):
+    """Rows whose `column` equals `value`, via the hash index when available."""
+    index = _index(path, column)
+    if index is not None:
+        rows = index.get(value, ())
+        instrumentation.record(rows_scanned=len(rows))
+        return rows
+    return (row for row in _iter_table(path) if row[column] == value)
+
+def _iter_table(path):
+    """Iterate the data rows of a workbook, streaming when it cannot be cached.
+
+    Tables that fit in the cache are loaded into it; larger ones are read
+    row by row with the journal replayed on the fly, so a caller that stops
+    early also stops parsing.
+    """
+    rows = _table_cache.peek(path)
+    if rows is None and _sheet_row_count(path) <= _table_cache.max_rows:
+        rows = _read_table(path)
+    if rows is not None:
+        count = 0
+        try:
+            for count, row in enumerate(rows, 1):
+                yield row
+        finally:
+            instrumentation.record(rows_scanned=count)
+        return
+    records, _ = journal.read(path)
+    yield from journal.replay_stream(_snapshot_rows(path), records)
+
+@contextmanager
+def _locked(*paths):
+    """Hold the write locks of `paths` for one read-modify-write cycle.
+
+    Tables that fit in the cache are loaded before locking, so the critical
+    section only replays journal records appended by other clients; larger
+    ones are not read at all, as appending to them only needs their id
+    counter. Locks are always taken in _lock_order, which rules out
+    deadlocks.
+    """
+    for path in paths:
+        if path.suffix == ".xlsx" and path.exists() and _cacheable(path):
+            _read_table(path)
+    with ExitStack() as stack:
+        for path in sorted(set(paths), key=_lock_order):
+            stack.enter_context(_lock(path))
+        yield
+
+def _lock_order(path):
+    # HEADERS order, with the manifest between quizzes and questions and
+    # partitions of one table ordered by name.
+    if path == MANIFEST_FILE:
+        return list(HEADERS).index(QUIZZES_FILE), 1, ""
+    return list(HEADERS).index(_table_of(path)), 0, str(path)
+
+def _lock(path):
+    with _locks_guard:
+        lock = _locks.get(path)
+        if lock is None:
+            lock = _locks[path] = FileLock(path)
+        return lock
+
+def _next_id(path):
+    """The id for the next row of `path`; call it holding the table's lock.
+
+    Read from the table's counter (see counters.py). The rows are only
+    consulted when they are cached anyway, to catch rows typed into the
+    workbook by hand, or when the table has no counter yet.
+    """
+    stored = counters.read(path)
+    if stored is None or _table_cache.peek(path) is not None:
+        return max(_table_cache.next_id(path, _load_rows), stored or 1)
+    return stored
+
+def _raise_counter(path, rows):
+    ids = [row[0] for row in rows if row and isinstance(row[0], int)]
+    if ids:
+        counters.raise_to(path, max(ids) + 1)
+
+def _append_rows(path, rows, checkpoint=True):
+    """Record new rows in the workbook's journal instead of rewriting the file."""
+    # Counted before they are journaled, so a crash in between only skips ids.
+    _raise_counter(path, rows)
+    journal.append(path, [journal.insert_record(rows)])
+    if checkpoint:
+        _maybe_checkpoint(path)
+
+def _delete_rows(path, column, value):
+    journal.append(path, [journal.delete_record(column, value)])
+    _maybe_checkpoint(path)
+
+def _update_rows(path, column, value, changes):
+    journal.append(path, [journal.update_record(column, value, changes)])
+    _maybe_checkpoint(path)
+
+def _rewrite_table(path, rows):
+    """Replace the workbook with `rows` in one pass and drop its journal."""
+    from openpyxl import Workbook
+
+    if path.exists() and counters.read(path) is None:
+        # Keep counting past rows being dropped, such as deleted quizzes.
+        counters.write(path, _next_id(path))
+
+    start = time.perf_counter()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(_headers(path))
+    sidecar = snapshot.Writer(path, len(_headers(path)), exact=True) if SNAPSHOTS else None
+    next_id = 1
+    try:
+        for row in rows:
+            ws.append(list(row))
+            if sidecar is not None:
+                sidecar.add(row)
+            if row and isinstance(row[0], int) and row[0] >= next_id:
+                next_id = row[0] + 1
+
+        tmp_path = path.with_name(path.stem + ".tmp" + path.suffix)
+        wb.save(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if sidecar is not None:
+            sidecar.abort()
+        raise
+    if sidecar is not None:
+        sidecar.commit(snapshot.stamp(path))
+    instrumentation.record(save_seconds=time.perf_counter() - start,
+                           bytes_written=path.stat().st_size)
+    counters.raise_to(path, next_id)
+    journal.truncate(path)
+    _table_cache.invalidate(path)
+
+def _create_partition(path, rows=()):
+    path.parent.mkdir(exist_ok=True)
+    _rewrite_table(path, rows)
+
+def _remove_table(path):
+    for name in (path, journal.journal_path(path), snapshot.sidecar_path(path), counters.counter_path(path)):
+        try:
+            os.remove(name)
+        except FileNotFoundError:
+            pass
+    _table_cache.invalidate(path)
+
+def checkpoint(path=None):
+    """Fold pending journal records into their workbooks.
+
+    Runs for a single workbook or, with no argument, for all of them. A
+    workbook that cannot be replaced right now (for example because it is
+    open in Excel) keeps its journal and is retried on the next checkpoint.
+    """
+    paths = [path] if path is not None else [USERS_FILE, QUIZZES_FILE, *_question_tables(), *_attempt_tables()]
+    for path in paths:
+        if not journal.journal_size(path) or not path.exists():
+            continue
+        try:
+            with _locked(path):
+                _rewrite_table(path, list(_read_table(path)))
+        except OSError as e:
+            print(f"Checkpoint of {path.name} postponed: {e}")
+
+def _maybe_checkpoint(path):
+    if journal.journal_size(path) >= JOURNAL_CHECKPOINT_BYTES:
+        checkpoint(path)
+
+def clear_cache():
+    _table_cache.invalidate()
+
+def cache_stats():
+    return _table_cache.stats()
+
 def init_excel_db():
-    print("Initializing Excel database...")
-    if not USERS_FILE.exists():
-        wb = Workbook()
-        ws = wb.active
-        ws.append(["id", "username", "password", "role"])
-        wb.save(USERS_FILE)
-    
-    if not QUIZZES_FILE.exists():
-        wb = Workbook()
-        ws = wb.active
-        ws.append(["id", "title", "description"])
-        wb.save(QUIZZES_FILE)
-    
-    if not QUESTIONS_FILE.exists():
-        wb = Workbook()
-        ws = wb.active
-        ws.append(["id", "quiz_id", "question_text", "option1", "option2", "option3", "option4", "correct_answer"])
-        wb.save(QUESTIONS_FILE)
-    
-    if not LEADERBOARD_FILE.exists():
-        wb = Workbook()
-        ws = wb.active
-        ws.append(["id", "user_id", "quiz_id", "score", "time_taken"])
-        wb.save(LEADERBOARD_FILE)
+    """Create any missing workbooks.
+
+    Only the first call in a process does any work, so every entry point
+    can call it unconditionally.
+    """
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        print("Initializing Excel database...")
+        DB_FOLDER.mkdir(parents=True, exist_ok=True)
+        tables = [USERS_FILE, QUIZZES_FILE] if _partitioned() else list(HEADERS)
+        if _logged():
+            tables = [path for path in tables if path != LEADERBOARD_FILE]
+        missing = [path for path in tables if not path.exists()]
+        if missing:
+            from openpyxl import Workbook
+
+            for path in missing:
+                wb = Workbook()
+                ws = wb.active
+                ws.append(HEADERS[path])
+                wb.save(path)
+        _initialized = True
 
 def add_user(username, password, role):
-    wb = load_workbook(USERS_FILE)
-    ws = wb.active
-    new_id = len(ws['A'])
-    ws.append([new_id, username, password, role])
-    wb.save(USERS_FILE)
+    with _locked(USERS_FILE):
+        new_id = _next_id(USERS_FILE)
+        _append_rows(USERS_FILE, [[new_id, username, password, role]])
     return new_id
 
+def add_user_if_new(username, password, role):
+    """Add a user unless the username is taken; returns the new id or None.
+
+    The check and the insert happen under one lock, so two clients
+    registering the same name at once cannot both succeed.
+    """
+    with _locked(USERS_FILE):
+        if get_user(username):
+            return None
+        return add_user(username, password, role)
+
 def get_user(username):
-    wb = load_workbook(USERS_FILE)
-    ws = wb.active
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if row[1] == username:
-            return {"id": row[0], "username": row[1], "password": row[2], "role": row[3]}
-    return None
+    """Return the first user whose name matches `username` (see username_key), or None."""
+    if not USERS_FILE.exists():
+        return None
+    key = username_key(username)
+    usernames = _usernames_view()
+    if usernames is not None:
+        row = usernames.get(key)
+    else:
+        row = next((row for row in _iter_table(USERS_FILE)
+                    if len(row) > 1 and row[1] is not None and username_key(row[1]) == key), None)
+    if row is None:
+        return None
+    return {"id": row[0], "username": row[1], "password": row[2], "role": row[3]}
+
+def update_user_password(user_id, password):
+    """Replace the stored password hash of `user_id`."""
+    with _locked(USERS_FILE):
+        _update_rows(USERS_FILE, 0, user_id, {2: password})
 
 def add_quiz(title, description=""):
-    wb = load_workbook(QUIZZES_FILE)
-    ws = wb.active
-    new_id = len(ws['A'])
-    ws.append([new_id, title, description])
-    wb.save(QUIZZES_FILE)
+    with _locked(QUIZZES_FILE):
+        new_id = _next_id(QUIZZES_FILE)
+        _append_rows(QUIZZES_FILE, [[new_id, title, description]])
     return new_id
 
-def get_all_quizzes():
-    wb = load_workbook(QUIZZES_FILE)
-    ws = wb.active
-    return [{"id": row[0], "title": row[1], "description": row[2]} 
-            for row in ws.iter_rows(min_row=2, values_only=True)]
-
 def add_question_to_quiz(quiz_id, question_text, options, correct_index):
-    wb = load_workbook(QUESTIONS_FILE)
-    ws = wb.active
-    
-    new_id = len(ws['A']) + 1
-    ws.append([
-        new_id,
-        quiz_id,
-        question_text,
-        options[0],
-        options[1],
-        options[2],
-        options[3],
-        correct_index
-    ])
-    
-    wb.save(QUESTIONS_FILE)
+    if _partitioned():
+        _add_partitioned_questions({quiz_id: [(question_text, options, correct_index)]})
+        return
+    with _locked(QUESTIONS_FILE):
+        new_id = _next_id(QUESTIONS_FILE)
+        _append_rows(QUESTIONS_FILE, [[
+            new_id,
+            quiz_id,
+            question_text,
+            options[0],
+            options[1],
+            options[2],
+            options[3],
+            correct_index
+        ]])
+
+def _question_rows(first_id, quiz_id, questions):
+    return [[first_id + i, quiz_id, question_text, options[0], options[1], options[2], options[3], correct_index]
+            for i, (question_text, options, correct_index) in enumerate(questions)]
+
+def add_questions_to_quiz(quiz_id, questions):
+    """Add several questions with a single journal write.
+
+    `questions` is a sequence of (question_text, options, correct_index)
+    tuples, as taken by add_question_to_quiz. Returns the new question ids.
+    """
+    questions = list(questions)
+    if _partitioned():
+        return _add_partitioned_questions({quiz_id: questions})
+    with _locked(QUESTIONS_FILE):
+        first_id = _next_id(QUESTIONS_FILE)
+        rows = _question_rows(first_id, quiz_id, questions)
+        if rows:
+            _append_rows(QUESTIONS_FILE, rows)
+    return [row[0] for row in rows]
+
+def _add_partitioned_questions(questions_by_quiz, checkpoint=True):
+    """Append questions to their quizzes' workbooks; returns the new ids.
+
+    `questions_by_quiz` maps quiz ids to (question_text, options,
+    correct_index) tuples. Ids are allocated from the manifest, and a
+    quiz's workbook is created along with its first questions.
+    """
+    ids = []
+    appends = []
+    with _locked(MANIFEST_FILE):
+        manifest = _manifest.edit()
+        next_id = manifest["next_question_id"]
+        for quiz_id, questions in questions_by_quiz.items():
+            rows = _question_rows(next_id, quiz_id, questions)
+            if not rows:
+                continue
+            next_id += len(rows)
+            ids += [row[0] for row in rows]
+            name = manifest["questions"].get(str(quiz_id))
+            if name is None:
+                name = manifest["questions"][str(quiz_id)] = partitions.question_file(quiz_id)
+                _create_partition(DB_FOLDER / name, rows)
+            else:
+                appends.append((DB_FOLDER / name, rows))
+        manifest["next_question_id"] = next_id
+        _manifest.write(manifest)
+        for path, rows in appends:
+            with _locked(path):
+                _append_rows(path, rows, checkpoint)
+    return ids
+
+def import_questions(questions):
+    """Add a batch of imported questions, creating their quizzes as needed.
+
+    `questions` is a sequence of (quiz_title, quiz_description,
+    question_text, options, correct_index) tuples. A question joins the
+    existing quiz with the same title, or a quiz created for it. The batch
+    is one journal write per workbook and never checkpoints, so a large
+    import does not rewrite the workbooks over and over; call checkpoint()
+    once it is done. Returns the number of quizzes created.
+    """
+    questions = list(questions)
+    partitioned = _partitioned()
+    with _locked(QUIZZES_FILE, _question_id_table()):
+        quiz_ids = {}
+        new_quizzes = []
+        next_quiz_id = _next_id(QUIZZES_FILE)
+        rows = []
+        by_quiz = {}
+        first_id = 1 if partitioned else _next_id(QUESTIONS_FILE)
+        for i, (title, description, question_text, options, correct_index) in enumerate(questions):
+            quiz_id = quiz_ids.get(title)
+            if quiz_id is None:
+                existing = next(iter(_rows_where(QUIZZES_FILE, 1, title)), None)
+                if existing is not None:
+                    quiz_id = existing[0]
+                else:
+                    quiz_id = next_quiz_id
+                    next_quiz_id += 1
+                    new_quizzes.append([quiz_id, title, description])
+                quiz_ids[title] = quiz_id
+            if partitioned:
+                by_quiz.setdefault(quiz_id, []).append((question_text, options, correct_index))
+            else:
+                rows.append([first_id + i, quiz_id, question_text, *options, correct_index])
+
+        # Questions first, as in add_new_quiz_with_questions
+        if by_quiz:
+            _add_partitioned_questions(by_quiz, checkpoint=False)
+        if rows:
+            _append_rows(QUESTIONS_FILE, rows, checkpoint=False)
+        if new_quizzes:
+            _append_rows(QUIZZES_FILE, new_quizzes, checkpoint=False)
+    return len(new_quizzes)
+
+def _question(row):
+    return {
+        'id': row[0],
+        'quiz_id': row[1],
+        'question_text': row[2],
+        'options': [row[3], row[4], row[5], row[6]],
+        'correct_answer': row[7]
+    }
+
+def iter_questions():
+    """Yield every question in id order (quiz by quiz when partitioned).
+
+    Streams tables that are too large to cache.
+    """
+    for path in _question_tables():
+        for row in _iter_table(path):
+            yield _question(row)
+
+def iter_quiz_questions(quiz_id):
+    if _partitioned():
+        path = _manifest.question_path(quiz_id)
+        rows = _iter_table(path) if path is not None and path.exists() else ()
+    else:
+        rows = _rows_where(QUESTIONS_FILE, 1, quiz_id)
+    for row in rows:
+        yield _question(row)
 
 def get_quiz_questions(quiz_id):
-    wb = load_workbook(QUESTIONS_FILE)
-    ws = wb.active
-    questions = []
-
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if row[1] == quiz_id:
-            questions.append({
-                'id': row[0],
-                'quiz_id': row[1],
-                'question_text': row[2],
-                'options': [row[3], row[4], row[5], row[6]],
-                'correct_answer': row[7]
-            })
-    return questions
-
-def save_score(user_id, user_name, quiz_id, score, time_taken):
+    return list(iter_quiz_questions(quiz_id))
+
+@contextmanager
+def _attempts_table():
+    """Lock the workbook (or score log) new attempts go to; yields it and the next attempt id."""
+    if _logged():
+        with _locked(SCORE_LOG_FILE):
+            yield SCORE_LOG_FILE, _score_log.next_id()
+        return
+    if not _partitioned():
+        with _locked(LEADERBOARD_FILE):
+            yield LEADERBOARD_FILE, _next_id(LEADERBOARD_FILE)
+        return
+    while True:
+        path, first_id = _attempt_partition()
+        with _locked(path):
+            # The month may have rolled over while we waited for the lock.
+            if _manifest.leaderboard_partitions()[-1][0] == path:
+                yield path, max(_next_id(path), first_id)
+                return
+
+def _attempt_partition():
+    """Return the path and first id of the current leaderboard partition.
+
+    The first save of a month creates that month's partition, numbering on
+    from the previous one. Partitions never go back in time, so a clock set
+    back keeps writing to the latest one.
+    """
+    month = partitions.current_month()
+    entries = _manifest.read()["leaderboard"]
+    if not entries or entries[-1]["month"] < month:
+        with _locked(MANIFEST_FILE):
+            manifest = _manifest.edit()
+            entries = manifest["leaderboard"]
+            if not entries or entries[-1]["month"] < month:
+                entry = {"month": month, "file": partitions.leaderboard_file(month), "first_id": 1}
+                with ExitStack() as stack:
+                    if entries:
+                        # Hold the previous partition so no save lands there after we count it.
+                        last = DB_FOLDER / entries[-1]["file"]
+                        stack.enter_context(_locked(last))
+                        entry["first_id"] = max(_next_id(last), entries[-1]["first_id"])
+                    _create_partition(DB_FOLDER / entry["file"])
+                    entries.append(entry)
+                    _manifest.write(manifest)
+    return DB_FOLDER / entries[-1]["file"], entries[-1]["first_id"]
+
+def _append_attempts(path, rows):
+    if path == SCORE_LOG_FILE:
+        _score_log.append(rows)
+    else:
+        _append_rows(path, rows)
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+def save_score(user_id, user_name, quiz_id, score, time_taken, taken_at=None):
+    """Record an attempt; `taken_at` (ISO text) defaults to now."""
     if not user_name or user_name.startswith("Student_"):
         user_name = (user_id) or f"Student_{user_id}"
-    wb = load_workbook(LEADERBOARD_FILE)
-    ws = wb.active
-    new_id = len(ws['A'])
-    ws.append([new_id, user_id, quiz_id, score, time_taken])
-    wb.save(LEADERBOARD_FILE)
+    with _attempts_table() as (path, new_id):
+        _append_attempts(path, [[new_id, user_id, quiz_id, score, time_taken, taken_at or _now()]])
+
+def save_scores(scores):
+    """Record several attempts with a single journal write.
+
+    `scores` is a sequence of (user_id, user_name, quiz_id, score,
+    time_taken) tuples, as taken by save_score, optionally followed by
+    taken_at. Returns the new row ids.
+    """
+    scores = list(scores)
+    now = _now()
+    with _attempts_table() as (path, first_id):
+        rows = [[first_id + i, user_id, quiz_id, score, time_taken, (taken_at + [None])[0] or now]
+                for i, (user_id, _, quiz_id, score, time_taken, *taken_at) in enumerate(scores)]
+        if rows:
+            _append_attempts(path, rows)
+    return [row[0] for row in rows]
+
+def _ranked(rows, limit=None):
+    """Order leaderboard rows by score, best first, keeping file order on ties."""
+    rows = (row for row in rows if row[3] is not None)
+    if limit is None:
+        return sorted(rows, key=lambda x: x[3], reverse=True)
+    return heapq.nlargest(limit, rows, key=lambda x: x[3])
+
+def _top_scores(path, quiz_id, limit):
+    if limit is not None and limit <= LEADERBOARD_TOP_K:
+        view = _top_scores_view(path)
+        if view is not None:
+            return view.top(quiz_id, limit)
+
+    rows = (row for row in _iter_table(path)
+            if quiz_id is None or row[2] == quiz_id)
+    return _ranked(rows, limit)
+
+def iter_top_scores(quiz_id=None, limit=None):
+    if _logged():
+        yield from _score_log.top(quiz_id, limit)
+        return
+    tops = [_top_scores(path, quiz_id, limit) for path in _attempt_tables()]
+    if len(tops) == 1:
+        yield from tops[0]
+        return
+    # Partitions are oldest first, so ties still keep file order.
+    yield from _ranked(chain.from_iterable(tops), limit)
 
 def get_top_scores(quiz_id=None, limit=10):
-    wb = load_workbook(LEADERBOARD_FILE)
-    ws = wb.active
-    scores = []
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if quiz_id is None or row[2] == quiz_id:
-            scores.append(row)
-    
-    scores.sort(key=lambda x: x[3], reverse=True)
-    return scores[:limit]
+    return list(iter_top_scores(quiz_id, limit))
+
+def iter_attempts():
+    """Yield every leaderboard row (id, user_id, quiz_id, score, time_taken, taken_at) in file order."""
+    if _logged():
+        yield from _score_log.iter_rows()
+        return
+    for path in _attempt_tables():
+        yield from _iter_table(path)
+
+def attempt_records():
+    """The score log's records as a NumPy structured array, or None without a score log."""
+    return _score_log.records() if _logged() else None
+
+def get_user_scores(user_id):
+    """Return every leaderboard row of one student, in the order they were saved."""
+    if _logged():
+        return _score_log.user_rows(user_id)
+    return [row for path in _attempt_tables() for row in _rows_where(path, 1, user_id)]
+
+def get_user_history(user_id):
+    """Return one student's attempts, oldest first, with their quiz titles.
+
+    Attempts are found through the user_id index (of each cached
+    leaderboard workbook, or of the score log), so the cost follows the
+    student's own attempts rather than the size of the leaderboard.
+    """
+    quizzes = _name_lookup(QUIZZES_FILE) if QUIZZES_FILE.exists() else dict().get
+    return [{"id": row[0], "quiz_id": row[2], "quiz_title": quizzes(row[2], "Deleted Quiz"),
+             "score": row[3], "time_taken": row[4],
+             # Rows journaled before the column existed have no taken_at.
+             "taken_at": row[5] if len(row) > 5 else None}
+            for row in get_user_scores(user_id)]
 
 def get_all_quizzes():
     if not QUIZZES_FILE.exists():
         return []
     
-    wb = load_workbook(QUIZZES_FILE)
-    ws = wb.active
     return [{"id": row[0], "title": row[1], "description": row[2]} 
-            for row in ws.iter_rows(min_row=2, values_only=True)]
+            for row in _read_table(QUIZZES_FILE)]
 
-def get_all_students():
-    if not USERS_FILE.exists():
+def get_quizzes_page(offset=0, limit=100):
+    """Return `limit` quizzes starting at position `offset`, in id order."""
+    if not QUIZZES_FILE.exists():
         return []
     
-    wb = load_workbook(USERS_FILE)
-    ws = wb.active
+    return [{"id": row[0], "title": row[1], "description": row[2]}
+            for row in islice(_iter_table(QUIZZES_FILE), offset, offset + limit)]
+
+def iter_students():
+    if not USERS_FILE.exists():
+        return
     
-    students = []
     seen_usernames = set()
     
-    for row in ws.iter_rows(min_row=2, values_only=True):
+    for row in _iter_table(USERS_FILE):
         if row and len(row) >= 4 and row[3] == "student" and row[1] not in seen_usernames:
-            students.append({"id": row[0], "username": row[1]})
             seen_usernames.add(row[1])
-    
-    return students
+            yield {"id": row[0], "username": row[1]}
 
-def get_leaderboard_data():
-    if not LEADERBOARD_FILE.exists() or not USERS_FILE.exists() or not QUIZZES_FILE.exists():
-        return []
-    
-    lb_wb = load_workbook(LEADERBOARD_FILE)
-    lb_ws = lb_wb.active
+def get_all_students():
+    return list(iter_students())
+
+def get_students_page(offset=0, limit=100):
+    return list(islice(iter_students(), offset, offset + limit))
+
+def _name_lookup(path):
+    """Return a function mapping an id to the second column of its row."""
+    index = _index(path, 0)
+    if index is not None:
+        return lambda key, default: index[key][-1][1] if key in index else default
+    names = {row[0]: row[1] for row in _iter_table(path)}
+    return names.get
+
+def iter_leaderboard_data(limit=None):
+    """Yield leaderboard entries best score first.
+
+    Entries are built only as they are consumed, so showing the top 20
+    does not materialize a dict for every attempt ever recorded.
+    """
+    if not (_logged() or _attempt_tables()) or not USERS_FILE.exists() or not QUIZZES_FILE.exists():
+        return
     
-    users = {row[0]: row[1] for row in load_workbook(USERS_FILE).active.iter_rows(min_row=2, values_only=True)}
-    quizzes = {row[0]: row[1] for row in load_workbook(QUIZZES_FILE).active.iter_rows(min_row=2, values_only=True)}
+    users = _name_lookup(USERS_FILE)
+    quizzes = _name_lookup(QUIZZES_FILE)
     
-    results = []
-    for row in lb_ws.iter_rows(min_row=2, values_only=True):
-        results.append({
-            "student_name": users.get(row[1], "Unknown"),
-            "quiz_title": quizzes.get(row[2], "Deleted Quiz"),
+    for row in iter_top_scores(None, limit):
+        yield {
+            "student_name": users(row[1], "Unknown"),
+            "quiz_title": quizzes(row[2], "Deleted Quiz"),
             "score": row[3],
             "time_taken": row[4]
-        })
-    
-    results.sort(key=lambda x: x['score'], reverse=True)
-    return results
+        }
+
+def get_leaderboard_data(limit=None):
+    return list(iter_leaderboard_data(limit))
+
+def get_leaderboard_page(offset=0, limit=20):
+    """Return leaderboard entries ranked offset+1 to offset+limit."""
+    return list(islice(iter_leaderboard_data(offset + limit), offset, None))
 
 def get_all_teachers():
     if not USERS_FILE.exists():
         return []
     
-    wb = load_workbook(USERS_FILE)
-    ws = wb.active
     return [{"id": row[0], "username": row[1]} 
-            for row in ws.iter_rows(min_row=2, values_only=True) 
+            for row in _read_table(USERS_FILE) 
             if row[3] == "teacher"]
 
 def add_new_quiz(title, description=""):
-    wb = load_workbook(QUIZZES_FILE)
-    ws = wb.active
-    
-    # Get the last ID and increment by 1
-    last_id = 0
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if row and row[0]:
-            last_id = max(last_id, row[0])
-    
-    new_id = last_id + 1
-    ws.append([new_id, title, description])
-    wb.save(QUIZZES_FILE)
+    with _locked(QUIZZES_FILE):
+        # Last ID incremented by 1
+        new_id = _next_id(QUIZZES_FILE)
+        _append_rows(QUIZZES_FILE, [[new_id, title, description]])
     return new_id
 
+def add_new_quiz_with_questions(title, description, questions):
+    """Create a quiz together with its questions and return the quiz id.
+
+    The questions are written before the quiz row, so an interrupted save
+    never shows a quiz with only part of its questions.
+    """
+    questions = list(questions)
+    with _locked(QUIZZES_FILE, _question_id_table()):
+        quiz_id = _next_id(QUIZZES_FILE)
+        add_questions_to_quiz(quiz_id, questions)
+        _append_rows(QUIZZES_FILE, [[quiz_id, title, description]])
+    return quiz_id
+
 def delete_quiz(quiz_id):
-    from openpyxl import load_workbook
-    
+    """Delete a quiz with its questions and attempts.
+
+    The deletes are journal records (tombstones) that every reader applies
+    at once; the rows themselves stay in the workbooks until compact().
+    When partitioned, the quiz's question workbook is dropped from the
+    manifest instead and removed by compact(). A score log has no
+    tombstones, so it is rewritten without the quiz's attempts.
+    """
     try:
-        wb = load_workbook(QUIZZES_FILE)
-        ws = wb.active
-        
-        for idx in range(ws.max_row, 1, -1):
-            if ws.cell(row=idx, column=1).value == quiz_id:  # ID কলাম
-                ws.delete_rows(idx)
-                break
-        
-        wb.save(QUIZZES_FILE)
-
-        if QUESTIONS_FILE.exists():
-            wb_q = load_workbook(QUESTIONS_FILE)
-            ws_q = wb_q.active
-            
-            for idx in range(ws_q.max_row, 1, -1):
-                if ws_q.cell(row=idx, column=2).value == quiz_id:  # quiz_id কলাম
-                    ws_q.delete_rows(idx)
-            
-            wb_q.save(QUESTIONS_FILE)
+        attempts = [SCORE_LOG_FILE] if _logged() else _attempt_tables()
+        with _locked(QUIZZES_FILE, _question_id_table(), *attempts):
+            _delete_rows(QUIZZES_FILE, 0, quiz_id)  # ID কলাম
+
+            if _partitioned():
+                manifest = _manifest.edit()
+                if manifest["questions"].pop(str(quiz_id), None) is not None:
+                    _manifest.write(manifest)
+            elif QUESTIONS_FILE.exists():
+                _delete_rows(QUESTIONS_FILE, 1, quiz_id)  # quiz_id কলাম
+
+            if _logged():
+                _score_log.keep_quizzes(_live_quiz_ids())
+            for path in _attempt_tables():
+                _delete_rows(path, 2, quiz_id)  # quiz_id কলাম
         
+        _maybe_compact()
         return True
     except Exception as e:
         print(f"Error deleting quiz: {str(e)}")
         return False
 
+def _id_key(value):
+    # Ids typed into a workbook by hand may come back as text or floats.
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+def _live_quiz_ids():
+    return {_id_key(row[0]) for row in _iter_table(QUIZZES_FILE)}
+
+def _compaction_tables():
+    """Return (path, keep) for every workbook compaction may rewrite.
+
+    keep(row) is false for questions and attempts of deleted quizzes, and
+    keep is None for workbooks whose rows all stay.
+    """
+    if not QUIZZES_FILE.exists():
+        return []
+    quiz_ids = _live_quiz_ids()
+    tables = [(QUIZZES_FILE, None)]
+    if not _partitioned() and QUESTIONS_FILE.exists():
+        tables.append((QUESTIONS_FILE, lambda row: _id_key(row[1]) in quiz_ids))
+    tables += [(path, lambda row: _id_key(row[2]) in quiz_ids) for path in _attempt_tables()]
+    return tables
+
+def _stray_partitions():
+    """Question workbooks of deleted quizzes, left for compaction to remove."""
+    if not _partitioned():
+        return []
+    live = set(_manifest.question_paths().values())
+    return [path for path in (DB_FOLDER / partitions.QUESTIONS_DIR).glob("quiz_*.xlsx")
+            if path not in live and not path.stem.endswith(".tmp")]
+
+def _dead_rows(path):
+    # Unknown, and reported as 0, for tables too large to cache.
+    return (_table_cache.dead_rows(path, _load_rows) if _cacheable(path) else None) or 0
+
+def garbage_stats():
+    """Count the rows compaction would drop, per table.
+
+    That is rows removed by journaled deletes but still stored (known only
+    for cached tables) plus questions and attempts of deleted quizzes.
+    Also reports the live rows, under "rows".
+    """
+    stats = {"quizzes": 0, "questions": 0, "leaderboard": 0, "rows": 0}
+    for path, keep in _compaction_tables():
+        name = _table_of(path).stem
+        stats[name] += _dead_rows(path)
+        for row in _iter_table(path):
+            if keep is None or keep(row):
+                stats["rows"] += 1
+            else:
+                stats[name] += 1
+    if _partitioned():
+        for path in _question_tables():
+            rows = _table_cache.peek(path)
+            stats["rows"] += len(rows) if rows is not None else _sheet_row_count(path)
+    for path in _stray_partitions():
+        stats["questions"] += _sheet_row_count(path)
+    if _logged() and QUIZZES_FILE.exists():
+        kept = _score_log.count_kept(_live_quiz_ids())
+        stats["rows"] += kept
+        stats["leaderboard"] += len(_score_log) - kept
+    return stats
+
+def compact():
+    """Rewrite the quiz, question and leaderboard workbooks without garbage.
+
+    Each workbook is rewritten at most once, in a single streaming pass that
+    folds in its journal and drops questions and attempts whose quiz no
+    longer exists; when partitioned, the question workbooks of deleted
+    quizzes are removed. A score log is rewritten the same way. Returns
+    the number of rows dropped per table.
+    """
+    dropped = {"quizzes": 0, "questions": 0, "leaderboard": 0}
+    if _partitioned():
+        tables = (MANIFEST_FILE, *_attempt_tables())
+    else:
+        tables = (QUESTIONS_FILE, LEADERBOARD_FILE)
+    if _logged():
+        tables += (SCORE_LOG_FILE,)
+    with _locked(QUIZZES_FILE, *tables):
+        for path, keep in _compaction_tables():
+            orphans = 0 if keep is None else sum(1 for row in _iter_table(path) if not keep(row))
+            dropped[_table_of(path).stem] += _dead_rows(path) + orphans
+            if not orphans and not journal.journal_size(path):
+                continue
+            rows = _iter_table(path)
+            _rewrite_table(path, rows if keep is None else filter(keep, rows))
+        for path in _stray_partitions():
+            dropped["questions"] += _sheet_row_count(path)
+            _remove_table(path)
+        if _logged() and QUIZZES_FILE.exists():
+            dropped["leaderboard"] += _score_log.keep_quizzes(_live_quiz_ids())
+    return dropped
+
+def partition_tables():
+    """Switch the data folder to the partitioned layout (see partitions.py).
+
+    Questions are split into one workbook per quiz, dropping those of
+    deleted quizzes, and the attempts so far become leaderboard/archive.xlsx
+    (unless they are in a score log, which stays as it is).
+    questions.xlsx and leaderboard.xlsx are kept as .xlsx.bak files. The
+    manifest is written last, so an interrupted run leaves the old layout
+    in use. Run it while no app instance is using the folder. Returns the
+    number of partitions written, or None if the folder was partitioned.
+    """
+    init_excel_db()
+    if _partitioned():
+        return None
+    with _locked(QUIZZES_FILE, MANIFEST_FILE, QUESTIONS_FILE, LEADERBOARD_FILE):
+        quiz_ids = {_id_key(row[0]) for row in _iter_table(QUIZZES_FILE)}
+        by_quiz = {}
+        for row in _iter_table(QUESTIONS_FILE):
+            if _id_key(row[1]) in quiz_ids:
+                by_quiz.setdefault(_id_key(row[1]), []).append(row)
+
+        manifest = partitions.new_manifest(_next_id(QUESTIONS_FILE))
+        for quiz_id, rows in by_quiz.items():
+            name = manifest["questions"][str(quiz_id)] = partitions.question_file(quiz_id)
+            _create_partition(DB_FOLDER / name, rows)
+        moved = [QUESTIONS_FILE]
+        if not _logged():
+            archive = {"month": "", "file": partitions.leaderboard_file(""), "first_id": 1}
+            _create_partition(DB_FOLDER / archive["file"], _iter_table(LEADERBOARD_FILE))
+            manifest["leaderboard"].append(archive)
+            moved.append(LEADERBOARD_FILE)
+        _manifest.write(manifest)
+
+        for path in moved:
+            os.replace(path, path.with_name(path.name + ".bak"))
+            journal.truncate(path)
+            snapshot.remove(path)
+            counters.remove(path)
+            _table_cache.invalidate(path)
+    return len(by_quiz) + len(manifest["leaderboard"])
+
+def use_score_log():
+    """Move every attempt into a score log (see score_log.py).
+
+    The log is written from all leaderboard workbooks, which are then kept
+    as .xlsx.bak files; its presence switches every app instance over. Run
+    it while no app instance is using the folder. Returns the number of
+    attempts moved, or None if the folder already has a score log.
+    """
+    init_excel_db()
+    if _logged():
+        return None
+    tables = _attempt_tables()
+    with _locked(*tables, SCORE_LOG_FILE):
+        count = score_log.create(SCORE_LOG_FILE, chain.from_iterable(map(_iter_table, tables)))
+        for path in tables:
+            os.replace(path, path.with_name(path.name + ".bak"))
+            journal.truncate(path)
+            snapshot.remove(path)
+            counters.remove(path)
+            _table_cache.invalidate(path)
+    return count
+
+def export_scores():
+    """Write the attempts in the score log to leaderboard.xlsx, for reporting.
+
+    The workbook is not read back while the log exists. Returns the number
+    of attempts written.
+    """
+    count = 0
+
+    def rows():
+        nonlocal count
+        for count, row in enumerate(_score_log.iter_rows(), 1):
+            yield row
+
+    _rewrite_table(LEADERBOARD_FILE, rows())
+    return count
+
+def _needs_compaction():
+    stats = garbage_stats()
+    garbage = sum(count for name, count in stats.items() if name != "rows")
+    return (garbage >= COMPACT_MIN_GARBAGE_ROWS
+            and garbage >= COMPACT_GARBAGE_RATIO * (garbage + stats["rows"]))
+
+def _maybe_compact():
+    """Start compact() on a daemon thread if there is enough garbage."""
+    if not _compact_lock.acquire(blocking=False):
+        return
+    try:
+        if not _needs_compaction():
+            _compact_lock.release()
+            return
+    except BaseException:
+        _compact_lock.release()
+        raise
+
+    def run():
+        try:
+            compact()
+        except Exception as e:
+            print(f"Compaction postponed: {e}")
+        finally:
+            _compact_lock.release()
+
+    threading.Thread(target=run, name="quiz-compact", daemon=True).start()
+
 def clean_student_data():
     if not USERS_FILE.exists():
         return
     
-    wb = load_workbook(USERS_FILE)
-    ws = wb.active
-    
-    seen = set()
-    rows_to_delete = []
-    
-    for idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-        if not row or len(row) < 4:
-            rows_to_delete.append(idx)
-            continue
-            
-        username = row[1]
-        if username in seen or row[3] != "student":
-            rows_to_delete.append(idx)
-        else:
-            seen.add(username)
+    with _locked(USERS_FILE):
+        seen = set()
+        rows_to_keep = []
+        
+        for row in _read_table(USERS_FILE):
+            if not row or len(row) < 4:
+                continue
+                
+            username = row[1]
+            if username not in seen and row[3] == "student":
+                seen.add(username)
+                rows_to_keep.append(row)
+        
+        _rewrite_table(USERS_FILE, rows_to_keep)
 
-    for idx in sorted(rows_to_delete, reverse=True):
-        ws.delete_rows(idx)
-    
-    wb.save(USERS_FILE)
\ No newline at end of file
+if STORAGE_BACKEND == "excel":
+    atexit.register(checkpoint)
+
+PUBLIC_API = (
+    "init_excel_db",
+    "add_user",
+    "add_user_if_new",
+    "get_user",
+    "update_user_password",
+    "add_quiz",
+    "get_all_quizzes",
+    "get_quizzes_page",
+    "add_question_to_quiz",
+    "add_questions_to_quiz",
+    "import_questions",
+    "iter_questions",
+    "iter_quiz_questions",
+    "get_quiz_questions",
+    "save_score",
+    "save_scores",
+    "iter_top_scores",
+    "get_top_scores",
+    "get_user_scores",
+    "get_user_history",
+    "iter_attempts",
+    "attempt_records",
+    "iter_students",
+    "get_all_students",
+    "get_students_page",
+    "iter_leaderboard_data",
+    "get_leaderboard_data",
+    "get_leaderboard_page",
+    "get_all_teachers",
+    "add_new_quiz",
+    "add_new_quiz_with_questions",
+    "delete_quiz",
+    "garbage_stats",
+    "compact",
+    "clean_student_data",
+)
+
+# The SQLite backend provides the same functions; importing them here keeps
+# every caller of excel_db (and auth) backend-agnostic.
+if STORAGE_BACKEND == "sqlite":
+    import sqlite_db
+    globals().update({name: getattr(sqlite_db, name) for name in PUBLIC_API})
+
+# Timed per call when QUIZ_PROFILE is set; see instrumentation.py.
+instrumentation.instrument_namespace(globals(), PUBLIC_API, "excel_db")
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ["compact"]:
+        init_excel_db()
+        for table, count in compact().items():
+            print(f"{table}: {count} rows dropped")
+    elif sys.argv[1:] == ["partition"] and STORAGE_BACKEND == "excel":
+        count = partition_tables()
+        if count is None:
+            print(f"{DB_FOLDER} is already partitioned")
+        else:
+            print(f"Wrote {count} partitions and {MANIFEST_FILE}")
+    elif sys.argv[1:] == ["scorelog"] and STORAGE_BACKEND == "excel":
+        count = use_score_log()
+        if count is None:
+            print(f"{SCORE_LOG_FILE} already exists")
+        else:
+            print(f"Moved {count} attempts to {SCORE_LOG_FILE}")
+    elif sys.argv[1:] == ["export-scores"] and STORAGE_BACKEND == "excel" and SCORE_LOG_FILE.exists():
+        print(f"Wrote {export_scores()} attempts to {LEADERBOARD_FILE}")
+    else:
+        print("Usage: python excel_db.py [compact|partition|scorelog|export-scores]"
+              "  (all but compact need QUIZ_STORAGE=excel, export-scores a score log)")
+        sys.exit(1)
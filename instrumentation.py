@@ -0,0 +1,223 @@
+"""Opt-in timing and I/O instrumentation for the data layer.
+
+Enable with QUIZ_PROFILE=1 (or enable() at runtime). Every instrumented
+excel_db/auth call then records its wall time, and the storage code reports
+workbook parse and save times, bytes read and written, and rows scanned.
+Counters are inclusive: an event is charged to every instrumented call
+active on the thread, so login_user also shows the parse triggered by the
+get_user call inside it.
+
+The summary is printed at exit (or written as JSON to QUIZ_PROFILE_FILE)
+and can be shown on demand from the teacher dashboard.
+"""
+import atexit
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+
+ENABLED = os.environ.get("QUIZ_PROFILE", "") not in ("", "0")
+PROFILE_FILE = os.environ.get("QUIZ_PROFILE_FILE")
+
+# Histogram bucket upper bounds, in milliseconds.
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+
+COUNTERS = ("parse_seconds", "save_seconds", "bytes_read", "bytes_written", "rows_scanned")
+
+_lock = threading.Lock()
+_local = threading.local()
+_calls = {}
+_totals = dict.fromkeys(COUNTERS, 0)
+
+
+class _CallStats:
+    __slots__ = ("count", "errors", "total", "max", "buckets", "counters")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def add(self, seconds, counters, failed):
+        self.count += 1
+        self.errors += failed
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        ms = seconds * 1000
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        for key, value in counters.items():
+            self.counters[key] += value
+
+    def percentile(self, pct):
+        """Upper bound of the histogram bucket holding the pct-th percentile, in ms."""
+        target = self.count * pct / 100
+        seen = 0
+        for bound, n in zip(BUCKETS_MS, self.buckets):
+            seen += n
+            if seen >= target and n:
+                return min(bound, self.max * 1000)
+        return self.max * 1000
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_seconds": self.total,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": self.max * 1000,
+            "histogram": dict(zip(map(str, BUCKETS_MS), self.buckets)),
+            **self.counters,
+        }
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    with _lock:
+        _calls.clear()
+        _totals.update(dict.fromkeys(COUNTERS, 0))
+
+
+def _frames():
+    frames = getattr(_local, "frames", None)
+    if frames is None:
+        frames = _local.frames = []
+    return frames
+
+
+def record(**counters):
+    """Add I/O counters (see COUNTERS) to the current calls and the totals."""
+    if not ENABLED:
+        return
+    for frame in _frames():
+        for key, value in counters.items():
+            frame[key] += value
+    with _lock:
+        for key, value in counters.items():
+            _totals[key] += value
+
+
+def _finish(name, start, frame, failed):
+    elapsed = time.perf_counter() - start
+    frames = _frames()
+    # By identity: frames are plain dicts and often compare equal. Generators
+    # can finish out of order, so this is not always the innermost frame.
+    for i in range(len(frames) - 1, -1, -1):
+        if frames[i] is frame:
+            del frames[i]
+            break
+    with _lock:
+        stats = _calls.get(name)
+        if stats is None:
+            stats = _calls[name] = _CallStats()
+        stats.add(elapsed, frame, failed)
+
+
+def instrumented(fn, name=None):
+    """Wrap `fn` so its calls are timed while instrumentation is enabled.
+
+    Generator functions are timed from the first to the last item pulled,
+    which includes the time the consumer spends between items.
+    """
+    name = name or f"{fn.__module__}.{fn.__name__}"
+
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def gen_wrapper(*args, **kwargs):
+            if not ENABLED:
+                yield from fn(*args, **kwargs)
+                return
+            frame = dict.fromkeys(COUNTERS, 0)
+            _frames().append(frame)
+            start = time.perf_counter()
+            failed = True
+            try:
+                yield from fn(*args, **kwargs)
+                failed = False
+            finally:
+                _finish(name, start, frame, failed)
+        return gen_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not ENABLED:
+            return fn(*args, **kwargs)
+        frame = dict.fromkeys(COUNTERS, 0)
+        _frames().append(frame)
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = fn(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            _finish(name, start, frame, failed)
+    return wrapper
+
+
+def instrument_namespace(namespace, names, prefix):
+    """Replace each function `names` in `namespace` with an instrumented wrapper."""
+    for name in names:
+        namespace[name] = instrumented(namespace[name], f"{prefix}.{name}")
+
+
+def snapshot():
+    with _lock:
+        return {
+            "enabled": ENABLED,
+            "totals": dict(_totals),
+            "calls": {name: stats.as_dict() for name, stats in sorted(_calls.items())},
+        }
+
+
+def summary():
+    """Return a plain-text table of the recorded calls."""
+    data = snapshot()
+    if not data["enabled"] and not data["calls"]:
+        return "Instrumentation is disabled. Start with QUIZ_PROFILE=1 to record timings."
+
+    lines = [f"{'call':<36} {'count':>6} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9} "
+             f"{'parse s':>8} {'save s':>8} {'read KB':>9} {'written KB':>10} {'rows':>9}"]
+    for name, c in data["calls"].items():
+        lines.append(
+            f"{name:<36} {c['count']:>6} {c['mean_ms']:>9.2f} {c['p95_ms']:>9.2f} {c['max_ms']:>9.2f} "
+            f"{c['parse_seconds']:>8.3f} {c['save_seconds']:>8.3f} {c['bytes_read'] / 1024:>9.1f} "
+            f"{c['bytes_written'] / 1024:>10.1f} {c['rows_scanned']:>9}")
+    t = data["totals"]
+    lines.append("")
+    lines.append(f"Totals: parse {t['parse_seconds']:.3f}s, save {t['save_seconds']:.3f}s, "
+                 f"read {t['bytes_read'] / 1024:.1f} KB, written {t['bytes_written'] / 1024:.1f} KB, "
+                 f"rows scanned {t['rows_scanned']}")
+    return "\n".join(lines)
+
+
+def _dump_at_exit():
+    if not _calls:
+        return
+    if PROFILE_FILE:
+        with open(PROFILE_FILE, "w", encoding="utf-8") as f:
+            json.dump(snapshot(), f, indent=2)
+    else:
+        print(summary(), file=sys.stderr)
+
+
+atexit.register(_dump_at_exit)
@@ -0,0 +1,180 @@
+"""Append-only write journal kept next to each workbook.
+
+Inserts, updates and deletes are recorded as one JSON line per operation in
+``<workbook>.journal`` instead of rewriting the whole .xlsx. Readers replay
+the journal on top of the last workbook snapshot, and a checkpoint folds it
+back into the workbook and truncates it.
+
+Replay is idempotent: an insert whose row is already in the snapshot, as
+it stands after the journal's later updates, is skipped, so a crash
+between rewriting the workbook and truncating the journal cannot
+duplicate rows. Ids are never handed out twice (see TableCache.next_id),
+so a new row can never be mistaken for one already folded in.
+"""
+import json
+import os
+from pathlib import Path
+
+import instrumentation
+
+
+def journal_path(path):
+    path = Path(path)
+    return path.with_name(path.name + ".journal")
+
+
+def journal_size(path):
+    try:
+        return os.stat(journal_path(path)).st_size
+    except FileNotFoundError:
+        return 0
+
+
+def append(path, records):
+    """Append `records` to the journal of `path` and flush them to disk."""
+    data = "".join(json.dumps(record, default=str) + "\n" for record in records)
+    with open(journal_path(path), "a", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    instrumentation.record(bytes_written=len(data.encode("utf-8")))
+
+
+def read(path, offset=0):
+    """Return the records after byte `offset` and the offset to resume from.
+
+    A trailing line without a newline is a write still in progress (or torn
+    by a crash) and is left for the next read.
+    """
+    try:
+        with open(journal_path(path), "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    instrumentation.record(bytes_read=len(data))
+
+    end = data.rfind(b"\n") + 1
+    records = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+    return records, offset + end
+
+
+def truncate(path):
+    try:
+        os.remove(journal_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def insert_record(rows):
+    return {"op": "insert", "rows": [list(row) for row in rows]}
+
+
+def delete_record(column, value):
+    """Delete every row whose `column` (0-based) equals `value`."""
+    return {"op": "delete", "col": column, "value": value}
+
+
+def update_record(column, value, changes):
+    """Set `changes` ({column: new value}) on every row whose `column` equals `value`."""
+    return {"op": "update", "col": column, "value": value,
+            "set": [[col, new] for col, new in changes.items()]}
+
+
+def matches(row, record):
+    """True if `row` is targeted by the delete or update `record`."""
+    col = record["col"]
+    return len(row) > col and row[col] == record["value"]
+
+
+def updated(row, record):
+    row = list(row)
+    for col, new in record["set"]:
+        row[col] = new
+    return tuple(row)
+
+
+def inserted_rows(records):
+    """Yield the rows inserted by `records`."""
+    for record in records:
+        if record.get("op") == "insert":
+            yield from record["rows"]
+
+
+def _changes(records):
+    return [(i, record) for i, record in enumerate(records)
+            if record.get("op") in ("delete", "update")]
+
+
+def _replayed(row, changes, position):
+    """`row` after the deletes and updates following `position`, or None if deleted."""
+    for i, record in changes:
+        if i > position and matches(row, record):
+            if record["op"] == "delete":
+                return None
+            row = updated(row, record)
+    return row
+
+
+def _folded(row, changes, position, folded):
+    """True if the row inserted by records[`position`] is already one of `folded`."""
+    return row in folded or _replayed(row, changes, position) in folded
+
+
+def _folded_candidates(snapshot_rows, records):
+    """The snapshot rows sharing an id with a row inserted by `records`."""
+    ids = {row[0] for row in inserted_rows(records) if row}
+    return {tuple(row) for row in snapshot_rows if row and row[0] in ids}
+
+
+def apply(rows, records, snapshot=False):
+    """Replay `records` onto `rows` and return the resulting list.
+
+    Inserts are appended in place; deletes and updates build a new list so
+    readers still iterating the old one are not disturbed. With `snapshot`,
+    `rows` is the workbook snapshot and inserts already folded into it are
+    skipped.
+    """
+    folded = _folded_candidates(rows, records) if snapshot else set()
+    changes = _changes(records) if folded else []
+    for position, record in enumerate(records):
+        op = record.get("op")
+        if op == "insert":
+            for row in map(tuple, record["rows"]):
+                if not (folded and _folded(row, changes, position, folded)):
+                    rows.append(row)
+        elif op == "delete":
+            rows = [row for row in rows if not matches(row, record)]
+        elif op == "update":
+            rows = [updated(row, record) if matches(row, record) else row for row in rows]
+    return rows
+
+
+def replay_stream(snapshot_rows, records):
+    """Lazily yield `snapshot_rows` with `records` replayed on top.
+
+    Equivalent to apply(snapshot=True) but never materializes the snapshot,
+    so callers can stop early on tables too large to hold in memory.
+    """
+    changes = _changes(records)
+    ids = {row[0] for row in inserted_rows(records) if row}
+    folded = set()
+
+    for row in snapshot_rows:
+        if row and row[0] in ids:
+            folded.add(tuple(row))
+        if changes:
+            row = _replayed(row, changes, -1)
+        if row is not None:
+            yield row
+
+    for position, record in enumerate(records):
+        if record.get("op") != "insert":
+            continue
+        for row in map(tuple, record["rows"]):
+            if folded and _folded(row, changes, position, folded):
+                continue
+            if changes:
+                row = _replayed(row, changes, position)
+            if row is not None:
+                yield row
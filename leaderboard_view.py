@@ -0,0 +1,47 @@
+import heapq
+
+
+class TopScores:
+    """The best `k` leaderboard rows, overall and per quiz.
+
+    Rows are fed in file order through add(); each insert costs O(log k)
+    and reading the ranking costs O(k), however many attempts have been
+    recorded. Ties keep the earlier attempt first, matching a stable sort
+    of the whole table by score.
+    """
+
+    def __init__(self, rows, k):
+        self.k = k
+        self._seq = 0
+        self._overall = []
+        self._by_quiz = {}
+        self._sorted = {}
+        self.add(rows)
+
+    def add(self, rows):
+        for row in rows:
+            score = row[3] if len(row) > 3 else None
+            if score is None:
+                continue
+            self._seq += 1
+            # Min-heaps: the weakest entry (lowest score, latest on ties) sits
+            # at the root and is the one pushed out.
+            item = (score, -self._seq, row)
+            self._push(self._overall, item)
+            self._push(self._by_quiz.setdefault(row[2], []), item)
+            self._sorted.pop(None, None)
+            self._sorted.pop(row[2], None)
+
+    def top(self, quiz_id=None, limit=None):
+        """Return up to `limit` rows (at most k), best first."""
+        ranked = self._sorted.get(quiz_id)
+        if ranked is None:
+            heap = self._overall if quiz_id is None else self._by_quiz.get(quiz_id, [])
+            ranked = self._sorted[quiz_id] = [row for _, _, row in sorted(heap, reverse=True)]
+        return ranked[:limit]
+
+    def _push(self, heap, item):
+        if len(heap) < self.k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
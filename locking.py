@@ -0,0 +1,159 @@
+"""Inter-process file locks with retry/backoff and wait-time statistics.
+
+Several app instances may share one data folder, so every read-modify-write
+of a table (allocating an id and appending to its journal, checkpointing,
+rewriting) runs under a lock on ``<workbook>.lock``. The lock is also
+exclusive between threads of one process and reentrant for the thread that
+holds it.
+
+Acquisition polls a non-blocking OS lock with exponential backoff and
+jitter instead of blocking in the kernel, so a waiting client never holds
+anything and a crashed holder's lock is released by the OS with its file
+handle.
+"""
+import os
+import random
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_TIMEOUT = float(os.environ.get("QUIZ_LOCK_TIMEOUT", "30"))
+BACKOFF_START = 0.001
+BACKOFF_MAX = 0.05
+
+
+class LockTimeout(TimeoutError):
+    pass
+
+
+class _LockStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.acquisitions = 0
+            self.contended = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record(self, waited, contended):
+        with self._lock:
+            self.acquisitions += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            if contended:
+                self.contended += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "acquisitions": self.acquisitions,
+                "contended": self.contended,
+                "timeouts": self.timeouts,
+                "total_wait": self.total_wait,
+                "max_wait": self.max_wait,
+                "mean_wait": self.total_wait / self.acquisitions if self.acquisitions else 0.0,
+            }
+
+
+_stats = _LockStats()
+
+
+def lock_stats():
+    """Return lock acquisition counts and wait times for this process."""
+    return _stats.snapshot()
+
+
+def reset_lock_stats():
+    _stats.reset()
+
+
+def _try_os_lock(fd):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _os_unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """Exclusive lock on ``<path>.lock``, shared by threads and processes."""
+
+    def __init__(self, path, timeout=None):
+        self.lock_path = f"{path}.lock"
+        self.timeout = LOCK_TIMEOUT if timeout is None else timeout
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        contended = not self._thread_lock.acquire(blocking=False)
+        if contended and not self._thread_lock.acquire(timeout=self.timeout):
+            _stats.record_timeout()
+            raise LockTimeout(f"Timed out waiting for {self.lock_path}")
+
+        if self._depth:
+            self._depth += 1
+            return self
+
+        try:
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            delay = BACKOFF_START
+            while not _try_os_lock(fd):
+                contended = True
+                if time.perf_counter() >= deadline:
+                    os.close(fd)
+                    _stats.record_timeout()
+                    raise LockTimeout(f"Timed out waiting for {self.lock_path}")
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, BACKOFF_MAX)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+        self._fd = fd
+        self._depth = 1
+        _stats.record(time.perf_counter() - start, contended)
+        return self
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                _os_unlock(fd)
+            finally:
+                os.close(fd)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
@@ -1,10 +1,16 @@
+import time
+_START = time.perf_counter()
+
+import argparse
+import json
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox
-from auth import login_user, register_user, init_excel_db
+from auth import login_user_async, register_user_async
 from styles import configure_styles
 from excel_db import init_excel_db
-from teacher_ui import TeacherDashboard
-from student_ui import StudentDashboard
+# The dashboards (and openpyxl, loaded on first workbook read) are imported
+# on demand so the login window appears as early as possible.
 
 class LoginApp(tk.Tk):
     def __init__(self):
@@ -46,7 +52,8 @@ class LoginApp(tk.Tk):
         self.password_entry.grid(row=1, column=1, padx=5, pady=5)
 
         # Buttons
-        ttk.Button(self.main_frame, text="Login", command=self.login).grid(row=2, column=1, pady=10)
+        self.login_button = ttk.Button(self.main_frame, text="Login", command=self.login)
+        self.login_button.grid(row=2, column=1, pady=10)
         ttk.Button(self.main_frame, text="Register", command=self.show_register).grid(row=3, column=1, pady=10)
 
         # Copyright text at the bottom
@@ -61,12 +68,23 @@ class LoginApp(tk.Tk):
             messagebox.showerror("Error", "Username and password required")
             return
         
-        user_data = login_user(username, password)
+        # Password verification is deliberately slow; keep the window responsive
+        self.login_button.config(state='disabled')
+        self._wait_for_login(login_user_async(username, password))
+
+    def _wait_for_login(self, future):
+        if not future.done():
+            self.after(20, self._wait_for_login, future)
+            return
+        self.login_button.config(state='normal')
+        user_data = future.result()
         
         if user_data:
             if user_data['role'] == 'teacher':
+                from teacher_ui import TeacherDashboard
                 self.active_dashboard = TeacherDashboard(self, user_data['id'], user_data['name'])
             else:
+                from student_ui import StudentDashboard
                 self.active_dashboard = StudentDashboard(self, user_data['id'], user_data['name'])
             
             self.active_dashboard.protocol("WM_DELETE_WINDOW", lambda: self._on_dashboard_close(self.active_dashboard))
@@ -129,8 +147,8 @@ class LoginApp(tk.Tk):
         button_frame.grid(row=4, column=0, columnspan=2, pady=20)
         
         # Register button
-        register_btn = ttk.Button(button_frame, text="Register", command=self.register_user, width=15)
-        register_btn.pack(side='left', padx=5)
+        self.register_button = ttk.Button(button_frame, text="Register", command=self.register_user, width=15)
+        self.register_button.pack(side='left', padx=5)
         
         # Cancel button
         cancel_btn = ttk.Button(button_frame, text="Cancel", command=self.register_window.destroy, width=15)
@@ -154,7 +172,19 @@ class LoginApp(tk.Tk):
             messagebox.showerror("Error", "All fields are required")
             return
         
-        if register_user(username, password, role):
+        # Hashing the password is deliberately slow; keep the window responsive
+        self.register_button.config(state='disabled')
+        self._wait_for_registration(register_user_async(username, password, role))
+
+    def _wait_for_registration(self, future):
+        if not future.done():
+            self.after(20, self._wait_for_registration, future)
+            return
+        if not self.register_window.winfo_exists():
+            return
+        self.register_button.config(state='normal')
+
+        if future.result():
             messagebox.showinfo("Success", "Registration successful!")
             self.register_window.destroy()
         else:
@@ -167,7 +197,26 @@ class LoginApp(tk.Tk):
                 self.active_dashboard.destroy()
             self.quit()
 
+def report_startup_time(app):
+    """Print how long it took to get the login window on screen, as JSON."""
+    app.update()
+    elapsed = time.perf_counter() - _START
+    print(json.dumps({
+        "time_to_login_window_ms": round(elapsed * 1000, 1),
+        "modules_loaded": len(sys.modules),
+        "openpyxl_loaded": "openpyxl" in sys.modules,
+        "dashboards_loaded": "teacher_ui" in sys.modules or "student_ui" in sys.modules,
+    }))
+
 if __name__ == "__main__":
-    init_excel_db()  
+    parser = argparse.ArgumentParser(description="Quiz Application")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="measure the time until the login window is shown, then exit")
+    args = parser.parse_args()
+
     app = LoginApp()
-    app.mainloop()
+    if args.startup_time:
+        report_startup_time(app)
+        app.destroy()
+    else:
+        app.mainloop()
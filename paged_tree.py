@@ -0,0 +1,132 @@
+"""Treeview that loads its rows a page at a time and updates them in place.
+
+Clearing a ttk.Treeview and re-inserting every row on each refresh costs
+one Tk call per row, which dominates refresh time with thousands of
+quizzes or students. PagedTreeview only inserts the rows scrolled into
+view (plus one page), fetches further pages as the list is scrolled, and
+on refresh touches only the rows that were added, changed or removed.
+"""
+from tkinter import ttk
+
+
+class PagedTreeview(ttk.Frame):
+    """A scrolled Treeview filled from `fetch(offset, limit)`.
+
+    `fetch` returns a list of (key, values) pairs; `key` identifies the row
+    across refreshes (a record id, or the rank for ranked lists). When a
+    BackgroundTasks instance is given, fetches run on its worker thread.
+    """
+
+    def __init__(self, master, columns, fetch, tasks=None, page_size=100, label=None, **tree_options):
+        super().__init__(master)
+        self.fetch = fetch
+        self.tasks = tasks
+        self.page_size = page_size
+        self.label = label
+        self._keys = []
+        self._values = {}
+        self._exhausted = False
+        self._loading = False
+
+        self.tree = ttk.Treeview(self, columns=columns, show='headings', **tree_options)
+        scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self._scrollbar_set = scrollbar.set
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+        self.tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+    # Treeview methods used by the dashboards
+    def heading(self, column, **options):
+        return self.tree.heading(column, **options)
+
+    def column(self, column, **options):
+        return self.tree.column(column, **options)
+
+    def focus(self):
+        return self.tree.focus()
+
+    def selection(self):
+        return self.tree.selection()
+
+    def item(self, iid, option=None, **options):
+        return self.tree.item(iid, option, **options)
+
+    def refresh(self, on_done=None):
+        """Re-fetch the loaded rows (at least one page) and apply the differences.
+
+        `on_done`, if given, is called with the number of rows shown.
+        """
+        limit = max(len(self._keys), self.page_size)
+
+        def loaded(rows):
+            self._loading = False
+            self._apply(0, rows, replace=True)
+            self._exhausted = len(rows) < limit
+            if on_done is not None:
+                on_done(len(self._keys))
+
+        self._loading = True
+        self._request(0, limit, loaded)
+
+    def _load_more(self):
+        offset = len(self._keys)
+
+        def loaded(rows):
+            self._loading = False
+            if offset != len(self._keys):
+                return  # a refresh changed the list meanwhile
+            self._apply(offset, rows)
+            self._exhausted = len(rows) < self.page_size
+
+        self._loading = True
+        self._request(offset, self.page_size, loaded)
+
+    def _request(self, offset, limit, callback):
+        if self.tasks is None:
+            callback(self.fetch(offset, limit))
+            return
+
+        def failed(error):
+            self._loading = False
+            self.tasks.show_error(error)
+
+        # One key per list: a newer request supersedes a pending one.
+        self.tasks.submit(self.fetch, offset, limit, key=("page", str(self)), label=self.label,
+                          on_done=callback, on_error=failed)
+
+    def _apply(self, offset, rows, replace=False):
+        """Make the rows from `offset` on match `rows`, touching only what changed."""
+        rows = [(str(key), tuple(values)) for key, values in rows]
+        if replace:
+            keep = {iid for iid, _ in rows}
+            stale = [iid for iid in self._keys if iid not in keep]
+            if stale:
+                self.tree.delete(*stale)
+                for iid in stale:
+                    del self._values[iid]
+            keys = [iid for iid in self._keys if iid in keep]
+        else:
+            # Rows shifted by concurrent inserts may already be shown.
+            rows = [(iid, values) for iid, values in rows if iid not in self._values]
+            keys = self._keys
+
+        for position, (iid, values) in enumerate(rows, offset):
+            if iid not in self._values:
+                self.tree.insert('', position, iid=iid, values=values)
+                keys.insert(position, iid)
+            else:
+                if self._values[iid] != values:
+                    self.tree.item(iid, values=values)
+                if keys[position] != iid:
+                    self.tree.move(iid, '', position)
+                    keys.remove(iid)
+                    keys.insert(position, iid)
+            self._values[iid] = values
+        self._keys = keys
+
+    def _on_scroll(self, first, last):
+        self._scrollbar_set(first, last)
+        # Fetch the next page once the end of the loaded rows comes into view.
+        if float(last) >= 0.9 and self._keys and not self._exhausted and not self._loading:
+            self._load_more()
@@ -0,0 +1,123 @@
+"""Partitioned layout for the question and leaderboard workbooks.
+
+When the data folder holds a manifest.json, questions are stored one
+workbook per quiz and attempts one workbook per month, so taking a quiz or
+saving a score only touches a small file and old months stay cold:
+
+    data/manifest.json
+    data/questions/quiz_<quiz_id>.xlsx
+    data/leaderboard/archive.xlsx        attempts from before partitioning
+    data/leaderboard/<YYYY-MM>.xlsx
+
+The manifest lists the partitions and holds the id counters that span
+them:
+
+    {"version": 1,
+     "next_question_id": 1234,
+     "questions": {"3": "questions/quiz_3.xlsx", ...},
+     "leaderboard": [{"month": "", "file": "leaderboard/archive.xlsx", "first_id": 1},
+                     {"month": "2026-10", "file": "leaderboard/2026-10.xlsx", "first_id": 5001}]}
+
+Leaderboard partitions are listed oldest first and ids keep increasing
+from one to the next. The manifest is replaced atomically; excel_db holds
+its lock around every change. users.xlsx and quizzes.xlsx are not
+partitioned.
+"""
+import copy
+import json
+import os
+import threading
+import time
+
+MANIFEST_NAME = "manifest.json"
+QUESTIONS_DIR = "questions"
+LEADERBOARD_DIR = "leaderboard"
+ARCHIVE_NAME = "archive"
+
+
+def manifest_path(folder):
+    return folder / MANIFEST_NAME
+
+
+def current_month():
+    return time.strftime("%Y-%m")
+
+
+def question_file(quiz_id):
+    return f"{QUESTIONS_DIR}/quiz_{quiz_id}.xlsx"
+
+
+def leaderboard_file(month):
+    return f"{LEADERBOARD_DIR}/{month or ARCHIVE_NAME}.xlsx"
+
+
+def new_manifest(next_question_id=1):
+    return {"version": 1, "next_question_id": next_question_id, "questions": {}, "leaderboard": []}
+
+
+class Manifest:
+    """manifest.json of one data folder, re-read only when it has been replaced."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = manifest_path(folder)
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._data = None
+
+    def read(self):
+        """Return the manifest (not to be modified), or None for the single-file layout."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        # Every write replaces the file, so the inode tells writes apart
+        # even within one mtime tick.
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._lock:
+            if stamp != self._stamp:
+                with open(self.path, encoding="utf-8") as f:
+                    self._data = json.load(f)
+                self._stamp = stamp
+            return self._data
+
+    def edit(self):
+        """Return a copy of the manifest to change and pass to write()."""
+        return copy.deepcopy(self.read() or new_manifest())
+
+    def write(self, data):
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def question_path(self, quiz_id):
+        """Path of a quiz's question workbook, or None if it has no questions."""
+        name = (self.read() or new_manifest())["questions"].get(str(quiz_id))
+        return self.folder / name if name else None
+
+    def question_paths(self):
+        """{quiz_id: path} of every question workbook, in quiz id order."""
+        questions = (self.read() or new_manifest())["questions"]
+        return {int(quiz_id): self.folder / questions[quiz_id] for quiz_id in sorted(questions, key=int)}
+
+    def leaderboard_partitions(self):
+        """[(path, first_id)] of the leaderboard workbooks, oldest first."""
+        return [(self.folder / entry["file"], entry["first_id"])
+                for entry in (self.read() or new_manifest())["leaderboard"]]
+
+
+def table_files(folder, name):
+    """Workbooks holding the table stored as `name` (e.g. "questions.xlsx") in `folder`."""
+    manifest_file = manifest_path(folder)
+    if not manifest_file.exists():
+        return [folder / name]
+    with open(manifest_file, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if name == "questions.xlsx":
+        return [folder / manifest["questions"][key] for key in sorted(manifest["questions"], key=int)]
+    if name == "leaderboard.xlsx":
+        return [folder / entry["file"] for entry in manifest["leaderboard"]]
+    return [folder / name]
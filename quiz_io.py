@@ -0,0 +1,294 @@
+"""Streaming import and export of question banks as CSV, JSON or JSON Lines.
+
+A bank holds one record per question, naming the quiz it belongs to:
+
+    quiz_title, quiz_description, question, option1, option2, option3, option4, correct_option
+
+correct_option is 1-4, as in the Add New Quiz form. A .json file holds an
+array of such objects and a .jsonl file one object per line; in both,
+"options" may be given as a list of four instead of option1..option4.
+The dashboards take the subject from a "Subject: " prefix of the title.
+
+Files are read and validated a chunk of records at a time and each chunk
+is written with one import_questions call, so memory use does not grow
+with the size of the file; the workbooks are checkpointed once at the
+end. Questions join the existing quiz with the same title, or a new quiz
+created for it. Invalid records are skipped and reported by line (CSV,
+JSON Lines) or record number (JSON).
+
+    python quiz_io.py import bank.csv [--dry-run]
+    python quiz_io.py export bank.json [--quiz-id 3]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+
+from excel_db import init_excel_db, checkpoint, import_questions, get_all_quizzes, iter_questions, iter_quiz_questions
+
+FIELDS = ["quiz_title", "quiz_description", "question", "option1", "option2", "option3", "option4",
+          "correct_option"]
+REQUIRED_COLUMNS = {"quiz_title", "question", "option1", "option2", "option3", "option4", "correct_option"}
+FORMATS = {".csv": "csv", ".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+# A JSON record larger than this is treated as malformed rather than buffered.
+MAX_RECORD_CHARS = 1024 * 1024
+_WHITESPACE = re.compile(r"\s*")
+
+
+class BankFormatError(ValueError):
+    """The file as a whole cannot be read as a question bank."""
+
+
+def file_format(path):
+    fmt = FORMATS.get(os.path.splitext(str(path))[1].lower())
+    if fmt is None:
+        raise BankFormatError(f"unsupported file type: {path} (use .csv, .json or .jsonl)")
+    return fmt
+
+
+def _read_csv(f):
+    reader = csv.DictReader(f)
+    missing = REQUIRED_COLUMNS - set(reader.fieldnames or ())
+    if missing:
+        raise BankFormatError(f"missing CSV columns: {', '.join(sorted(missing))}")
+    for record in reader:
+        yield f"line {reader.line_num}", record
+
+
+def _read_json_lines(f):
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            record = e
+        yield f"line {number}", record
+
+
+def _read_json_array(f, block=64 * 1024):
+    """Yield the elements of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+
+    def refill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(block)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    def next_char():
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer) or eof:
+                return buffer[pos:pos + 1]
+            refill()
+
+    if next_char() != "[":
+        raise BankFormatError("a JSON question bank must be an array of objects")
+    pos += 1
+    number = 0
+    while True:
+        char = next_char()
+        if char == "]":
+            return
+        if number:
+            if char != ",":
+                raise BankFormatError(f"expected ',' or ']' after record {number}")
+            pos += 1
+            next_char()
+        number += 1
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+                # A value running to the end of the buffer may be cut short (a number).
+                if end < len(buffer) or eof:
+                    pos = end
+                    break
+            except ValueError as e:
+                if eof or len(buffer) - pos > MAX_RECORD_CHARS:
+                    raise BankFormatError(f"record {number}: {e}") from None
+            refill()
+        yield f"record {number}", record
+
+
+def _text(value):
+    return "" if value is None else str(value).strip()
+
+
+def validate(record):
+    """Return the import_questions tuple for one record, or raise ValueError."""
+    if isinstance(record, Exception):
+        raise ValueError(f"invalid JSON: {record}")
+    if not isinstance(record, dict):
+        raise ValueError("expected an object with the question fields")
+
+    title = _text(record.get("quiz_title"))
+    question = _text(record.get("question"))
+    options = record.get("options")
+    if options is None:
+        options = [record.get(f"option{i}") for i in range(1, 5)]
+    if not isinstance(options, list) or len(options) != 4:
+        raise ValueError("exactly four options are required")
+    options = [_text(option) for option in options]
+    if not title or not question or not all(options):
+        raise ValueError("quiz_title, question and all four options must be filled")
+
+    correct = record.get("correct_option")
+    try:
+        if isinstance(correct, bool):
+            raise ValueError
+        correct = int(_text(correct))
+    except ValueError:
+        raise ValueError("correct_option must be a number from 1 to 4") from None
+    if not 1 <= correct <= 4:
+        raise ValueError("correct_option must be a number from 1 to 4")
+    return title, _text(record.get("quiz_description")), question, options, correct - 1
+
+
+def import_file(path, chunk_size=CHUNK_SIZE, progress=None, dry_run=False):
+    """Import a question bank; returns a report dict.
+
+    `progress(records, fraction)`, if given, is called after every chunk
+    with the number of records read so far and the fraction of the file.
+    With `dry_run` the file is only validated.
+    """
+    reader = {"csv": _read_csv, "json": _read_json_array, "jsonl": _read_json_lines}[file_format(path)]
+    report = {"records": 0, "imported": 0, "quizzes_created": 0, "skipped": 0, "errors": []}
+    size = os.path.getsize(path) or 1
+    if not dry_run:
+        init_excel_db()
+
+    with open(path, "rb") as raw:
+        # utf-8-sig: CSV files saved by Excel start with a byte order mark.
+        text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        chunk = []
+
+        def flush():
+            if chunk and not dry_run:
+                report["quizzes_created"] += import_questions(chunk)
+            report["imported"] += len(chunk)
+            chunk.clear()
+            if progress is not None:
+                progress(report["records"], min(raw.tell() / size, 1.0))
+
+        for where, record in reader(text):
+            report["records"] += 1
+            try:
+                chunk.append(validate(record))
+            except ValueError as e:
+                report["skipped"] += 1
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    report["errors"].append(f"{where}: {e}")
+            if len(chunk) >= chunk_size:
+                flush()
+        flush()
+
+    if report["imported"] and not dry_run:
+        checkpoint()
+    return report
+
+
+def _export_records(quiz_id=None):
+    quizzes = {quiz['id']: quiz for quiz in get_all_quizzes()}
+    questions = iter_questions() if quiz_id is None else iter_quiz_questions(quiz_id)
+    for question in questions:
+        quiz = quizzes.get(question['quiz_id'])
+        if quiz is None:
+            continue  # left behind by a deleted quiz
+        options = question['options']
+        yield {
+            "quiz_title": quiz['title'],
+            "quiz_description": quiz['description'] or "",
+            "question": question['question_text'],
+            "option1": options[0],
+            "option2": options[1],
+            "option3": options[2],
+            "option4": options[3],
+            "correct_option": int(question['correct_answer']) + 1,
+        }
+
+
+def export_file(path, quiz_id=None, progress=None):
+    """Write every question (or one quiz's) to `path`; returns the number written.
+
+    The file is written under a temporary name and moved into place when
+    complete. `progress(records, None)` is called every CHUNK_SIZE records.
+    """
+    fmt = file_format(path)
+    tmp_path = f"{path}.tmp"
+    count = 0
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            if fmt == "csv":
+                writer = csv.DictWriter(f, fieldnames=FIELDS)
+                writer.writeheader()
+            elif fmt == "json":
+                f.write("[")
+            for record in _export_records(quiz_id):
+                if fmt == "csv":
+                    writer.writerow(record)
+                elif fmt == "json":
+                    f.write(("\n" if count == 0 else ",\n") + json.dumps(record, ensure_ascii=False))
+                else:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+                if progress is not None and count % CHUNK_SIZE == 0:
+                    progress(count, None)
+            if fmt == "json":
+                f.write("\n]\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if progress is not None:
+        progress(count, None)
+    return count
+
+
+def _print_progress(records, fraction):
+    percent = f" ({fraction:.0%})" if fraction is not None else ""
+    print(f"\r{records} records{percent}", end="", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import or export question banks (CSV, JSON, JSON Lines).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="add the questions of a bank file")
+    importer.add_argument("path")
+    importer.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    importer.add_argument("--dry-run", action="store_true", help="only validate the file")
+    exporter = commands.add_parser("export", help="write questions to a bank file")
+    exporter.add_argument("path")
+    exporter.add_argument("--quiz-id", type=int, help="export a single quiz")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "import":
+            report = import_file(args.path, args.chunk_size, _print_progress, args.dry_run)
+            print(file=sys.stderr)
+            for error in report["errors"]:
+                print(f"Skipped {error}", file=sys.stderr)
+            verb = "Validated" if args.dry_run else "Imported"
+            print(f"{verb} {report['imported']} questions ({report['quizzes_created']} new quizzes), "
+                  f"skipped {report['skipped']} invalid records")
+        else:
+            count = export_file(args.path, args.quiz_id, _print_progress)
+            print(file=sys.stderr)
+            print(f"Exported {count} questions to {args.path}")
+    except (OSError, BankFormatError) as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
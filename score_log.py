@@ -0,0 +1,336 @@
+"""Fixed-width binary log of quiz attempts, read through mmap.
+
+When the data folder holds ``leaderboard.scores``, excel_db keeps attempts
+there instead of in leaderboard.xlsx. Each attempt is one 48-byte record
+appended under the log's file lock, so saving a score rewrites nothing.
+Readers map the file and see it as a NumPy structured array without
+copying or parsing it; rankings and lookups run on its columns.
+
+Layout (little-endian):
+
+    header   magic, record size (uint32), 4 reserved bytes
+    records  id, user_id, quiz_id (int64), score, time_taken, taken_at (float64)
+
+taken_at is a Unix timestamp, read back as local ISO text like the
+workbooks store it. Empty ids are stored as the smallest int64, other
+empty values as NaN. A record cut short by a crash is ignored by readers
+and dropped by the next append. Records are only removed by compaction,
+which replaces the file. ``python excel_db.py export-scores`` writes the attempts back to
+leaderboard.xlsx for reporting.
+"""
+import math
+import mmap
+import os
+import struct
+import threading
+from datetime import datetime
+
+import instrumentation
+
+LOG_NAME = "leaderboard.scores"
+MAGIC = b"QZSCORE1"
+FIELDS = ("id", "user_id", "quiz_id", "score", "time_taken", "taken_at")
+NULL_ID = -2 ** 63
+BLOCK_ROWS = 65536
+# Attempts appended since the user_id index was last updated are scanned;
+# beyond this many they are merged into it.
+INDEX_TAIL_ROWS = 4096
+
+_HEADER = struct.Struct("<8sII")
+_RECORD = struct.Struct("<qqqddd")
+_EXACT_INT = 2 ** 53
+
+
+def log_path(folder):
+    return folder / LOG_NAME
+
+
+def _dtype():
+    import numpy as np
+
+    return np.dtype({"names": FIELDS, "formats": ["<i8", "<i8", "<i8", "<f8", "<f8", "<f8"]})
+
+
+def _id_value(value):
+    if value is None:
+        return NULL_ID
+    if isinstance(value, str):
+        value = float(value)
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"{value!r} is not an id")
+    value = int(value)
+    if not NULL_ID < value < -NULL_ID:
+        raise OverflowError(f"{value} does not fit in 64 bits")
+    return value
+
+
+def _number_value(value):
+    return math.nan if value is None else float(value)
+
+
+def _time_value(value):
+    if value is None:
+        return math.nan
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def _or_empty(convert, value, empty):
+    try:
+        return convert(value)
+    except (TypeError, ValueError, OverflowError, AttributeError):
+        return empty
+
+
+def _pack(row, strict=True):
+    row = (list(row) + [None] * len(FIELDS))[:len(FIELDS)]
+    try:
+        return _RECORD.pack(*map(_id_value, row[:3]), *map(_number_value, row[3:5]), _time_value(row[5]))
+    except (TypeError, ValueError, OverflowError, AttributeError):
+        if strict:
+            raise ValueError(f"cannot store attempt {row!r} in the score log") from None
+    # Rows typed into a workbook by hand: keep the values that fit.
+    return _RECORD.pack(*(_or_empty(_id_value, value, NULL_ID) for value in row[:3]),
+                        *(_or_empty(_number_value, value, math.nan) for value in row[3:5]),
+                        _or_empty(_time_value, row[5], math.nan))
+
+
+def _from_id(value):
+    return None if value == NULL_ID else value
+
+
+def _from_number(value):
+    # As openpyxl reads numbers back: empty cells are None, whole numbers ints.
+    if value != value:
+        return None
+    if value.is_integer() and abs(value) < _EXACT_INT:
+        return int(value)
+    return value
+
+
+def _from_time(value):
+    if value != value:
+        return None
+    return datetime.fromtimestamp(value).isoformat(timespec="seconds")
+
+
+def _rows(records):
+    """Leaderboard rows (id, user_id, quiz_id, score, time_taken, taken_at) of `records`."""
+    columns = (records[name].tolist() for name in FIELDS)
+    return [(_from_id(a), _from_id(b), _from_id(c), _from_number(d), _from_number(e), _from_time(f))
+            for a, b, c, d, e, f in zip(*columns)]
+
+
+def _query_id(value):
+    """`value` as stored in an id column, or None if no stored id can equal it."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and NULL_ID < value < -NULL_ID:
+        return value
+    return None
+
+
+def _write(path, chunks):
+    """Replace the log at `path` with a header and the record bytes in `chunks`."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    written = 0
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, _RECORD.size, 0))
+        for chunk in chunks:
+            f.write(chunk)
+            written += len(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    instrumentation.record(bytes_written=written + _HEADER.size)
+    return written // _RECORD.size
+
+
+def create(path, rows):
+    """Write a log holding `rows` (leaderboard rows) and return their number.
+
+    Values that do not fit a record, such as text typed into an id cell,
+    are stored as empty.
+    """
+    def chunks():
+        block = []
+        for row in rows:
+            block.append(_pack(row, strict=False))
+            if len(block) >= BLOCK_ROWS:
+                yield b"".join(block)
+                block = []
+        yield b"".join(block)
+
+    return _write(path, chunks())
+
+
+class ScoreLog:
+    """The score log at `path`, mapped again only when it has grown or been replaced."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._stamp = None
+        self._records = None
+        self._max_id = NULL_ID
+        # (positions, user ids) of the first len(positions) records, sorted
+        # by user id and then position; see user_rows.
+        self._user_index = None
+
+    def exists(self):
+        return self.path.exists()
+
+    def records(self):
+        """All complete records, as a read-only structured array over the mapped file."""
+        st = os.stat(self.path)
+        with self._lock:
+            if (st.st_ino, st.st_size) != self._stamp:
+                self._remap()
+            return self._records
+
+    def _remap(self):
+        import numpy as np
+
+        with open(self.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size or _HEADER.unpack(header)[:2] != (MAGIC, _RECORD.size):
+                raise ValueError(f"{self.path} is not a score log")
+            count = (st.st_size - _HEADER.size) // _RECORD.size
+            if count:
+                mapped = mmap.mmap(f.fileno(), _HEADER.size + count * _RECORD.size, access=mmap.ACCESS_READ)
+                records = np.frombuffer(mapped, _dtype(), count, _HEADER.size)
+            else:
+                records = np.zeros(0, _dtype())
+
+        # Appends only add records, so the largest id is kept up to date
+        # from the new ones; a replaced file is scanned in full.
+        previous = self._records
+        if self._stamp is not None and self._stamp[0] == st.st_ino and len(previous) <= count:
+            new = records[len(previous):]
+        else:
+            new = records
+            self._max_id = NULL_ID
+            self._user_index = None
+        if len(new):
+            self._max_id = max(self._max_id, int(new["id"].max()))
+        self._records = records
+        self._stamp = (st.st_ino, st.st_size)
+
+    def __len__(self):
+        return len(self.records())
+
+    def next_id(self):
+        """The id for the next attempt; call it holding the log's lock."""
+        self.records()
+        return max(self._max_id + 1, 1)
+
+    def append(self, rows):
+        """Append leaderboard rows; call it holding the log's lock."""
+        data = b"".join(_pack(row) for row in rows)
+        with open(self.path, "r+b") as f:
+            end = f.seek(0, os.SEEK_END)
+            whole = _HEADER.size + (end - _HEADER.size) // _RECORD.size * _RECORD.size
+            if whole != end:
+                # A record torn by a crash; readers never counted it.
+                f.truncate(whole)
+                f.seek(whole)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        instrumentation.record(bytes_written=len(data))
+
+    def iter_rows(self):
+        """Yield every attempt as a leaderboard row, in the order they were saved."""
+        records = self.records()
+        for start in range(0, len(records), BLOCK_ROWS):
+            block = records[start:start + BLOCK_ROWS]
+            instrumentation.record(rows_scanned=len(block))
+            yield from _rows(block)
+
+    def user_rows(self, user_id):
+        """Rows of one student, in saved order, found through a sorted user_id index.
+
+        The index is built on first use and later attempts are merged into
+        it in batches, so a lookup costs two binary searches, a scan of at
+        most INDEX_TAIL_ROWS recent records and the student's own rows.
+        """
+        import numpy as np
+
+        key = _query_id(user_id)
+        with self._lock:
+            records = self.records()
+            if key is None:
+                return []
+            if self._user_index is None:
+                order = np.argsort(records["user_id"], kind="stable")
+                self._user_index = (order, records["user_id"][order])
+            elif len(records) - len(self._user_index[0]) > INDEX_TAIL_ROWS:
+                positions, users = self._user_index
+                tail = records["user_id"][len(positions):]
+                order = np.argsort(tail, kind="stable")
+                at = np.searchsorted(users, tail[order], "right")
+                self._user_index = (np.insert(positions, at, order + len(positions)),
+                                    np.insert(users, at, tail[order]))
+            positions, users = self._user_index
+
+        found = positions[np.searchsorted(users, key, "left"):np.searchsorted(users, key, "right")]
+        tail = records["user_id"][len(positions):]
+        found = np.concatenate((found, np.flatnonzero(tail == key) + len(positions)))
+        instrumentation.record(rows_scanned=len(found) + len(tail))
+        return _rows(records[found])
+
+    def top(self, quiz_id=None, limit=None):
+        """Rows with a score, best first and in saved order on ties.
+
+        Only rows of `quiz_id` unless it is None, and at most `limit`.
+        Matches sorting the rows with the same key, without sorting more
+        than the rows that can make the cut.
+        """
+        import numpy as np
+
+        records = self.records()
+        instrumentation.record(rows_scanned=len(records))
+        if limit is not None and limit <= 0:
+            return []
+        scores = records["score"]
+        mask = ~np.isnan(scores)
+        if quiz_id is not None:
+            key = _query_id(quiz_id)
+            if key is None:
+                return []
+            mask &= records["quiz_id"] == key
+        index = np.flatnonzero(mask)
+        if limit is not None and limit < len(index):
+            candidates = scores[index]
+            cutoff = np.partition(candidates, len(index) - limit)[len(index) - limit]
+            index = index[candidates >= cutoff]
+        index = index[np.argsort(-scores[index], kind="stable")[:limit]]
+        return _rows(records[index])
+
+    def _kept(self, records, quiz_ids):
+        import numpy as np
+
+        keys = [key for key in map(_query_id, quiz_ids) if key is not None]
+        return np.isin(records["quiz_id"], np.array(keys, dtype=np.int64))
+
+    def count_kept(self, quiz_ids):
+        """Number of attempts whose quiz is in `quiz_ids`."""
+        import numpy as np
+
+        return int(np.count_nonzero(self._kept(self.records(), quiz_ids)))
+
+    def keep_quizzes(self, quiz_ids):
+        """Drop the attempts whose quiz is not in `quiz_ids` and return how many.
+
+        Replaces the file; call it holding the log's lock.
+        """
+        records = self.records()
+        kept = records[self._kept(records, quiz_ids)]
+        if len(kept) == len(records):
+            return 0
+        with self._lock:
+            _write(self.path, [kept.tobytes()])
+            self._stamp = None
+        return len(records) - len(kept)
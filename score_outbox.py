@@ -0,0 +1,166 @@
+"""Durable outbox for finished quiz attempts.
+
+A score is first appended (and fsynced) to a small JSON-lines file, which
+takes milliseconds and cannot fail because leaderboard.xlsx is open in
+Excel or locked by another client. A background thread then moves pending
+scores into the leaderboard in batches through save_scores, retrying with
+backoff until it succeeds. Scores left behind by a crash or a closed app
+are flushed the next time the app starts.
+
+Delivery is at least once: if the process dies between saving a batch and
+removing it from the outbox, that batch is saved again on the next start.
+"""
+import atexit
+import json
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime
+
+from config import DB_FOLDER
+from excel_db import save_scores
+from locking import FileLock
+
+# One outbox per machine: the data folder may be shared between lab PCs.
+OUTBOX_FILE = DB_FOLDER / f"score_outbox-{socket.gethostname()}.jsonl"
+BATCH_SIZE = 500
+RETRY_START = 1.0
+RETRY_MAX = 60.0
+
+
+class ScoreOutbox:
+    def __init__(self, path=OUTBOX_FILE):
+        self.path = path
+        # Short lock for appending/rewriting the file; a second one makes sure
+        # only one process saves a given batch.
+        self._file_lock = FileLock(path)
+        self._flush_lock = FileLock(f"{path}.flush")
+        self._wake = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.pending = len(self._read())
+        self.last_error = None
+
+    def submit(self, user_id, user_name, quiz_id, score, time_taken):
+        """Persist one attempt locally and schedule it for the leaderboard."""
+        record = {"id": uuid.uuid4().hex, "user_id": user_id, "user_name": user_name,
+                  "quiz_id": quiz_id, "score": score, "time_taken": time_taken,
+                  "taken_at": datetime.now().isoformat(timespec="seconds")}
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        with self._file_lock:
+            with open(self.path, "a+b") as f:
+                _drop_torn_line(f)
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.pending = len(self._read())
+        self.start()
+
+    def start(self):
+        """Start the background flusher (if needed) and wake it up."""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="score-outbox", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def flush(self):
+        """Save pending scores in batches; returns how many were saved.
+
+        Errors from the storage layer propagate and leave the unsaved scores
+        in the outbox.
+        """
+        saved = 0
+        with self._flush_lock:
+            while True:
+                with self._file_lock:
+                    batch = self._read()[:BATCH_SIZE]
+                if not batch:
+                    return saved
+                save_scores((r["user_id"], r["user_name"], r["quiz_id"], r["score"], r["time_taken"],
+                             r.get("taken_at")) for r in batch)
+                done = {r["id"] for r in batch}
+                with self._file_lock:
+                    self._rewrite([r for r in self._read() if r["id"] not in done])
+                saved += len(batch)
+
+    def _run(self):
+        delay = RETRY_START
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            try:
+                self.flush()
+                self.last_error = None
+                delay = RETRY_START
+            except Exception as e:
+                self.last_error = e
+                print(f"Saving scores failed, retrying in {delay:.0f}s: {e}")
+                # A new submission also triggers an earlier retry.
+                self._wake.wait(delay)
+                self._wake.set()
+                delay = min(delay * 2, RETRY_MAX)
+
+    def _read(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        records = []
+        for line in data.splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # torn by a crash mid-append
+        return records
+
+    def _rewrite(self, records):
+        if not records:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+        else:
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(record) + "\n" for record in records)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        self.pending = len(records)
+
+
+def _drop_torn_line(f):
+    """Cut a last line torn by a crash from `f`, so the next line starts on its own."""
+    end = f.seek(0, os.SEEK_END)
+    if not end:
+        return
+    f.seek(end - 1)
+    if f.read(1) != b"\n":
+        f.seek(0)
+        f.truncate(f.read().rfind(b"\n") + 1)
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox():
+    """Return the process-wide outbox, flushing any scores left from earlier runs."""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = ScoreOutbox()
+            if _outbox.pending:
+                _outbox.start()
+            atexit.register(_flush_at_exit)
+        return _outbox
+
+
+def _flush_at_exit():
+    try:
+        _outbox.flush()
+    except Exception as e:
+        print(f"{_outbox.pending} score(s) kept in {_outbox.path.name} for the next start: {e}")
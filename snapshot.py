@@ -0,0 +1,322 @@
+"""Binary snapshots of the workbooks, loaded instead of parsing the .xlsx.
+
+Next to each workbook excel_db keeps ``<workbook>.bin``, a copy of its data
+rows that decodes an order of magnitude faster than openpyxl parses the
+zipped XML. The .xlsx stays the source of truth: a snapshot records the
+size and mtime of the workbook it was made from and is ignored as soon as
+they change, e.g. when a teacher edits the spreadsheet in Excel, and then
+rebuilt from the next parse. Journals are replayed on top as before.
+
+Layout (little-endian):
+
+    header  magic, source size, source mtime_ns, row count
+    blocks  up to BLOCK_ROWS rows each, column by column:
+              row count, column count, row lengths (only if they differ)
+              per column: type, payload size, payload
+    end     a block of 0 rows
+
+Column types: "n" all empty; "b", "h", "i", "q" integers of 8 to 64 bits
+and "d" float64, each with a list of empty cells; "s" strings, as char
+lengths (-1 for empty) and one UTF-8 blob; "o" anything else, as a type
+tag per cell plus its text.
+"""
+import datetime
+import itertools
+import math
+import os
+import struct
+from array import array
+
+MAGIC = b"QZSNAP01"
+BLOCK_ROWS = 65536
+
+_HEADER = struct.Struct("<8sqqq")
+_BLOCK = struct.Struct("<II")
+_COLUMN = struct.Struct("<cQ")
+_COUNT = struct.Struct("<I")
+_INT_KINDS = tuple((kind, 2 ** (8 * array(kind).itemsize - 1)) for kind in "bhiq")
+
+# Values openpyxl reads back unchanged; see Writer(exact=True).
+_EXACT_INT = 2 ** 53
+_MAX_CELL_CHARS = 32767
+
+_tmp_ids = itertools.count()
+
+_MIXED_TYPES = (
+    (type(None), 0, None, None),
+    (bool, 1, lambda v: "1" if v else "", bool),
+    (int, 2, str, int),
+    (float, 3, repr, float),
+    (str, 4, str, str),
+    (datetime.datetime, 5, datetime.datetime.isoformat, datetime.datetime.fromisoformat),
+    (datetime.date, 6, datetime.date.isoformat, datetime.date.fromisoformat),
+    (datetime.time, 7, datetime.time.isoformat, datetime.time.fromisoformat),
+    (datetime.timedelta, 8, lambda v: repr(v.total_seconds()),
+     lambda text: datetime.timedelta(seconds=float(text))),
+)
+_ENCODERS = {cls: (tag, encode) for cls, tag, encode, _ in _MIXED_TYPES}
+_DECODERS = {tag: decode for _, tag, _, decode in _MIXED_TYPES}
+
+
+class Unsupported(ValueError):
+    """A value the snapshot cannot store as the workbook would return it."""
+
+
+def sidecar_path(path):
+    return path.with_name(path.name + ".bin")
+
+
+def stamp(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _open_current(path):
+    """Open the snapshot of `path` if it matches the workbook; returns (file, rows) or None."""
+    try:
+        f = open(sidecar_path(path), "rb")
+    except FileNotFoundError:
+        return None
+    try:
+        header = f.read(_HEADER.size)
+        if len(header) == _HEADER.size:
+            magic, size, mtime_ns, rows = _HEADER.unpack(header)
+            if magic == MAGIC and (size, mtime_ns) == stamp(path):
+                return f, rows
+    except OSError:
+        pass
+    f.close()
+    return None
+
+
+def row_count(path):
+    """Number of data rows per the snapshot, or None without a current one."""
+    current = _open_current(path)
+    if current is None:
+        return None
+    current[0].close()
+    return current[1]
+
+
+def iter_rows(path, width=0):
+    """Return an iterator over the rows of a current snapshot, or None.
+
+    Rows are padded with None to at least `width` values, for snapshots
+    made before a column was added. The snapshot is opened before
+    returning, so it is read consistently even if another process
+    replaces it meanwhile.
+    """
+    current = _open_current(path)
+    if current is None:
+        return None
+    return _read_blocks(current[0], width)
+
+
+def _read_blocks(f, width):
+    with f:
+        while True:
+            rows, columns = _BLOCK.unpack(f.read(_BLOCK.size))
+            if not rows:
+                return
+            lengths = None
+            if columns & 0x80000000:
+                columns &= 0x7FFFFFFF
+                lengths = array("I")
+                lengths.frombytes(f.read(4 * rows))
+            values = []
+            for _ in range(columns):
+                kind, size = _COLUMN.unpack(f.read(_COLUMN.size))
+                values.append(_decode(kind, f.read(size), rows))
+            values += [[None] * rows] * (width - columns)
+            block = zip(*values) if values else ((),) * rows
+            if lengths is None:
+                yield from block
+            else:
+                for row, length in zip(block, lengths):
+                    yield row[:max(length, width)]
+
+
+def _nulls(payload, rows):
+    (count,) = _COUNT.unpack_from(payload)
+    nulls = array("I")
+    nulls.frombytes(payload[4:4 + 4 * count])
+    return nulls, payload[4 + 4 * count:]
+
+
+def _decode(kind, payload, rows):
+    if kind == b"n":
+        return [None] * rows
+    if kind in (b"b", b"h", b"i", b"q", b"d"):
+        nulls, data = _nulls(payload, rows)
+        numbers = array(kind.decode())
+        numbers.frombytes(data)
+        values = numbers.tolist()
+        for i in nulls:
+            values[i] = None
+        return values
+    if kind == b"s":
+        return _decode_strings(payload, rows)
+    tags = payload[:rows]
+    texts = _decode_strings(payload[rows:], rows)
+    return [None if tag == 0 else _DECODERS[tag](text) for tag, text in zip(tags, texts)]
+
+
+def _decode_strings(payload, rows):
+    lengths = array("i")
+    lengths.frombytes(payload[:4 * rows])
+    text = payload[4 * rows:].decode("utf-8")
+    values = []
+    pos = 0
+    for length in lengths:
+        if length < 0:
+            values.append(None)
+        else:
+            values.append(text[pos:pos + length])
+            pos += length
+    return values
+
+
+def _encode_strings(values):
+    lengths = array("i", (-1 if value is None else len(value) for value in values))
+    return lengths.tobytes() + "".join(value for value in values if value is not None).encode("utf-8")
+
+
+def _encode_numbers(kind, values):
+    nulls = array("I", (i for i, value in enumerate(values) if value is None))
+    numbers = array(kind, (0 if value is None else value for value in values))
+    return _COUNT.pack(len(nulls)) + nulls.tobytes() + numbers.tobytes()
+
+
+def _encode_column(values):
+    types = {type(value) for value in values}
+    types.discard(type(None))
+    if not types:
+        return b"n", b""
+    if types == {int}:
+        numbers = [value for value in values if value is not None]
+        low, high = min(numbers), max(numbers)
+        for kind, limit in _INT_KINDS:
+            if -limit <= low and high < limit:
+                return kind.encode(), _encode_numbers(kind, values)
+    if types == {float}:
+        return b"d", _encode_numbers("d", values)
+    if types == {str}:
+        return b"s", _encode_strings(values)
+    tags = bytearray()
+    texts = []
+    for value in values:
+        try:
+            tag, encode = _ENCODERS[type(value)]
+        except KeyError:
+            raise Unsupported(f"cannot snapshot a {type(value).__name__} value") from None
+        tags.append(tag)
+        texts.append(None if value is None else encode(value))
+    return b"o", bytes(tags) + _encode_strings(texts)
+
+
+def _as_read(value):
+    """`value` as openpyxl reads it back after writing it to a workbook."""
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        if abs(value) < _EXACT_INT:
+            return value
+    elif isinstance(value, float):
+        if math.isfinite(value):
+            if not value.is_integer():
+                return value
+            if abs(value) < _EXACT_INT:
+                return int(value)
+    elif isinstance(value, str):
+        if len(value) <= _MAX_CELL_CHARS:
+            return value.replace("\r\n", "\n").replace("\r", "\n") or None
+    raise Unsupported(f"{value!r} does not survive a round trip through the workbook")
+
+
+class Writer:
+    """Write a snapshot of `path` row by row, then commit() it into place.
+
+    With `exact`, rows are the ones being written to the workbook and are
+    stored as reading them back would return them, padded to `width`;
+    values that would come back altered make the snapshot be skipped. So
+    do I/O errors: a missing snapshot only costs a parse.
+    """
+
+    def __init__(self, path, width, exact=False):
+        self.path = path
+        self.width = width
+        self.exact = exact
+        self.rows = 0
+        self._block = []
+        self._file = None
+        self._tmp_path = sidecar_path(path).with_name(
+            f"{sidecar_path(path).name}.{os.getpid()}.{next(_tmp_ids)}.tmp")
+        try:
+            self._file = open(self._tmp_path, "wb")
+            self._file.write(_HEADER.pack(MAGIC, 0, 0, 0))
+        except OSError:
+            self.abort()
+
+    def add(self, row):
+        if self._file is None:
+            return
+        try:
+            if self.exact:
+                row = [_as_read(value) for value in row]
+                while len(row) > self.width and row[-1] is None:
+                    row.pop()
+                row += [None] * (self.width - len(row))
+            self._block.append(tuple(row))
+            if len(self._block) >= BLOCK_ROWS:
+                self._flush()
+        except (OSError, Unsupported):
+            self.abort()
+
+    def _flush(self):
+        block, self._block = self._block, []
+        columns = max(map(len, block))
+        lengths = array("I", map(len, block))
+        uneven = any(length != columns for length in lengths)
+        parts = [_BLOCK.pack(len(block), columns | (0x80000000 if uneven else 0))]
+        if uneven:
+            parts.append(lengths.tobytes())
+            block = [row + (None,) * (columns - len(row)) for row in block]
+        for values in zip(*block):
+            kind, payload = _encode_column(values)
+            parts.append(_COLUMN.pack(kind, len(payload)) + payload)
+        self._file.write(b"".join(parts))
+        self.rows += len(block)
+
+    def commit(self, source_stamp):
+        """Finish the snapshot of the workbook state `source_stamp` and move it into place."""
+        if self._file is None:
+            return False
+        try:
+            if self._block:
+                self._flush()
+            self._file.write(_BLOCK.pack(0, 0))
+            self._file.seek(0)
+            self._file.write(_HEADER.pack(MAGIC, *source_stamp, self.rows))
+            self._file.close()
+            self._file = None
+            os.replace(self._tmp_path, sidecar_path(self.path))
+            return True
+        except (OSError, Unsupported):
+            self.abort()
+            return False
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+def remove(path):
+    try:
+        os.remove(sidecar_path(path))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,600 @@
+"""SQLite implementation of the excel_db API.
+
+Selected with QUIZ_STORAGE=sqlite. The functions here keep the same names,
+arguments and return shapes as their excel_db counterparts, so the UI and
+auth modules work unchanged against either backend.
+
+    python sqlite_db.py migrate    # import data/*.xlsx into quiz.db
+    python sqlite_db.py export     # write quiz.db back out to data/*.xlsx
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from config import DB_FOLDER
+import counters
+import journal
+import partitions
+import score_log
+import snapshot
+
+SQLITE_FILE = DB_FOLDER / "quiz.db"
+
+TABLE_COLUMNS = {
+    "users": ["id", "username", "password", "role"],
+    "quizzes": ["id", "title", "description"],
+    "questions": ["id", "quiz_id", "question_text", "option1", "option2", "option3", "option4", "correct_answer"],
+    "leaderboard": ["id", "user_id", "quiz_id", "score", "time_taken", "taken_at"],
+}
+
+TABLE_FILES = {
+    "users": "users.xlsx",
+    "quizzes": "quizzes.xlsx",
+    "questions": "questions.xlsx",
+    "leaderboard": "leaderboard.xlsx",
+}
+
+# Ids are AUTOINCREMENT so the id of a deleted row is never handed out
+# again: a new quiz must not inherit the attempts of a deleted one.
+TABLE_SCHEMAS = {
+    "users": """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT,
+    password TEXT,
+    role TEXT
+)""",
+    "quizzes": """
+CREATE TABLE IF NOT EXISTS quizzes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT,
+    description TEXT
+)""",
+    "questions": """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    quiz_id INTEGER,
+    question_text TEXT,
+    option1 TEXT,
+    option2 TEXT,
+    option3 TEXT,
+    option4 TEXT,
+    correct_answer INTEGER
+)""",
+    "leaderboard": """
+CREATE TABLE IF NOT EXISTS leaderboard (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    quiz_id INTEGER,
+    score NUMERIC,
+    time_taken NUMERIC,
+    taken_at TEXT
+)""",
+}
+
+# Usernames compare without surrounding whitespace, like excel_db.username_key;
+# names imported from workbooks may carry stray spaces.
+USERNAME_KEY = "trim(username, ' ' || char(9, 10, 13))"
+
+INDEXES = f"""
+CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
+CREATE INDEX IF NOT EXISTS idx_users_username_key ON users({USERNAME_KEY});
+CREATE INDEX IF NOT EXISTS idx_questions_quiz ON questions(quiz_id);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_score ON leaderboard(score DESC, id);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_quiz_score ON leaderboard(quiz_id, score DESC, id);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_user ON leaderboard(user_id);
+"""
+
+_local = threading.local()
+
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def _connect():
+    """Return this thread's connection, opening it on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        DB_FOLDER.mkdir(exist_ok=True)
+        conn = sqlite3.connect(SQLITE_FILE, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn = conn
+    return conn
+
+
+def _create_schema(conn):
+    for table, create in TABLE_SCHEMAS.items():
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                           (table,)).fetchone()
+        if sql is None:
+            conn.execute(create)
+        elif "AUTOINCREMENT" not in sql[0].upper():
+            _rebuild_table(conn, table)
+    conn.executescript(INDEXES)
+    # Databases created before attempts were timestamped.
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(leaderboard)")]
+    if "taken_at" not in columns:
+        with conn:
+            conn.execute("ALTER TABLE leaderboard ADD COLUMN taken_at TEXT")
+
+
+def _rebuild_table(conn, table):
+    """Recreate a table from a database made before ids were AUTOINCREMENT, keeping its rows."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Another process may have rebuilt it while we waited for the lock.
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                           (table,)).fetchone()[0]
+        if "AUTOINCREMENT" not in sql.upper():
+            present = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            columns = ", ".join(column for column in TABLE_COLUMNS[table] if column in present)
+            conn.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+            conn.execute(TABLE_SCHEMAS[table])
+            conn.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}_old")
+            conn.execute(f"DROP TABLE {table}_old")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def init_excel_db():
+    """Create the schema, importing existing workbooks into a new database.
+
+    Like the Excel version, only the first call in a process does any work.
+    """
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        is_new = not SQLITE_FILE.exists()
+        conn = _connect()
+        _create_schema(conn)
+
+        # First run against an existing data folder: bring the workbooks over so
+        # switching backends does not start from an empty database.
+        if is_new and any((DB_FOLDER / name).exists() for name in TABLE_FILES.values()):
+            migrate_from_excel()
+        _initialized = True
+
+def add_user(username, password, role):
+    conn = _connect()
+    with conn:
+        cur = conn.execute(
+            "INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
+            (username, password, role))
+    return cur.lastrowid
+
+def add_user_if_new(username, password, role):
+    conn = _connect()
+    with conn:
+        # Take the write lock up front so the check and insert are atomic.
+        conn.execute("BEGIN IMMEDIATE")
+        if conn.execute(f"SELECT 1 FROM users WHERE {USERNAME_KEY} = ?", (username.strip(),)).fetchone():
+            return None
+        cur = conn.execute(
+            "INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
+            (username, password, role))
+    return cur.lastrowid
+
+def get_user(username):
+    row = _connect().execute(
+        f"SELECT id, username, password, role FROM users WHERE {USERNAME_KEY} = ? ORDER BY id LIMIT 1",
+        (str(username).strip(),)).fetchone()
+    if row is None:
+        return None
+    return {"id": row[0], "username": row[1], "password": row[2], "role": row[3]}
+
+def update_user_password(user_id, password):
+    conn = _connect()
+    with conn:
+        conn.execute("UPDATE users SET password = ? WHERE id = ?", (password, user_id))
+
+def add_quiz(title, description=""):
+    conn = _connect()
+    with conn:
+        cur = conn.execute("INSERT INTO quizzes (title, description) VALUES (?, ?)", (title, description))
+    return cur.lastrowid
+
+add_new_quiz = add_quiz
+
+def get_all_quizzes():
+    rows = _connect().execute("SELECT id, title, description FROM quizzes ORDER BY id")
+    return [{"id": row[0], "title": row[1], "description": row[2]} for row in rows]
+
+def get_quizzes_page(offset=0, limit=100):
+    rows = _connect().execute(
+        "SELECT id, title, description FROM quizzes ORDER BY id LIMIT ? OFFSET ?", (limit, offset))
+    return [{"id": row[0], "title": row[1], "description": row[2]} for row in rows]
+
+def _insert_questions(conn, quiz_id, questions):
+    ids = []
+    for question_text, options, correct_index in questions:
+        cur = conn.execute(
+            "INSERT INTO questions (quiz_id, question_text, option1, option2, option3, option4, correct_answer) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (quiz_id, question_text, options[0], options[1], options[2], options[3], correct_index))
+        ids.append(cur.lastrowid)
+    return ids
+
+def add_questions_to_quiz(quiz_id, questions):
+    conn = _connect()
+    with conn:
+        return _insert_questions(conn, quiz_id, questions)
+
+def add_question_to_quiz(quiz_id, question_text, options, correct_index):
+    add_questions_to_quiz(quiz_id, [(question_text, options, correct_index)])
+
+def import_questions(questions):
+    conn = _connect()
+    created = 0
+    with conn:
+        quiz_ids = {}
+        for title, description, question_text, options, correct_index in questions:
+            quiz_id = quiz_ids.get(title)
+            if quiz_id is None:
+                row = conn.execute("SELECT id FROM quizzes WHERE title = ? ORDER BY id LIMIT 1", (title,)).fetchone()
+                if row is not None:
+                    quiz_id = row[0]
+                else:
+                    quiz_id = conn.execute("INSERT INTO quizzes (title, description) VALUES (?, ?)",
+                                           (title, description)).lastrowid
+                    created += 1
+                quiz_ids[title] = quiz_id
+            _insert_questions(conn, quiz_id, [(question_text, options, correct_index)])
+    return created
+
+def _question(row):
+    return {
+        'id': row[0],
+        'quiz_id': row[1],
+        'question_text': row[2],
+        'options': [row[3], row[4], row[5], row[6]],
+        'correct_answer': row[7]
+    }
+
+def iter_questions():
+    rows = _connect().execute(
+        "SELECT id, quiz_id, question_text, option1, option2, option3, option4, correct_answer "
+        "FROM questions ORDER BY id")
+    for row in rows:
+        yield _question(row)
+
+def iter_quiz_questions(quiz_id):
+    rows = _connect().execute(
+        "SELECT id, quiz_id, question_text, option1, option2, option3, option4, correct_answer "
+        "FROM questions WHERE quiz_id = ? ORDER BY id", (quiz_id,))
+    for row in rows:
+        yield _question(row)
+
+def get_quiz_questions(quiz_id):
+    return list(iter_quiz_questions(quiz_id))
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+def save_score(user_id, user_name, quiz_id, score, time_taken, taken_at=None):
+    conn = _connect()
+    with conn:
+        conn.execute(
+            "INSERT INTO leaderboard (user_id, quiz_id, score, time_taken, taken_at) VALUES (?, ?, ?, ?, ?)",
+            (user_id, quiz_id, score, time_taken, taken_at or _now()))
+
+def save_scores(scores):
+    conn = _connect()
+    now = _now()
+    ids = []
+    with conn:
+        for user_id, _, quiz_id, score, time_taken, *taken_at in scores:
+            cur = conn.execute(
+                "INSERT INTO leaderboard (user_id, quiz_id, score, time_taken, taken_at) VALUES (?, ?, ?, ?, ?)",
+                (user_id, quiz_id, score, time_taken, (taken_at + [None])[0] or now))
+            ids.append(cur.lastrowid)
+    return ids
+
+def iter_top_scores(quiz_id=None, limit=None):
+    sql = "SELECT id, user_id, quiz_id, score, time_taken, taken_at FROM leaderboard"
+    params = []
+    if quiz_id is not None:
+        sql += " WHERE quiz_id = ?"
+        params.append(quiz_id)
+    sql += " ORDER BY score DESC, id LIMIT ?"
+    params.append(-1 if limit is None else limit)
+    yield from _connect().execute(sql, params)
+
+def get_top_scores(quiz_id=None, limit=10):
+    return list(iter_top_scores(quiz_id, limit))
+
+def iter_attempts():
+    yield from _connect().execute(
+        "SELECT id, user_id, quiz_id, score, time_taken, taken_at FROM leaderboard ORDER BY id")
+
+def attempt_records():
+    # Attempts are never kept in a score log here.
+    return None
+
+def get_user_scores(user_id):
+    return _connect().execute(
+        "SELECT id, user_id, quiz_id, score, time_taken, taken_at FROM leaderboard WHERE user_id = ? ORDER BY id",
+        (user_id,)).fetchall()
+
+def get_user_history(user_id):
+    rows = _connect().execute(
+        "SELECT l.id, l.quiz_id, COALESCE(q.title, 'Deleted Quiz'), l.score, l.time_taken, l.taken_at "
+        "FROM leaderboard l "
+        "LEFT JOIN quizzes q ON q.id = l.quiz_id "
+        "WHERE l.user_id = ? ORDER BY l.id", (user_id,))
+    return [{"id": row[0], "quiz_id": row[1], "quiz_title": row[2],
+             "score": row[3], "time_taken": row[4], "taken_at": row[5]} for row in rows]
+
+def iter_students():
+    rows = _connect().execute(
+        "SELECT MIN(id), username FROM users WHERE role = 'student' "
+        "GROUP BY username ORDER BY MIN(id)")
+    for row in rows:
+        yield {"id": row[0], "username": row[1]}
+
+def get_all_students():
+    return list(iter_students())
+
+def get_students_page(offset=0, limit=100):
+    rows = _connect().execute(
+        "SELECT MIN(id), username FROM users WHERE role = 'student' "
+        "GROUP BY username ORDER BY MIN(id) LIMIT ? OFFSET ?", (limit, offset))
+    return [{"id": row[0], "username": row[1]} for row in rows]
+
+def _leaderboard_entries(limit, offset):
+    rows = _connect().execute(
+        "SELECT COALESCE(u.username, 'Unknown'), COALESCE(q.title, 'Deleted Quiz'), l.score, l.time_taken "
+        "FROM leaderboard l "
+        "LEFT JOIN users u ON u.id = l.user_id "
+        "LEFT JOIN quizzes q ON q.id = l.quiz_id "
+        "ORDER BY l.score DESC, l.id LIMIT ? OFFSET ?", (-1 if limit is None else limit, offset))
+    for row in rows:
+        yield {
+            "student_name": row[0],
+            "quiz_title": row[1],
+            "score": row[2],
+            "time_taken": row[3]
+        }
+
+def iter_leaderboard_data(limit=None):
+    return _leaderboard_entries(limit, 0)
+
+def get_leaderboard_data(limit=None):
+    return list(iter_leaderboard_data(limit))
+
+def get_leaderboard_page(offset=0, limit=20):
+    return list(_leaderboard_entries(limit, offset))
+
+def get_all_teachers():
+    rows = _connect().execute("SELECT id, username FROM users WHERE role = 'teacher' ORDER BY id")
+    return [{"id": row[0], "username": row[1]} for row in rows]
+
+def add_new_quiz_with_questions(title, description, questions):
+    conn = _connect()
+    with conn:
+        cur = conn.execute("INSERT INTO quizzes (title, description) VALUES (?, ?)", (title, description))
+        _insert_questions(conn, cur.lastrowid, questions)
+    return cur.lastrowid
+
+def delete_quiz(quiz_id):
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute("DELETE FROM quizzes WHERE id = ?", (quiz_id,))
+            conn.execute("DELETE FROM questions WHERE quiz_id = ?", (quiz_id,))
+            conn.execute("DELETE FROM leaderboard WHERE quiz_id = ?", (quiz_id,))
+        return True
+    except Exception as e:
+        print(f"Error deleting quiz: {str(e)}")
+        return False
+
+# Questions and attempts whose quiz has been deleted.
+_ORPHANED = "quiz_id IS NULL OR quiz_id NOT IN (SELECT id FROM quizzes)"
+
+def garbage_stats():
+    """Count questions and attempts left behind by deleted quizzes."""
+    conn = _connect()
+    stats = {"quizzes": 0}
+    for table in ("questions", "leaderboard"):
+        stats[table] = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {_ORPHANED}").fetchone()[0]
+    stats["rows"] = sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                        for table in ("quizzes", "questions", "leaderboard")) - sum(stats.values())
+    return stats
+
+def compact():
+    """Delete questions and attempts of deleted quizzes; returns the counts per table.
+
+    Freed pages are reused by later inserts, so the file is not vacuumed.
+    """
+    conn = _connect()
+    dropped = {"quizzes": 0}
+    with conn:
+        for table in ("questions", "leaderboard"):
+            dropped[table] = conn.execute(f"DELETE FROM {table} WHERE {_ORPHANED}").rowcount
+    return dropped
+
+def clean_student_data():
+    conn = _connect()
+    with conn:
+        conn.execute("DELETE FROM users WHERE role IS NOT 'student'")
+        conn.execute(
+            "DELETE FROM users WHERE id NOT IN (SELECT MIN(id) FROM users GROUP BY username)")
+
+
+def migrate_from_excel(folder=DB_FOLDER):
+    """Import the four workbooks in `folder` into the SQLite database.
+
+    Existing rows in the database are replaced. Rows whose id is missing or
+    duplicated in the workbook are given a fresh id rather than dropped.
+    Writes still pending in a workbook's journal are included, and ids
+    the workbooks' counters have already handed out stay used. A
+    partitioned folder is read partition by partition, and attempts from
+    the score log if there is one. Returns the number of rows imported per
+    table.
+    """
+    conn = _connect()
+    _create_schema(conn)
+    counts = {}
+    with conn:
+        for table, columns in TABLE_COLUMNS.items():
+            conn.execute(f"DELETE FROM {table}")
+            counts[table] = 0
+            placeholders = ", ".join("?" * len(columns))
+            insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+            insert_new_id = (f"INSERT INTO {table} ({', '.join(columns[1:])}) "
+                             f"VALUES ({', '.join('?' * (len(columns) - 1))})")
+            for row in _source_rows(folder, table):
+                if not row or all(value is None for value in row):
+                    continue
+                row = (tuple(row) + (None,) * len(columns))[:len(columns)]
+                try:
+                    conn.execute(insert, row)
+                except sqlite3.IntegrityError:
+                    conn.execute(insert_new_id, row[1:])
+                counts[table] += 1
+            _raise_sequence(conn, table, _source_next_id(folder, table))
+    return counts
+
+
+def _raise_sequence(conn, table, next_id):
+    """Make sure AUTOINCREMENT gives `table` no id below `next_id`."""
+    if not conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+                        (next_id - 1, table)).rowcount:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, next_id - 1))
+
+
+def _next_id(conn, table):
+    """The id AUTOINCREMENT gives the next row of `table`."""
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    top = conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0]
+    return max(seq[0] if seq else 0, top or 0) + 1
+
+
+def _source_next_id(folder, table):
+    """The next id of `table` in the Excel data folder `folder`, from its counters."""
+    next_ids = [counters.read(path) or 1 for path in partitions.table_files(folder, TABLE_FILES[table])]
+    manifest_file = partitions.manifest_path(folder)
+    if table == "questions" and manifest_file.exists():
+        with open(manifest_file, encoding="utf-8") as f:
+            next_ids.append(json.load(f)["next_question_id"])
+    return max(next_ids, default=1)
+
+
+def _source_rows(folder, table):
+    """Yield the rows of `table` as stored in the Excel data folder `folder`."""
+    log_file = score_log.log_path(folder)
+    if table == "leaderboard" and log_file.exists():
+        yield from score_log.ScoreLog(log_file).iter_rows()
+        return
+
+    from openpyxl import load_workbook
+
+    for path in partitions.table_files(folder, TABLE_FILES[table]):
+        if not path.exists():
+            continue
+        records, _ = journal.read(path)
+        wb = load_workbook(path, read_only=True)
+        try:
+            yield from journal.replay_stream(wb.active.iter_rows(min_row=2, values_only=True), records)
+        finally:
+            wb.close()
+
+
+def export_to_excel(folder=DB_FOLDER):
+    """Write every table out as .xlsx workbooks in `folder`, in its layout.
+
+    A partitioned folder (one with a manifest, see partitions.py) gets a
+    question workbook per quiz, all attempts in leaderboard/archive.xlsx
+    and a new manifest, written last; partitions it no longer lists are
+    removed. A folder with a score log gets the attempts as a new log
+    rather than a workbook. The workbooks' journals and snapshots are dropped, as they
+    describe the data being replaced, and their id counters are set to
+    continue from the database's. Run it while no Excel-mode app instance
+    is using the folder.
+    """
+    folder.mkdir(exist_ok=True)
+    conn = _connect()
+    _create_schema(conn)
+    log_file = score_log.log_path(folder)
+    logged = log_file.exists()
+    if partitions.manifest_path(folder).exists():
+        _export_partitioned(conn, folder, logged)
+    else:
+        for table in TABLE_COLUMNS:
+            if not (logged and table == "leaderboard"):
+                _export_table(conn, table, folder / TABLE_FILES[table], _select(table))
+    if logged:
+        score_log.create(log_file, conn.execute(_select("leaderboard")))
+
+
+def _select(table, where=""):
+    return f"SELECT {', '.join(TABLE_COLUMNS[table])} FROM {table} {where} ORDER BY id"
+
+
+def _export_table(conn, table, path, query, args=()):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(TABLE_COLUMNS[table])
+    for row in conn.execute(query, args):
+        ws.append(list(row))
+    path.parent.mkdir(exist_ok=True)
+    wb.save(path)
+    journal.truncate(path)
+    snapshot.remove(path)
+    counters.write(path, _next_id(conn, table))
+
+
+def _export_partitioned(conn, folder, logged):
+    manifest = partitions.new_manifest(_next_id(conn, "questions"))
+    for table in ("users", "quizzes"):
+        _export_table(conn, table, folder / TABLE_FILES[table], _select(table))
+
+    # As when partitioning, questions of deleted quizzes are left out.
+    quiz_ids = [row[0] for row in conn.execute(
+        "SELECT DISTINCT quiz_id FROM questions WHERE quiz_id IN (SELECT id FROM quizzes) ORDER BY quiz_id")]
+    for quiz_id in quiz_ids:
+        name = manifest["questions"][str(quiz_id)] = partitions.question_file(quiz_id)
+        _export_table(conn, "questions", folder / name, _select("questions", "WHERE quiz_id = ?"), (quiz_id,))
+    if not logged:
+        archive = {"month": "", "file": partitions.leaderboard_file(""), "first_id": 1}
+        _export_table(conn, "leaderboard", folder / archive["file"], _select("leaderboard"))
+        manifest["leaderboard"].append(archive)
+    partitions.Manifest(folder).write(manifest)
+
+    listed = {folder / entry["file"] for entry in manifest["leaderboard"]}
+    listed |= {folder / name for name in manifest["questions"].values()}
+    for directory in (partitions.QUESTIONS_DIR, partitions.LEADERBOARD_DIR):
+        for path in (folder / directory).glob("*.xlsx"):
+            if path not in listed:
+                _remove_workbook(path)
+
+
+def _remove_workbook(path):
+    for name in (path, journal.journal_path(path), snapshot.sidecar_path(path), counters.counter_path(path)):
+        try:
+            os.remove(name)
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "migrate":
+        for table, count in migrate_from_excel().items():
+            print(f"{table}: {count} rows imported")
+    elif command == "export":
+        export_to_excel()
+        print(f"Exported {SQLITE_FILE} to {DB_FOLDER}")
+    else:
+        print("Usage: python sqlite_db.py [migrate|export]")
+        sys.exit(1)
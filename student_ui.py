@@ -1,32 +1,85 @@
 import tkinter as tk
 from datetime import datetime
 from tkinter import ttk, messagebox
-from excel_db import get_all_quizzes, get_quiz_questions, get_leaderboard_data, save_score
+from excel_db import get_quizzes_page, get_quiz_questions, get_leaderboard_page, get_user_history
+from background import BackgroundTasks
+from paged_tree import PagedTreeview
+from score_outbox import get_outbox
+
+# Attempts averaged for the trend line and the recent-progress summary.
+TREND_WINDOW = 5
+
+
+def history_trend(entries, window=TREND_WINDOW):
+    """Return (change, moving average) for each attempt in `entries`, oldest first.
+
+    The change is from the student's previous score on the same quiz; the
+    moving average is over the last `window` scores. Attempts without a
+    numeric score get neither.
+    """
+    last_by_quiz = {}
+    recent = []
+    trend = []
+    for entry in entries:
+        score = entry['score'] if isinstance(entry['score'], (int, float)) else None
+        if score is None:
+            trend.append((None, None))
+            continue
+        previous = last_by_quiz.get(entry['quiz_id'])
+        last_by_quiz[entry['quiz_id']] = score
+        recent = (recent + [score])[-window:]
+        trend.append((None if previous is None else score - previous, sum(recent) / len(recent)))
+    return trend
+
 
 class StudentDashboard(tk.Toplevel):
+    QUESTION_CACHE_SIZE = 8
+
     def __init__(self, master, user_id, user_name=None):
         super().__init__(master)
         self.title("Student Dashboard")
         self.geometry("1200x650")
         self.user_id = user_id
         self.user_name = user_name or f"Student_{user_id}"
+        self.tasks = BackgroundTasks(self, on_busy=self._show_busy)
+        self._questions = {}  # quiz_id -> prefetched questions, oldest first
+        self.outbox = get_outbox()
+        self._outbox_pending = self.outbox.pending
+        self._outbox_poll = None
+        self._history = []
+        self._trend = []
+        self._history_loaded = False
         self._setup_ui()
         
     def _setup_ui(self):
+        # Loading and unsaved-score indicators
+        status_frame = ttk.Frame(self)
+        status_frame.pack(side='bottom', fill='x', padx=10)
+        self.status_label = ttk.Label(status_frame, text="")
+        self.status_label.pack(side='left')
+        self.outbox_label = ttk.Label(status_frame, text="", foreground='orange')
+        self.outbox_label.pack(side='right')
+
         self.notebook = ttk.Notebook(self)
         
         # Tab Create
         self.quiz_tab = ttk.Frame(self.notebook)
         self.leaderboard_tab = ttk.Frame(self.notebook)
+        self.history_tab = ttk.Frame(self.notebook)
         
         self.notebook.add(self.quiz_tab, text="Available Quizzes")
         self.notebook.add(self.leaderboard_tab, text="Leaderboard")
+        self.notebook.add(self.history_tab, text="My History")
         self.notebook.pack(expand=True, fill='both', padx=10, pady=10)
+        self.notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed)
         
         # UI Setup
         self._setup_quiz_tab()
         self._setup_leaderboard_tab()
+        self._setup_history_tab()
         self._load_data()
+        # Once every tab exists, as a saved score refreshes their lists.
+        self._poll_outbox()
     
     def _setup_quiz_tab(self):
         # Quiz List UI
@@ -35,9 +88,9 @@ class StudentDashboard(tk.Toplevel):
                 style='Title.TLabel').pack(pady=20)
         
         # Treeview
-        self.quiz_tree = ttk.Treeview(self.quiz_tab, 
+        self.quiz_tree = PagedTreeview(self.quiz_tab, 
                                     columns=('ID', 'Subject', 'Title', 'Description'), 
-                                    show='headings',
+                                    fetch=self._fetch_quizzes, tasks=self.tasks, label="quizzes",
                                     height=15)
         
         # Column Heading
@@ -52,12 +105,8 @@ class StudentDashboard(tk.Toplevel):
         self.quiz_tree.column('Title', width=200)
         self.quiz_tree.column('Description', width=300)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(self.quiz_tab, orient="vertical", command=self.quiz_tree.yview)
-        self.quiz_tree.configure(yscrollcommand=scrollbar.set)
-        
         self.quiz_tree.pack(side='left', fill='both', expand=True, padx=5, pady=5)
-        scrollbar.pack(side='right', fill='y')
+        self.quiz_tree.tree.bind('<<TreeviewSelect>>', self._prefetch_questions)
         
         # Button Frame
         btn_frame = ttk.Frame(self.quiz_tab)
@@ -73,189 +122,104 @@ class StudentDashboard(tk.Toplevel):
                 text="Refresh Quizzes",
                 command=self._load_quizzes).pack(side='left', padx=10, ipadx=20)
     
-    def _start_quiz(self):
-        """নির্বাচিত কুইজ শুরু করুন"""
+    def _selected_quiz(self):
+        """Return (quiz_id, row values) of the selected quiz, or None.
+
+        The ID column shows row numbers; the quiz id is the row's iid.
+        """
         selected_item = self.quiz_tree.focus()
         if not selected_item:
+            return None
+        return int(selected_item), self.quiz_tree.item(selected_item)['values']
+
+    def _prefetch_questions(self, event=None):
+        """Load the selected quiz's questions while the student is still deciding."""
+        selected = self._selected_quiz()
+        if not selected:
+            return
+        quiz_id = selected[0]
+        self.tasks.submit(get_quiz_questions, quiz_id, key="prefetch",
+                          on_done=lambda questions: self._cache_questions(quiz_id, questions),
+                          on_error=lambda e: print(f"Prefetch failed: {e}"))
+
+    def _cache_questions(self, quiz_id, questions):
+        self._questions.pop(quiz_id, None)
+        self._questions[quiz_id] = questions
+        while len(self._questions) > self.QUESTION_CACHE_SIZE:
+            del self._questions[next(iter(self._questions))]
+
+    def _start_quiz(self):
+        """নির্বাচিত কুইজ শুরু করুন"""
+        selected = self._selected_quiz()
+        if not selected:
             messagebox.showwarning("Warning", "Please select a quiz first!")
             return
         
-        item_data = self.quiz_tree.item(selected_item)
-        quiz_id, subject, title, description = item_data['values']
-        
-        # New Quiz Window Create
-        quiz_window = tk.Toplevel(self)
-        quiz_window.title(f"{subject}: {title}")
-        quiz_window.geometry("900x700")
+        quiz_id, (_, subject, title, description) = selected
         
-        questions = get_quiz_questions(quiz_id)
-        
-        if not questions:
-            messagebox.showerror("Error", "No questions found for this quiz!")
-            quiz_window.destroy()
+        if quiz_id in self._questions:
+            self._open_quiz(quiz_id, subject, title, self._questions[quiz_id])
             return
-        
-        # Create a class to hold quiz state
-        class QuizState:
-            def __init__(self):
-                self.current_question = 0
-                self.score = 0
-                self.time_left = 30
-                self.timer = None
-                self.start_time = datetime.now()
-                self.answered_questions = 0
-        
-        state = QuizState()
-        
-        # Main Frame
-        main_frame = ttk.Frame(quiz_window)
-        main_frame.pack(fill='both', expand=True, padx=20, pady=20)
-        
-        def show_question():
-            # Clear previous widgets
-            for widget in main_frame.winfo_children():
-                widget.destroy()
-            
-            if state.current_question >= len(questions):
-                show_results()
-                return
-            
-            question = questions[state.current_question]
-            
-            # Header Frame
-            header_frame = ttk.Frame(main_frame)
-            header_frame.pack(fill='x', pady=10)
-            
-            ttk.Label(header_frame, 
-                    text=f"Question {state.current_question+1}/{len(questions)} | {question.get('category', 'General')}",
-                    font=('Helvetica', 12)).pack(side='left')
-            
-            # Timer label
-            time_label = ttk.Label(header_frame, 
-                                text=f"Time left: {state.time_left}s",
-                                font=('Helvetica', 12, 'bold'),
-                                foreground='red')
-            time_label.pack(side='right')
-            
-            # Question Text
-            ttk.Label(main_frame,
-                    text=question["question_text"],
-                    font=('Helvetica', 16, 'bold'),
-                    wraplength=800).pack(pady=20)
-            
-            # Option Frame
-            options_frame = ttk.Frame(main_frame)
-            options_frame.pack(pady=20)
-            
-            # Check if this is a previous question
-            is_previous_question = state.current_question < state.answered_questions
-            
-            for idx, option in enumerate(question["options"], start=1):
-                btn = ttk.Button(options_frame,
-                                text=f"{idx}. {option}",
-                                width=40,
-                                command=lambda selected=idx: check_answer(selected, question["correct_answer"]))
-                btn.pack(pady=5)
-                
-                # Disable button if it's a previous question
-                if is_previous_question:
-                    btn.configure(state='disabled')
-
-            # Navigation Button
-            nav_frame = ttk.Frame(main_frame)
-            nav_frame.pack(pady=20)
-            
-            if state.current_question > 0:
-                ttk.Button(nav_frame,
-                        text="<< Previous",
-                        command=lambda: go_to_question(-1)).pack(side='left', padx=10)
-            
-            ttk.Button(nav_frame,
-                    text="Next >>",
-                    command=lambda: go_to_question(1)).pack(side='right', padx=10)
-            
-            if state.timer:
-                quiz_window.after_cancel(state.timer)
-            start_timer(time_label)
-        
-        def start_timer(label):
-            state.time_left = 30
-            
-            def update():
-                state.time_left -= 1
-                label.config(text=f"Time left: {state.time_left}s")
-                
-                if state.time_left <= 0:
-                    go_to_question(1)
-                else:
-                    state.timer = quiz_window.after(1000, update)
-            
-            state.timer = quiz_window.after(1000, update)
-        
-        def check_answer(selected_index, correct_index):
-            if state.timer:
-                quiz_window.after_cancel(state.timer)
 
-            if selected_index == correct_index + 1:
-                state.score += 1
-                messagebox.showinfo("Correct!", "Your answer is correct!")
-            else:
-                messagebox.showinfo("Incorrect", f"Correct answer was: Option {correct_index + 1}")
+        def loaded(questions):
+            self._cache_questions(quiz_id, questions)
+            self._open_quiz(quiz_id, subject, title, questions)
 
-            # Update answered questions count
-            state.answered_questions = max(state.answered_questions, state.current_question + 1)
-            go_to_question(1)
+        self.tasks.submit(get_quiz_questions, quiz_id,
+                          key="questions", label="questions", on_done=loaded)
 
-        def go_to_question(step):
-            state.current_question += step
-            show_question()
-        
-        def show_results():
-            for widget in main_frame.winfo_children():
-                widget.destroy()
-            
-            # Result Calculate
-            time_taken = (datetime.now() - state.start_time).seconds
-            percentage = int((state.score / len(questions)) * 100)
+    def _open_quiz(self, quiz_id, subject, title, questions):
+        if not questions:
+            messagebox.showerror("Error", "No questions found for this quiz!")
+            return
+        QuizWindow(self, quiz_id, subject, title, questions)
 
-            ttk.Label(main_frame,
-                    text="Quiz Completed!",
-                    font=('Helvetica', 24, 'bold')).pack(pady=20)
-            
-            ttk.Label(main_frame,
-                    text=f"Your Score: {state.score}/{len(questions)} ({percentage}%)",
-                    font=('Helvetica', 18)).pack(pady=10)
-            
-            ttk.Label(main_frame,
-                    text=f"Time Taken: {time_taken} seconds",
-                    font=('Helvetica', 14)).pack(pady=10)
-            
-            # btn Frame
-            btn_frame = ttk.Frame(main_frame)
-            btn_frame.pack(pady=30)
-            
-            ttk.Button(btn_frame,
-                    text="View Leaderboard",
-                    command=lambda: [self.notebook.select(self.leaderboard_tab), quiz_window.destroy()]).pack(side=tk.LEFT, padx=10)
-            
-            ttk.Button(btn_frame,
-                    text="Close",
-                    command=quiz_window.destroy).pack(side=tk.LEFT, padx=10)
-            
-            # Ledaer Board score Save
-            save_score(self.user_id, self.user_name, quiz_id, percentage, time_taken)
-    
-        show_question()
+    def submit_score(self, quiz_id, percentage, time_taken):
+        # Ledaer Board score Save: kept on disk right away, moved to the
+        # leaderboard in the background
+        try:
+            self.outbox.submit(self.user_id, self.user_name, quiz_id, percentage, time_taken)
+        except Exception as e:
+            messagebox.showerror("Error", f"Your score could not be saved: {e}", parent=self)
+            return
+        self._outbox_pending += 1
+        self._poll_outbox()
+
+    def _poll_outbox(self):
+        """Show how many scores are still waiting and refresh the leaderboard once saved."""
+        if self._outbox_poll:
+            self.after_cancel(self._outbox_poll)
+        pending = self.outbox.pending
+        if pending:
+            text = f"{pending} score(s) waiting to be saved"
+            if self.outbox.last_error is not None:
+                text += " (retrying)"
+        else:
+            text = ""
+        self.outbox_label.config(text=text)
+        if pending < self._outbox_pending:
+            self._load_leaderboard()
+            if self._history_loaded:
+                self._load_history()
+        self._outbox_pending = pending
+        self._outbox_poll = self.after(1000, self._poll_outbox)
     
+    def destroy(self):
+        if self._outbox_poll:
+            self.after_cancel(self._outbox_poll)
+            self._outbox_poll = None
+        super().destroy()
+
     def _setup_leaderboard_tab(self):
         # Leaderboard UI
         ttk.Label(self.leaderboard_tab, 
                 text="Quiz Leaderboard", 
                 style='Title.TLabel').pack(pady=20)
         
-        self.leaderboard_tree = ttk.Treeview(self.leaderboard_tab, 
+        self.leaderboard_tree = PagedTreeview(self.leaderboard_tab, 
                                            columns=('Rank', 'Student', 'Quiz', 'Score'), 
-                                           show='headings',
+                                           fetch=self._fetch_leaderboard, tasks=self.tasks,
+                                           page_size=20, label="leaderboard",
                                            height=15)
         
         self.leaderboard_tree.heading('Rank', text='Rank')
@@ -268,11 +232,7 @@ class StudentDashboard(tk.Toplevel):
         self.leaderboard_tree.column('Quiz', width=200)
         self.leaderboard_tree.column('Score', width=100, anchor='center')
         
-        scrollbar = ttk.Scrollbar(self.leaderboard_tab, orient="vertical", command=self.leaderboard_tree.yview)
-        self.leaderboard_tree.configure(yscrollcommand=scrollbar.set)
-        
         self.leaderboard_tree.pack(side='left', fill='both', expand=True, padx=5, pady=5)
-        scrollbar.pack(side='right', fill='y')
     
         btn_frame = ttk.Frame(self.leaderboard_tab)
         btn_frame.pack(pady=10)
@@ -281,19 +241,124 @@ class StudentDashboard(tk.Toplevel):
                 text="Refresh Leaderboard",
                 command=self._load_leaderboard).pack(ipadx=20, pady=5)
 
+    def _setup_history_tab(self):
+        # Loaded when the tab is first opened and after each saved score
+        ttk.Label(self.history_tab,
+                text="My Quiz History",
+                style='Title.TLabel').pack(pady=10)
+
+        self.history_summary = ttk.Label(self.history_tab, text="", justify='left')
+        self.history_summary.pack(anchor='w', padx=10)
+
+        self.history_canvas = tk.Canvas(self.history_tab, height=150, background='white',
+                                        highlightthickness=0)
+        self.history_canvas.pack(fill='x', padx=10, pady=5)
+        self.history_canvas.bind('<Configure>', lambda event: self._draw_history())
+
+        columns = ('#', 'Date', 'Quiz', 'Score', 'Change', 'Time')
+        self.history_tree = PagedTreeview(self.history_tab, columns=columns,
+                                          fetch=lambda offset, limit: self._history_rows(offset, limit),
+                                          page_size=50, height=10)
+        for column in columns:
+            self.history_tree.heading(column, text=column)
+            self.history_tree.column(column, width=80, anchor='center')
+        self.history_tree.heading('Score', text='Score (%)')
+        self.history_tree.column('#', width=50)
+        self.history_tree.column('Date', width=140)
+        self.history_tree.column('Quiz', width=250, anchor='w')
+        self.history_tree.pack(fill='both', expand=True, padx=5, pady=5)
+
+        ttk.Button(self.history_tab,
+                text="Refresh History",
+                command=self._load_history).pack(ipadx=20, pady=5)
+
+    def _on_tab_changed(self, event=None):
+        if not self._history_loaded and self.notebook.select() == str(self.history_tab):
+            self._history_loaded = True
+            self._load_history()
+
+    def _load_history(self):
+        self.tasks.submit(get_user_history, self.user_id, key="history", label="history",
+                          on_done=self._show_history,
+                          on_error=lambda e: self.history_summary.config(text=f"History failed: {e}"))
+
+    def _show_history(self, entries):
+        self._history = entries
+        self._trend = history_trend(entries)
+        scores = [entry['score'] for entry in entries if isinstance(entry['score'], (int, float))]
+        if scores:
+            lines = [f"{len(entries)} attempts on {len({entry['quiz_id'] for entry in entries})} quizzes, "
+                     f"average {sum(scores) / len(scores):.1f}%, best {max(scores)}%"]
+            recent, before = scores[-TREND_WINDOW:], scores[-2 * TREND_WINDOW:-TREND_WINDOW]
+            line = f"Last {len(recent)} attempts: average {sum(recent) / len(recent):.1f}%"
+            if before:
+                line += f" ({sum(recent) / len(recent) - sum(before) / len(before):+.1f} on the {len(before)} before)"
+            lines.append(line)
+            text = "\n".join(lines)
+        else:
+            text = "You have not finished any quizzes yet."
+        self.history_summary.config(text=text)
+        self.history_tree.refresh()
+        self._draw_history()
+
+    def _history_rows(self, offset, limit):
+        """Rows for the history table, newest attempt first."""
+        rows = []
+        for number in range(len(self._history) - offset, max(len(self._history) - offset - limit, 0), -1):
+            entry = self._history[number - 1]
+            change = self._trend[number - 1][0]
+            taken_at = str(entry['taken_at']).replace('T', ' ')[:16] if entry['taken_at'] else "-"
+            rows.append((number, (number, taken_at, entry['quiz_title'],
+                                       "-" if entry['score'] is None else entry['score'],
+                                       "" if change is None else f"{change:+g}",
+                                       "" if entry['time_taken'] is None else f"{entry['time_taken']}s")))
+        return rows
+
+    def _draw_history(self):
+        """Plot every score (blue) and the moving average (orange), oldest on the left."""
+        canvas = self.history_canvas
+        canvas.delete('all')
+        points = [(entry['score'], average) for entry, (_, average) in zip(self._history, self._trend)
+                  if average is not None]
+        if not points:
+            return
+        width, height = canvas.winfo_width(), int(canvas.cget('height'))
+        left, right, top, bottom = 30, width - 10, 10, height - 10
+        for value in (0, 50, 100):
+            y = bottom - (bottom - top) * value / 100
+            canvas.create_line(left, y, right, y, fill='#dddddd')
+            canvas.create_text(left - 5, y, text=str(value), anchor='e', font=('Helvetica', 8))
+        step = (right - left) / max(len(points) - 1, 1)
+        for column, color in ((0, '#4a7abc'), (1, '#e08a2c')):
+            coords = []
+            for i, point in enumerate(points):
+                coords += [left + i * step, bottom - (bottom - top) * min(max(point[column], 0), 100) / 100]
+            if len(points) > 1:
+                canvas.create_line(*coords, fill=color, width=2)
+            else:
+                canvas.create_oval(coords[0] - 3, coords[1] - 3, coords[0] + 3, coords[1] + 3,
+                                   fill=color, outline='')
+
     def _load_data(self):
         """সমস্ত ডাটা লোড করুন"""
         self._load_quizzes()
         self._load_leaderboard()
     
+    def _show_busy(self, labels):
+        self.status_label.config(text=f"Loading {', '.join(labels)}..." if labels else "")
+
     def _load_quizzes(self):
-        for item in self.quiz_tree.get_children():
-            self.quiz_tree.delete(item)
-        
+        # Questions may have changed, or their quiz been deleted, since prefetch.
+        self._questions.clear()
+        self.quiz_tree.refresh()
+
+    def _fetch_quizzes(self, offset, limit):
+        """Return one page of quiz rows; runs on the background worker."""
         # Load Quiz from excel
-        quizzes = get_all_quizzes()
+        quizzes = get_quizzes_page(offset, limit)
 
-        for i, quiz in enumerate(quizzes, 1):  # Start from 1
+        rows = []
+        for i, quiz in enumerate(quizzes, offset + 1):  # Start from 1
             if ':' in quiz['title']:
                 subject, title = quiz['title'].split(':', 1)
                 subject = subject.strip()
@@ -302,20 +367,209 @@ class StudentDashboard(tk.Toplevel):
                 subject = "General"
                 title = quiz['title']
             
-            self.quiz_tree.insert('', 'end', 
-                                values=(i,  # Use i instead of quiz['id']
-                                    subject,
-                                    title,
-                                    quiz.get('description', '')))
+            rows.append((quiz['id'],
+                         (i,  # Use i instead of quiz['id']
+                          subject,
+                          title,
+                          quiz.get('description', ''))))
+        return rows
     
     def _load_leaderboard(self):
-        for item in self.leaderboard_tree.get_children():
-            self.leaderboard_tree.delete(item)
-        
+        self.leaderboard_tree.refresh()
+
+    def _fetch_leaderboard(self, offset, limit):
         # Load Leaderboard data from excel
-        leaderboard = get_leaderboard_data()
-        
-        for i, entry in enumerate(leaderboard[:20], 1):
-            self.leaderboard_tree.insert('', 'end', 
-                                       values=(i, entry['student_name'], 
-                                              entry['quiz_title'], entry['score']))
\ No newline at end of file
+        entries = get_leaderboard_page(offset, limit)
+        return [(rank, (rank, entry['student_name'], entry['quiz_title'], entry['score']))
+                for rank, entry in enumerate(entries, offset + 1)]
+
+
+class QuizWindow(tk.Toplevel):
+    """One quiz attempt.
+
+    The widgets are created once and updated in place for each question,
+    which keeps question transitions instant on slow machines.
+    """
+    QUESTION_TIME = 30
+
+    def __init__(self, dashboard, quiz_id, subject, title, questions):
+        super().__init__(dashboard)
+        self.title(f"{subject}: {title}")
+        self.geometry("900x700")
+        self.dashboard = dashboard
+        self.quiz_id = quiz_id
+        self.questions = questions
+
+        self.current_question = 0
+        self.score = 0
+        self.time_left = self.QUESTION_TIME
+        self.timer = None
+        self.start_time = datetime.now()
+        self.answered_questions = 0
+
+        self._build_question_view()
+        self._build_results_view()
+        self.show_question()
+
+    def _build_question_view(self):
+        # Main Frame
+        self.question_frame = ttk.Frame(self)
+        self.question_frame.pack(fill='both', expand=True, padx=20, pady=20)
+
+        # Header Frame
+        header_frame = ttk.Frame(self.question_frame)
+        header_frame.pack(fill='x', pady=10)
+
+        self.progress_label = ttk.Label(header_frame, font=('Helvetica', 12))
+        self.progress_label.pack(side='left')
+
+        # Timer label
+        self.time_label = ttk.Label(header_frame,
+                                    font=('Helvetica', 12, 'bold'),
+                                    foreground='red')
+        self.time_label.pack(side='right')
+
+        # Question Text
+        self.question_label = ttk.Label(self.question_frame,
+                                        font=('Helvetica', 16, 'bold'),
+                                        wraplength=800)
+        self.question_label.pack(pady=20)
+
+        # Option Frame
+        options_frame = ttk.Frame(self.question_frame)
+        options_frame.pack(pady=20)
+
+        option_count = max(len(question["options"]) for question in self.questions)
+        self.option_buttons = []
+        for idx in range(1, option_count + 1):
+            btn = ttk.Button(options_frame,
+                             width=40,
+                             command=lambda selected=idx: self.check_answer(selected))
+            btn.pack(pady=5)
+            self.option_buttons.append(btn)
+
+        # Navigation Button
+        nav_frame = ttk.Frame(self.question_frame)
+        nav_frame.pack(pady=20)
+
+        self.prev_button = ttk.Button(nav_frame,
+                                      text="<< Previous",
+                                      command=lambda: self.go_to_question(-1))
+        self.next_button = ttk.Button(nav_frame,
+                                      text="Next >>",
+                                      command=lambda: self.go_to_question(1))
+        self.next_button.pack(side='right', padx=10)
+
+    def _build_results_view(self):
+        self.results_frame = ttk.Frame(self)
+
+        ttk.Label(self.results_frame,
+                  text="Quiz Completed!",
+                  font=('Helvetica', 24, 'bold')).pack(pady=20)
+
+        self.score_label = ttk.Label(self.results_frame, font=('Helvetica', 18))
+        self.score_label.pack(pady=10)
+
+        self.time_taken_label = ttk.Label(self.results_frame, font=('Helvetica', 14))
+        self.time_taken_label.pack(pady=10)
+
+        # btn Frame
+        btn_frame = ttk.Frame(self.results_frame)
+        btn_frame.pack(pady=30)
+
+        ttk.Button(btn_frame,
+                   text="View Leaderboard",
+                   command=self._view_leaderboard).pack(side=tk.LEFT, padx=10)
+
+        ttk.Button(btn_frame,
+                   text="Close",
+                   command=self.destroy).pack(side=tk.LEFT, padx=10)
+
+    def show_question(self):
+        if self.current_question >= len(self.questions):
+            self.show_results()
+            return
+
+        question = self.questions[self.current_question]
+        self.progress_label.config(
+            text=f"Question {self.current_question+1}/{len(self.questions)} | {question.get('category', 'General')}")
+        self.question_label.config(text=question["question_text"])
+
+        # Disable the options of a question that was already answered
+        is_previous_question = self.current_question < self.answered_questions
+        for idx, btn in enumerate(self.option_buttons):
+            if idx < len(question["options"]):
+                btn.config(text=f"{idx + 1}. {question['options'][idx]}",
+                           state='disabled' if is_previous_question else 'normal')
+                if not btn.winfo_manager():
+                    btn.pack(pady=5)
+            else:
+                btn.pack_forget()
+
+        if self.current_question > 0:
+            self.prev_button.pack(side='left', padx=10, before=self.next_button)
+        else:
+            self.prev_button.pack_forget()
+
+        self.start_timer()
+
+    def start_timer(self):
+        self.stop_timer()
+        self.time_left = self.QUESTION_TIME
+        self.time_label.config(text=f"Time left: {self.time_left}s")
+        self.timer = self.after(1000, self._tick)
+
+    def stop_timer(self):
+        if self.timer:
+            self.after_cancel(self.timer)
+            self.timer = None
+
+    def _tick(self):
+        self.time_left -= 1
+        self.time_label.config(text=f"Time left: {self.time_left}s")
+
+        if self.time_left <= 0:
+            self.timer = None
+            self.go_to_question(1)
+        else:
+            self.timer = self.after(1000, self._tick)
+
+    def check_answer(self, selected_index):
+        self.stop_timer()
+
+        correct_index = self.questions[self.current_question]["correct_answer"]
+        if selected_index == correct_index + 1:
+            self.score += 1
+            messagebox.showinfo("Correct!", "Your answer is correct!", parent=self)
+        else:
+            messagebox.showinfo("Incorrect", f"Correct answer was: Option {correct_index + 1}", parent=self)
+
+        # Update answered questions count
+        self.answered_questions = max(self.answered_questions, self.current_question + 1)
+        self.go_to_question(1)
+
+    def go_to_question(self, step):
+        self.current_question += step
+        self.show_question()
+
+    def show_results(self):
+        self.stop_timer()
+        self.question_frame.pack_forget()
+
+        # Result Calculate
+        time_taken = (datetime.now() - self.start_time).seconds
+        percentage = int((self.score / len(self.questions)) * 100)
+
+        self.score_label.config(text=f"Your Score: {self.score}/{len(self.questions)} ({percentage}%)")
+        self.time_taken_label.config(text=f"Time Taken: {time_taken} seconds")
+        self.results_frame.pack(fill='both', expand=True, padx=20, pady=20)
+
+        self.dashboard.submit_score(self.quiz_id, percentage, time_taken)
+
+    def destroy(self):
+        self.stop_timer()
+        super().destroy()
+
+    def _view_leaderboard(self):
+        self.dashboard.notebook.select(self.dashboard.leaderboard_tab)
+        self.destroy()
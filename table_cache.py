@@ -0,0 +1,278 @@
+import os
+import threading
+from collections import OrderedDict
+from itertools import chain
+
+import journal
+
+# Upper bound on the number of rows kept in memory across all cached tables.
+DEFAULT_MAX_ROWS = int(os.environ.get("QUIZ_CACHE_MAX_ROWS", "200000"))
+
+
+class _Entry:
+    __slots__ = ("stamp", "rows", "journal_offset", "next_id", "dead", "indexes", "views")
+
+    def __init__(self, stamp, rows, journal_offset, next_id, dead=0):
+        self.stamp = stamp
+        self.rows = rows
+        self.journal_offset = journal_offset
+        self.next_id = next_id
+        # rows removed by journaled deletes, still parsed and replayed by
+        # every load until the next checkpoint or compaction
+        self.dead = dead
+        # column -> {value: [rows]}, built on first use
+        self.indexes = {}
+        # name -> derived object with an add(rows) method, see TableCache.view
+        self.views = {}
+
+
+def file_stamp(path):
+    """Return the (mtime, size) pair used to detect changes to `path`."""
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _build_index(rows, column):
+    index = {}
+    for row in rows:
+        index.setdefault(row[column] if len(row) > column else None, []).append(row)
+    return index
+
+
+def _next_id(rows, start=1):
+    ids = [row[0] for row in rows if row and isinstance(row[0], int)]
+    return max(max(ids) + 1, start) if ids else start
+
+
+class TableCache:
+    """Process-wide cache of parsed worksheet rows, keyed by file path.
+
+    Cached rows are the workbook snapshot with its write journal replayed on
+    top. Every lookup re-checks the workbook's mtime and size, so changes
+    made by another process (or by a teacher editing the workbook in Excel)
+    are picked up on the next read; journal records appended since the last
+    lookup are applied incrementally. Entries are evicted least-recently-used
+    first once the total row count goes over `max_rows`.
+    """
+
+    def __init__(self, max_rows=DEFAULT_MAX_ROWS):
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._total_rows = 0
+        self._lock = threading.RLock()
+
+    def get(self, path, loader):
+        """Return the cached rows of `path`, calling `loader(path)` on a miss.
+
+        The returned list is shared between callers and must not be mutated.
+        """
+        return self._lookup(path, loader)[0]
+
+    def peek(self, path):
+        """Return the cached rows of `path` if they are current, else None."""
+        with self._lock:
+            entry = self._fresh_entry(path, file_stamp(path))
+            return entry.rows if entry is not None else None
+
+    def index(self, path, loader, column):
+        """Return a {value: [rows]} hash index on `column` of the table.
+
+        Indexes are built lazily, kept up to date as journal inserts arrive
+        and rebuilt after deletes. Returns None when the table is too large
+        to cache. Like the rows, the index is shared and read-only.
+        """
+        rows, entry = self._lookup(path, loader)
+        if entry is None:
+            return None
+        with self._lock:
+            index = entry.indexes.get(column)
+            if index is None:
+                index = entry.indexes[column] = _build_index(entry.rows, column)
+            return index
+
+    def view(self, path, loader, name, factory):
+        """Return a materialized view of the table, creating it with `factory(rows)`.
+
+        The view's add(rows) method is called with every row inserted
+        through the journal afterwards; any delete discards the view so it
+        is rebuilt from the remaining rows on next use. Returns None when
+        the table is too large to cache.
+        """
+        rows, entry = self._lookup(path, loader)
+        if entry is None:
+            return None
+        with self._lock:
+            view = entry.views.get(name)
+            if view is None:
+                view = entry.views[name] = factory(entry.rows)
+            return view
+
+    def next_id(self, path, loader):
+        """Return the id following the largest id the table has ever held.
+
+        Ids of rows deleted since the last checkpoint still count, as they
+        are in the workbook snapshot and the journal: handing one out again
+        would make replay take the new row for one already folded in.
+        """
+        return self._load(path, loader)[0].next_id
+
+    def dead_rows(self, path, loader):
+        """Return how many rows of the table journaled deletes removed, or None if uncached."""
+        rows, entry = self._lookup(path, loader)
+        return entry.dead if entry is not None else None
+
+    def invalidate(self, path=None):
+        """Drop the entry for `path`, or every entry when no path is given."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._total_rows = 0
+                return
+            entry = self._entries.pop(str(path), None)
+            if entry is not None:
+                self._total_rows -= len(entry.rows)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tables": len(self._entries),
+                "rows": self._total_rows,
+                "max_rows": self.max_rows,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _lookup(self, path, loader):
+        """Return the rows of `path` and its entry, None if the table is too large to cache."""
+        entry, cached = self._load(path, loader)
+        return entry.rows, entry if cached else None
+
+    def _load(self, path, loader):
+        key = str(path)
+        stamp = file_stamp(path)
+
+        with self._lock:
+            entry = self._fresh_entry(path, stamp)
+            if entry is not None:
+                return entry, True
+            self.misses += 1
+
+        rows = list(loader(path))
+        records, offset = journal.read(path)
+        next_id = _next_id(chain(rows, journal.inserted_rows(records)))
+        before = len(rows)
+        inserted = sum(1 for _ in journal.inserted_rows(records))
+        rows = journal.apply(rows, records, snapshot=True)
+        # Inserts skipped as already folded in count as dead too: they are
+        # parsed on every load until the next checkpoint.
+        entry = _Entry(stamp, rows, offset, next_id, dead=before + inserted - len(rows))
+
+        with self._lock:
+            return entry, self._store(key, entry)
+
+    def _fresh_entry(self, path, stamp):
+        """Return the entry for `path` brought up to date with its journal.
+
+        Returns None when there is no entry, or when the workbook or journal
+        was replaced behind our back and the table has to be reloaded.
+        """
+        key = str(path)
+        entry = self._entries.get(key)
+        if entry is None or entry.stamp != stamp:
+            return None
+        size = journal.journal_size(path)
+        if size < entry.journal_offset:
+            return None
+        if size > entry.journal_offset:
+            self._apply_tail(key, entry, path)
+            if key not in self._entries:
+                # Grew past the cap and was dropped; rows are still valid.
+                self.hits += 1
+                return entry
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def _apply_tail(self, key, entry, path):
+        records, offset = journal.read(path, entry.journal_offset)
+        before = len(entry.rows)
+        for record in records:
+            start = len(entry.rows)
+            old_rows = entry.rows
+            entry.rows = journal.apply(entry.rows, [record])
+            if record.get("op") == "insert":
+                entry.next_id = _next_id(record["rows"], entry.next_id)
+                for column, index in entry.indexes.items():
+                    for row in entry.rows[start:]:
+                        index.setdefault(row[column] if len(row) > column else None, []).append(row)
+                for view in entry.views.values():
+                    view.add(entry.rows[start:])
+            elif record.get("op") == "delete":
+                entry.dead += len(old_rows) - len(entry.rows)
+                self._drop_deleted(entry, record["col"], record["value"])
+                entry.views.clear()
+            elif record.get("op") == "update":
+                self._replace_updated(entry, old_rows)
+                entry.views.clear()
+        entry.journal_offset = offset
+        self._total_rows += len(entry.rows) - before
+        self._evict(keep=key)
+
+    @staticmethod
+    def _drop_deleted(entry, column, value):
+        # An index on the delete column loses exactly one key; any other
+        # index would need a scan to fix up, so it is rebuilt on next use.
+        for indexed_column in list(entry.indexes):
+            if indexed_column == column:
+                entry.indexes[column].pop(value, None)
+            else:
+                del entry.indexes[indexed_column]
+
+    @staticmethod
+    def _replace_updated(entry, old_rows):
+        # Updates keep row positions, so changed rows are the ones replaced
+        # by a new tuple. Each keeps its place in its index bucket unless the
+        # indexed value itself changed.
+        changed = [(old, new) for old, new in zip(old_rows, entry.rows) if old is not new]
+        for column, index in entry.indexes.items():
+            for old, new in changed:
+                old_key = old[column] if len(old) > column else None
+                new_key = new[column] if len(new) > column else None
+                bucket = index[old_key]
+                position = next(i for i, row in enumerate(bucket) if row is old)
+                if new_key == old_key:
+                    bucket[position] = new
+                    continue
+                del bucket[position]
+                if not bucket:
+                    del index[old_key]
+                index.setdefault(new_key, []).append(new)
+
+    def _store(self, key, entry):
+        """Cache `entry` under `key`; returns False if the table is too large to cache."""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._total_rows -= len(old.rows)
+
+        # A table that alone exceeds the cap is served uncached rather than
+        # pushing every other table out.
+        if len(entry.rows) > self.max_rows:
+            return False
+
+        self._entries[key] = entry
+        self._total_rows += len(entry.rows)
+        self._evict(keep=key)
+        return True
+
+    def _evict(self, keep):
+        while self._total_rows > self.max_rows and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                self._entries.move_to_end(keep)
+                continue
+            evicted = self._entries.pop(oldest)
+            self._total_rows -= len(evicted.rows)
+        if self._total_rows > self.max_rows:
+            self.invalidate(keep)
@@ -1,12 +1,14 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from openpyxl import load_workbook
-from excel_db import get_all_quizzes, get_leaderboard_data, add_new_quiz, add_question_to_quiz
-from excel_db import (
-    QUIZZES_FILE,
-    QUESTIONS_FILE,
-    get_all_quizzes,
-)
+from tkinter import ttk, messagebox, filedialog
+from excel_db import (get_all_quizzes, get_all_students, get_quizzes_page, get_students_page, get_leaderboard_page,
+                      add_new_quiz_with_questions, delete_quiz, compact, garbage_stats, cache_stats)
+from locking import lock_stats
+from background import BackgroundTasks
+from paged_tree import PagedTreeview
+import instrumentation
+
+BANK_FILETYPES = [("Question banks", "*.csv *.json *.jsonl"), ("CSV", "*.csv"), ("JSON", "*.json"),
+                  ("JSON Lines", "*.jsonl"), ("All files", "*.*")]
 
 class ToolTip:
     def __init__(self, widget, text):
@@ -46,11 +48,16 @@ class TeacherDashboard(tk.Toplevel):
         self.geometry("1200x800")
         self.user_id = user_id
         self.user_name = user_name
+        self.tasks = BackgroundTasks(self, on_busy=self._show_busy)
 
         # Main frame
         self.main_frame = ttk.Frame(self)
         self.main_frame.pack(fill='both', expand=True, padx=20, pady=20)
 
+        # Loading indicator
+        self.status_label = ttk.Label(self.main_frame, text="")
+        self.status_label.pack(side='bottom', anchor='w')
+
         # Initialize widgets
         self._init_widgets()
 
@@ -70,6 +77,11 @@ class TeacherDashboard(tk.Toplevel):
         self.student_tree = None
         self.leaderboard_tree = None
         self.correct_option = None
+        self._analytics_loaded = False
+        self._quiz_stats = []
+        self._student_stats = []
+        self._distribution = None
+        self._io_progress = None
         self._error_label = None
 
     def _setup_ui(self):
@@ -82,18 +94,22 @@ class TeacherDashboard(tk.Toplevel):
         self.students_tab = ttk.Frame(self.notebook)
         self.leaderboard_tab = ttk.Frame(self.notebook)
         self.add_quiz_tab = ttk.Frame(self.notebook)
+        self.analytics_tab = ttk.Frame(self.notebook)
 
         # Add tabs to the notebook
         self.notebook.add(self.quiz_tab, text="Manage Quizzes")
         self.notebook.add(self.students_tab, text="Students")
         self.notebook.add(self.leaderboard_tab, text="Leaderboard")
         self.notebook.add(self.add_quiz_tab, text="Add New Quiz")
+        self.notebook.add(self.analytics_tab, text="Analytics")
+        self.notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed)
 
         # Set up each tab
         self._setup_quiz_tab()
         self._setup_students_tab()
         self._setup_leaderboard_tab()
         self._setup_add_quiz_tab()
+        self._setup_analytics_tab()
 
     def _load_initial_data(self):
         """Load initial data into the UI."""
@@ -108,9 +124,9 @@ class TeacherDashboard(tk.Toplevel):
         # Quiz Management UI
         ttk.Label(self.quiz_tab, text="All Quizzes", style='Title.TLabel').pack(pady=10)
 
-        self.quiz_tree = ttk.Treeview(self.quiz_tab, 
+        self.quiz_tree = PagedTreeview(self.quiz_tab, 
                                     columns=('ID', 'Subject', 'Title', 'Description'), 
-                                    show='headings')
+                                    fetch=self._fetch_quizzes, tasks=self.tasks, label="quizzes")
         self.quiz_tree.heading('ID', text='ID')
         self.quiz_tree.heading('Subject', text='Subject')
         self.quiz_tree.heading('Title', text='Title')
@@ -121,17 +137,16 @@ class TeacherDashboard(tk.Toplevel):
         self.quiz_tree.column('Title', width=200)
         self.quiz_tree.column('Description', width=300)
         
-        scrollbar = ttk.Scrollbar(self.quiz_tab, orient="vertical", command=self.quiz_tree.yview)
-        self.quiz_tree.configure(yscrollcommand=scrollbar.set)
-        
         self.quiz_tree.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
 
         btn_frame = ttk.Frame(self.quiz_tab)
         btn_frame.pack(pady=10)
         
         ttk.Button(btn_frame, text="Refresh", command=self._load_quizzes).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Delete Selected", command=self._delete_quiz).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Import Questions", command=self._import_questions).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Export Questions", command=self._export_questions).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Diagnostics", command=self._show_diagnostics).pack(side='left', padx=5)
     
         filter_frame = ttk.Frame(self.quiz_tab)
         filter_frame.pack(fill='x', pady=5)
@@ -140,41 +155,43 @@ class TeacherDashboard(tk.Toplevel):
         self.subject_filter = ttk.Combobox(filter_frame, values=["All", "Mathematics", "Bangla", "English", "General Knowledge"])
         self.subject_filter.pack(side='left', padx=5)
         self.subject_filter.set("All")
+        self._quiz_subject = "All"
         
         ttk.Button(filter_frame, text="Apply Filter", command=self._apply_filter).pack(side='left', padx=5)
 
     def _apply_filter(self):
-        selected_subject = self.subject_filter.get()
-        for item in self.quiz_tree.get_children():
-            self.quiz_tree.delete(item)
-        
-        quizzes = get_all_quizzes()
-        for quiz in quizzes:
-            # Extract subject from the title
-            quiz_subject = quiz['title'].split(':')[0].strip() if ':' in quiz['title'] else "General"
-            
-            if selected_subject == "All" or quiz_subject == selected_subject:
-                # Extract subject and title
-                if ':' in quiz['title']:
-                    subject, title = quiz['title'].split(':', 1)
-                    subject = subject.strip()
-                    title = title.strip()
-                else:
-                    subject = "General"
-                    title = quiz['title']
-                
-                self.quiz_tree.insert('', 'end', 
-                                    values=(quiz['id'], 
-                                        subject,
-                                        title,
-                                        quiz.get('description', '')))
+        self._quiz_subject = self.subject_filter.get()
+        self._load_quizzes()
 
+    @staticmethod
+    def _split_title(title):
+        # Extract subject and title
+        if ':' in title:
+            subject, title = title.split(':', 1)
+            return subject.strip(), title.strip()
+        return "General", title
+
+    def _fetch_quizzes(self, offset, limit):
+        """Return one page of quiz rows; runs on the background worker."""
+        selected_subject = self._quiz_subject
+        if selected_subject == "All":
+            quizzes = get_quizzes_page(offset, limit)
+        else:
+            quizzes = [quiz for quiz in get_all_quizzes()
+                       if self._split_title(quiz['title'])[0] == selected_subject][offset:offset + limit]
+
+        rows = []
+        for quiz in quizzes:
+            subject, title = self._split_title(quiz['title'])
+            rows.append((quiz['id'], (quiz['id'], subject, title, quiz.get('description', ''))))
+        return rows
 
     def _setup_students_tab(self):
         # Student Management UI
         ttk.Label(self.students_tab, text="Student List", style='Title.TLabel').pack(pady=10)
         
-        self.student_tree = ttk.Treeview(self.students_tab, columns=('ID', 'Username'), show='headings')
+        self.student_tree = PagedTreeview(self.students_tab, columns=('ID', 'Username'),
+                                          fetch=self._fetch_students, tasks=self.tasks, label="students")
         self.student_tree.heading('ID', text='ID')
         self.student_tree.heading('Username', text='Username')
         self.student_tree.pack(fill='both', expand=True)
@@ -190,9 +207,10 @@ class TeacherDashboard(tk.Toplevel):
         # Leaderboard UI
         ttk.Label(self.leaderboard_tab, text="Leaderboard", style='Title.TLabel').pack(pady=10)
         
-        self.leaderboard_tree = ttk.Treeview(self.leaderboard_tab, 
+        self.leaderboard_tree = PagedTreeview(self.leaderboard_tab, 
                                            columns=('Rank', 'Student', 'Quiz', 'Score'), 
-                                           show='headings')
+                                           fetch=self._fetch_leaderboard, tasks=self.tasks,
+                                           page_size=20, label="leaderboard")
         self.leaderboard_tree.heading('Rank', text='Rank')
         self.leaderboard_tree.heading('Student', text='Student')
         self.leaderboard_tree.heading('Quiz', text='Quiz')
@@ -207,6 +225,127 @@ class TeacherDashboard(tk.Toplevel):
                 text="Refresh Leaderboard", 
                 command=self._load_leaderboard).pack(ipadx=20, pady=5)
 
+    def _setup_analytics_tab(self):
+        # Computed when the tab is first opened, so NumPy is only loaded then
+        ttk.Label(self.analytics_tab, text="Performance Analytics", style='Title.TLabel').pack(pady=10)
+
+        self.analytics_summary = ttk.Label(self.analytics_tab, text="", justify='left')
+        self.analytics_summary.pack(anchor='w', padx=10)
+
+        self.distribution_canvas = tk.Canvas(self.analytics_tab, height=150, background='white',
+                                             highlightthickness=0)
+        self.distribution_canvas.pack(fill='x', padx=10, pady=5)
+        self.distribution_canvas.bind('<Configure>', lambda event: self._draw_distribution())
+
+        tables = ttk.Frame(self.analytics_tab)
+        tables.pack(fill='both', expand=True, padx=10)
+
+        quiz_columns = ('Quiz', 'Attempts', 'Students', 'Mean', 'Median', 'P25', 'P75', 'P90',
+                        'Min', 'Max', 'Avg Time')
+        self.quiz_stats_tree = PagedTreeview(
+            tables, columns=quiz_columns,
+            fetch=lambda offset, limit: self._quiz_stats[offset:offset + limit])
+        student_columns = ('Student', 'Attempts', 'Quizzes', 'Mean', 'Median', 'P90', 'Min', 'Max',
+                           'Avg Time')
+        self.student_stats_tree = PagedTreeview(
+            tables, columns=student_columns,
+            fetch=lambda offset, limit: self._student_stats[offset:offset + limit])
+
+        for tree, columns in ((self.quiz_stats_tree, quiz_columns), (self.student_stats_tree, student_columns)):
+            for column in columns:
+                tree.heading(column, text=column)
+                tree.column(column, width=65, anchor='center')
+            tree.column(columns[0], width=200, anchor='w')
+            tree.pack(side='left', fill='both', expand=True, padx=5)
+
+        ttk.Button(self.analytics_tab, text="Refresh Analytics",
+                   command=self._load_analytics).pack(pady=10)
+
+    def _on_tab_changed(self, event=None):
+        if not self._analytics_loaded and self.notebook.select() == str(self.analytics_tab):
+            self._analytics_loaded = True
+            self._load_analytics()
+
+    def _load_analytics(self):
+        self.analytics_summary.config(text="Computing analytics...")
+        self.tasks.submit(self._compute_analytics, key="analytics", label="analytics",
+                          on_done=self._show_analytics,
+                          on_error=lambda e: self.analytics_summary.config(text=f"Analytics failed: {e}"))
+
+    @staticmethod
+    def _format_stat(value):
+        return "-" if value != value else f"{value:.1f}"  # NaN when a quiz has no times
+
+    def _compute_analytics(self):
+        """Compute the statistics and the rows to display; runs on the background worker."""
+        import analytics
+
+        result = analytics.analyze()
+        titles = {quiz['id']: quiz['title'] for quiz in get_all_quizzes()}
+        names = {student['id']: student['username'] for student in get_all_students()}
+        fmt = self._format_stat
+
+        quiz = {name: column.tolist() for name, column in result['per_quiz'].items()}
+        quiz_rows = [
+            (key, (titles.get(key, f"Quiz {key}"), count, students, fmt(mean), fmt(p50), fmt(p25),
+                   fmt(p75), fmt(p90), fmt(low), fmt(high), fmt(time_mean)))
+            for key, count, students, mean, p50, p25, p75, p90, low, high, time_mean in zip(
+                quiz['key'], quiz['count'], quiz['students'], quiz['mean'], quiz['p50'], quiz['p25'],
+                quiz['p75'], quiz['p90'], quiz['min'], quiz['max'], quiz['time_mean'])
+        ]
+        student = {name: column.tolist() for name, column in result['per_student'].items()}
+        student_rows = [
+            (key, (names.get(key, f"User {key}"), count, quizzes, fmt(mean), fmt(p50), fmt(p90),
+                   fmt(low), fmt(high), fmt(time_mean)))
+            for key, count, quizzes, mean, p50, p90, low, high, time_mean in zip(
+                student['key'], student['count'], student['quizzes'], student['mean'], student['p50'],
+                student['p90'], student['min'], student['max'], student['time_mean'])
+        ]
+
+        summary = result['summary']
+        if summary['attempts']:
+            score, time_taken = summary['score'], summary['time_taken']
+            lines = [
+                f"{summary['attempts']} attempts by {summary['students']} students "
+                f"on {summary['quizzes']} quizzes",
+                f"Score: mean {score['mean']:.1f}, median {score['p50']:.1f}, "
+                f"P25 {score['p25']:.1f}, P75 {score['p75']:.1f}, P90 {score['p90']:.1f}",
+            ]
+            if time_taken['count']:
+                lines.append(f"Time taken: mean {time_taken['mean']:.0f}s, "
+                             f"median {time_taken['p50']:.0f}s, P90 {time_taken['p90']:.0f}s")
+            text = "\n".join(lines)
+        else:
+            text = "No quiz attempts recorded yet."
+
+        edges, counts = result['distribution']
+        return text, quiz_rows, student_rows, (edges.tolist(), counts.tolist())
+
+    def _show_analytics(self, result):
+        text, self._quiz_stats, self._student_stats, self._distribution = result
+        self.analytics_summary.config(text=text)
+        self.quiz_stats_tree.refresh()
+        self.student_stats_tree.refresh()
+        self._draw_distribution()
+
+    def _draw_distribution(self):
+        """Draw the score distribution as a bar chart of attempts per score band."""
+        canvas = self.distribution_canvas
+        canvas.delete('all')
+        if not self._distribution:
+            return
+        edges, counts = self._distribution
+        width, height = canvas.winfo_width(), int(canvas.cget('height'))
+        top = max(counts) or 1
+        bar_width = width / len(counts)
+        for i, count in enumerate(counts):
+            x0, x1 = i * bar_width + 4, (i + 1) * bar_width - 4
+            y0 = height - 20 - (height - 40) * count / top
+            canvas.create_rectangle(x0, y0, x1, height - 20, fill='#4a7abc', outline='')
+            canvas.create_text((x0 + x1) / 2, y0 - 8, text=str(count), font=('Helvetica', 8))
+            canvas.create_text((x0 + x1) / 2, height - 10, text=f"{edges[i]:.0f}-{edges[i + 1]:.0f}",
+                               font=('Helvetica', 8))
+
     def _setup_add_quiz_tab(self):
         # Main Frame
         main_frame = ttk.Frame(self.add_quiz_tab)
@@ -304,67 +443,29 @@ class TeacherDashboard(tk.Toplevel):
         except ValueError:
             return False
 
+    def _show_busy(self, labels):
+        self.status_label.config(text=f"Working on {', '.join(labels)}..." if labels else "")
+
     def _load_quizzes(self):
-        for item in self.quiz_tree.get_children():
-            self.quiz_tree.delete(item)
-        
-        quizzes = get_all_quizzes()
-        if not quizzes:
-            messagebox.showinfo("Info", "No quizzes available.")
-            return
-        
-        for i, quiz in enumerate(quizzes, 1):  # Start from 1
-            if ':' in quiz['title']:
-                subject, title = quiz['title'].split(':', 1)
-                subject = subject.strip()
-                title = title.strip()
-            else:
-                subject = "General"
-                title = quiz['title']
-            
-            self.quiz_tree.insert('', 'end', 
-                                values=(i,  # Use i instead of quiz['id']
-                                    subject,
-                                    title,
-                                    quiz.get('description', '')))
+        self.quiz_tree.refresh(
+            on_done=lambda count: count or messagebox.showinfo("Info", "No quizzes available."))
     
     def _load_students(self):
-        self.student_tree.delete(*self.student_tree.get_children())
-        
-        try:
-            from excel_db import get_all_students
-            students = get_all_students()
-            
-            if not students:
-                messagebox.showinfo("Info", "No students registered yet.")
-                return
-                
-            # Check The Unique ID and username
-            seen = set()
-            for i, student in enumerate(students, 1): 
-                identifier = (student['id'], student['username'])
-                if identifier not in seen:
-                    self.student_tree.insert(
-                        '', 'end', 
-                        values=(i, student['username']) 
-                    )
-                    seen.add(identifier)
-                    
-        except Exception as e:
-            messagebox.showerror(
-                "Database Error", 
-                f"Failed to load students: {str(e)}"
-            )
+        self.student_tree.refresh(
+            on_done=lambda count: count or messagebox.showinfo("Info", "No students registered yet."))
+
+    def _fetch_students(self, offset, limit):
+        students = get_students_page(offset, limit)
+        return [(student['id'], (i, student['username']))
+                for i, student in enumerate(students, offset + 1)]
     
     def _load_leaderboard(self):
-        for item in self.leaderboard_tree.get_children():
-            self.leaderboard_tree.delete(item)
-        
-        leaderboard = get_leaderboard_data()
-        for i, entry in enumerate(leaderboard[:20], 1):
-            self.leaderboard_tree.insert('', 'end', 
-                                       values=(i, entry['student_name'], 
-                                              entry['quiz_title'], entry['score']))
+        self.leaderboard_tree.refresh()
+
+    def _fetch_leaderboard(self, offset, limit):
+        entries = get_leaderboard_page(offset, limit)
+        return [(rank, (rank, entry['student_name'], entry['quiz_title'], entry['score']))
+                for rank, entry in enumerate(entries, offset + 1)]
             
     def _add_question(self):
         """Add a new question to the quiz."""
@@ -447,13 +548,8 @@ class TeacherDashboard(tk.Toplevel):
             if not self.questions_tree.get_children():
                 raise ValueError("Add at least one question")
 
-            # Save quiz
-            quiz_id = add_new_quiz(
-                f"{self.quiz_category.get()}: {self.quiz_title_entry.get()}",
-                self.quiz_desc_entry.get()
-            )
-
             # Process each question
+            questions = []
             for item in self.questions_tree.get_children():
                 question, options_text, correct_answer = self.questions_tree.item(item)['values']
                 
@@ -463,15 +559,26 @@ class TeacherDashboard(tk.Toplevel):
                 correct_num = int(correct_answer.split('.', 1)[0])
                 correct_index = correct_num - 1 
                 
-                # Save to database
-                add_question_to_quiz(quiz_id, question, options, correct_index)
+                questions.append((question, options, correct_index))
 
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save: {str(e)}")
+            return
+
+        def saved(_):
             # Reset form on success
             self._reset_quiz_form()
+            self._load_quizzes()
             messagebox.showinfo("Success", "Quiz saved successfully!")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save: {str(e)}")
+
+        # Save quiz and all its questions in one write
+        self.tasks.submit(
+            add_new_quiz_with_questions,
+            f"{self.quiz_category.get()}: {self.quiz_title_entry.get()}",
+            self.quiz_desc_entry.get(),
+            questions,
+            label="quiz", on_done=saved,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to save: {str(e)}"))
 
     def _delete_quiz(self):
     
@@ -492,29 +599,135 @@ class TeacherDashboard(tk.Toplevel):
         if not confirm:
             return
         
-        try:
-            wb = load_workbook(QUIZZES_FILE)
-            ws = wb.active
-
-            for idx, row in enumerate(ws.iter_rows(min_row=2), start=2):
-                if row[0].value == quiz_id: 
-                    ws.delete_rows(idx)
-                    break
+        def deleted(ok):
+            if not ok:
+                messagebox.showerror("Error", "Failed to delete quiz: storage error, see console for details")
+                return
+            self._load_quizzes()
+            messagebox.showinfo("Success", "Quiz deleted successfully!")
 
-            if QUESTIONS_FILE.exists():
-                wb_q = load_workbook(QUESTIONS_FILE)
-                ws_q = wb_q.active
-                
-                for idx in range(ws_q.max_row, 1, -1):
-                    if ws_q.cell(row=idx, column=2).value == quiz_id:
-                        ws_q.delete_rows(idx)
-                
-                wb_q.save(QUESTIONS_FILE)
+        self.tasks.submit(delete_quiz, quiz_id, label="delete", on_done=deleted,
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to delete quiz: {str(e)}"))
 
-            wb.save(QUIZZES_FILE)
+    def _import_questions(self):
+        """Import a CSV/JSON question bank in the background, showing progress."""
+        path = filedialog.askopenfilename(parent=self, title="Import Questions", filetypes=BANK_FILETYPES)
+        if not path:
+            return
+        import quiz_io
 
+        def imported(report):
+            self._io_progress = None
             self._load_quizzes()
-            messagebox.showinfo("Success", "Quiz deleted successfully!")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete quiz: {str(e)}")
+            message = (f"Imported {report['imported']} questions "
+                       f"({report['quizzes_created']} new quizzes).")
+            if report['skipped']:
+                message += f"\n\nSkipped {report['skipped']} invalid records:\n" + "\n".join(report['errors'][:10])
+                if report['skipped'] > 10:
+                    message += "\n..."
+            messagebox.showinfo("Import Questions", message)
+
+        def failed(error):
+            self._io_progress = None
+            messagebox.showerror("Error", f"Import failed: {error}")
+
+        self._io_progress = "Importing..."
+        self.tasks.submit(quiz_io.import_file, path, progress=self._record_io_progress("Importing"),
+                          label="import", on_done=imported, on_error=failed)
+        self._poll_io_progress()
+
+    def _export_questions(self):
+        path = filedialog.asksaveasfilename(parent=self, title="Export Questions", defaultextension=".csv",
+                                            filetypes=BANK_FILETYPES)
+        if not path:
+            return
+        import quiz_io
+
+        def exported(count):
+            self._io_progress = None
+            messagebox.showinfo("Export Questions", f"Exported {count} questions to {path}")
+
+        def failed(error):
+            self._io_progress = None
+            messagebox.showerror("Error", f"Export failed: {error}")
+
+        self._io_progress = "Exporting..."
+        self.tasks.submit(quiz_io.export_file, path, progress=self._record_io_progress("Exporting"),
+                          label="export", on_done=exported, on_error=failed)
+        self._poll_io_progress()
+
+    def _record_io_progress(self, verb):
+        # Called on the background worker: only store the text for the Tk thread.
+        def progress(records, fraction):
+            percent = f" ({fraction:.0%})" if fraction is not None else ""
+            self._io_progress = f"{verb}: {records} records{percent}"
+        return progress
+
+    def _poll_io_progress(self):
+        if self._io_progress is None or not self.winfo_exists():
+            return
+        self.status_label.config(text=self._io_progress)
+        self.after(200, self._poll_io_progress)
+
+    def _show_diagnostics(self):
+        """Show the instrumentation summary with cache and lock statistics."""
+        window = tk.Toplevel(self)
+        window.title("Diagnostics")
+        window.geometry("1000x450")
+
+        text = tk.Text(window, wrap='none', font=('Courier', 10))
+        text.pack(fill='both', expand=True, padx=10, pady=10)
+
+        def refresh():
+            # Counting garbage scans every quiz, question and leaderboard table.
+            self.tasks.submit(garbage_stats, key="garbage_stats", label="diagnostics", on_done=show,
+                              on_error=lambda e: messagebox.showerror("Error", f"Diagnostics failed: {e}",
+                                                                      parent=window))
+
+        def show(garbage):
+            if not window.winfo_exists():
+                return
+            cache = cache_stats()
+            locks = lock_stats()
+            live = garbage.pop("rows")
+            report = [
+                instrumentation.summary(),
+                "",
+                "Cache: " + ", ".join(f"{k} {v}" for k, v in cache.items()),
+                f"Locks: {locks['acquisitions']} acquired, {locks['contended']} contended, "
+                f"{locks['timeouts']} timed out, max wait {locks['max_wait'] * 1000:.1f} ms",
+                "Deleted rows awaiting compaction: " + ", ".join(f"{k} {v}" for k, v in garbage.items())
+                + f" ({live} live rows)",
+            ]
+            text.configure(state='normal')
+            text.delete('1.0', 'end')
+            text.insert('1.0', "\n".join(report))
+            text.configure(state='disabled')
+
+        def reset():
+            instrumentation.reset()
+            refresh()
+
+        def start_recording():
+            instrumentation.enable()
+            refresh()
+
+        def compacted(dropped):
+            refresh()
+            messagebox.showinfo("Compact Data", "Dropped " + ", ".join(f"{count} {table} rows"
+                                                                      for table, count in dropped.items()),
+                                parent=window)
+
+        def compact_now():
+            self.tasks.submit(compact, label="compact", on_done=compacted,
+                              on_error=lambda e: messagebox.showerror("Error", f"Compaction failed: {e}",
+                                                                      parent=window))
+
+        btn_frame = ttk.Frame(window)
+        btn_frame.pack(pady=5)
+        ttk.Button(btn_frame, text="Refresh", command=refresh).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Reset", command=reset).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Compact Data", command=compact_now).pack(side='left', padx=5)
+        if not instrumentation.ENABLED:
+            ttk.Button(btn_frame, text="Start Recording", command=start_recording).pack(side='left', padx=5)
+        refresh()
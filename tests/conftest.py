@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def run(tmp_path):
+    """Run Python code in a fresh interpreter on the data folder `tmp_path`.
+
+    Returns the last line it printed. Storage modules read the data folder
+    and backend at import, so each call gets its own process.
+    """
+    def run(code, storage="excel", **env):
+        env = {**os.environ, "QUIZ_DATA_DIR": str(tmp_path), "QUIZ_STORAGE": storage, **env}
+        result = subprocess.run([sys.executable, "-c", textwrap.dedent(code)], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=120)
+        assert result.returncode == 0, result.stderr
+        lines = result.stdout.splitlines()
+        return lines[-1] if lines else ""
+
+    return run
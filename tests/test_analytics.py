@@ -0,0 +1,19 @@
+import numpy as np
+
+import analytics
+import score_log
+
+
+def test_score_log_columns_match_rows(tmp_path):
+    rows = [(1, 1, 2, 50, 30, None), (2, None, 2, 70, 20, None), (3, 2, 3, None, 10, None),
+            (4, 2, 2, 90, None, None), (5, 3, 3, 40.5, 12, None)]
+    path = score_log.log_path(tmp_path)
+    score_log.create(path, rows)
+
+    expected = analytics.Attempts.from_rows(rows)
+    attempts = analytics.Attempts.from_records(score_log.ScoreLog(path).records())
+    assert len(attempts) == 3
+    for column in analytics.Attempts.__slots__:
+        got, want = getattr(attempts, column), getattr(expected, column)
+        assert got.dtype == want.dtype
+        np.testing.assert_array_equal(got, want)
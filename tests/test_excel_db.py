@@ -0,0 +1,90 @@
+def test_append_to_uncached_table_reads_no_rows(run):
+    out = run("""
+        import excel_db as db
+        db.init_excel_db()
+        db.save_scores([(1, "ann", 1, score % 50, 30) for score in range(300)])
+        db.checkpoint()
+        db.clear_cache()
+
+        loads = []
+        stream_rows = db._stream_rows
+        db._stream_rows = lambda path: loads.append(path.name) or stream_rows(path)
+        db.save_score(1, "ann", 1, 99, 30)
+        db._stream_rows = stream_rows
+        print(loads, len(db.get_user_scores(1)), db.get_top_scores(1, 1)[0][:4])
+    """, QUIZ_CACHE_MAX_ROWS="100", QUIZ_SNAPSHOTS="0")
+    assert out == "[] 301 (301, 1, 1, 99)"
+
+
+SETUP = """
+    import excel_db as db
+    db.init_excel_db()
+    ann = db.add_user("ann", "hash", "student")
+    for title in ("Algebra", "Geometry", "Old"):
+        quiz_id = db.add_new_quiz_with_questions(title, "", [("q", ["a", "b", "c", "d"], 0)])
+        db.save_score(ann, "ann", quiz_id, 80, 30)
+"""
+
+
+def test_deleted_quiz_id_is_not_reused_after_checkpoint(run):
+    run(SETUP + """
+    db.delete_quiz(3)
+    """)  # checkpoints at exit
+    out = run("""
+        import excel_db as db
+        new_id = db.add_new_quiz("Brand new")
+        print(new_id, [entry["quiz_title"] for entry in db.get_user_history(1)])
+    """)
+    assert out == "4 ['Algebra', 'Geometry']"
+
+
+def test_deleted_quiz_id_is_not_reused_without_counters(run, tmp_path):
+    run(SETUP)
+    for counter in tmp_path.glob("*.next_id"):
+        counter.unlink()  # as written by versions without counters
+    run("""
+        import excel_db as db
+        db.delete_quiz(3)
+    """)
+    assert run("""
+        import excel_db as db
+        print(db.add_new_quiz("Brand new"))
+    """) == "4"
+
+
+def test_compaction_drops_attempts_of_deleted_quizzes(run):
+    out = run(SETUP + """
+    # An attempt orphaned before deletes removed attempts too.
+    db.save_score(ann, "ann", 9, 50, 30)
+    db.delete_quiz(3)
+    print(db.garbage_stats()["leaderboard"], db.compact()["leaderboard"],
+          db.garbage_stats()["leaderboard"], [row[2] for row in db.iter_attempts()])
+    """)
+    assert out == "2 2 0 [1, 2]"
+
+
+HAND_TYPED_USERS = """
+    import hashlib
+    from openpyxl import Workbook
+
+    import config
+    config.DB_FOLDER.mkdir(exist_ok=True)
+    wb = Workbook()
+    legacy = hashlib.sha256(b"pw").hexdigest()
+    for row in (["id", "username", "password", "role"], [1, 1234, legacy, "student"], [2, " bob ", legacy, "teacher"]):
+        wb.active.append(row)
+    wb.save(config.DB_FOLDER / "users.xlsx")
+"""
+
+
+def test_login_matches_numeric_and_padded_usernames(run):
+    run(HAND_TYPED_USERS)
+    login = """
+        import auth
+        users = [auth.login_user(name, "pw") for name in ("1234", "bob", " bob", "bob", "carl")]
+        print([user and (user["id"], user["role"]) for user in users],
+              auth.register_user_async("bob", "pw", "student").result())
+    """
+    expected = "[(1, 'student'), (2, 'teacher'), (2, 'teacher'), (2, 'teacher'), None] False"
+    assert run(login, QUIZ_PBKDF2_ITERATIONS="1000") == expected
+    assert run(login, QUIZ_CACHE_MAX_ROWS="1", QUIZ_PBKDF2_ITERATIONS="1000") == expected
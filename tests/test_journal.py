@@ -0,0 +1,34 @@
+import journal
+
+
+def test_replay_skips_inserts_folded_into_snapshot():
+    records = [journal.insert_record([[1, "ann", "x", "student"]]),
+               journal.update_record(0, 1, {2: "y"})]
+    snapshot = [(1, "ann", "y", "student")]
+    assert journal.apply(list(snapshot), records, snapshot=True) == snapshot
+    assert list(journal.replay_stream(snapshot, records)) == snapshot
+
+
+def test_replay_keeps_new_row_with_deleted_id():
+    records = [journal.delete_record(0, 3), journal.insert_record([[3, "NEW", ""]])]
+    snapshot = [(1, "a", None), (3, "old", None)]
+    expected = [(1, "a", None), (3, "NEW", "")]
+    assert journal.apply(list(snapshot), records, snapshot=True) == expected
+    assert list(journal.replay_stream(snapshot, records)) == expected
+
+
+def test_deleted_highest_id_is_not_reused(run):
+    out = run("""
+        import excel_db as db
+        db.init_excel_db()
+        for i in range(3):
+            db.add_new_quiz_with_questions(f"Quiz {i}", "", [("q", ["a", "b", "c", "d"], 0)])
+        db.checkpoint()
+        db.delete_quiz(3)
+        db.clear_cache()
+        new_id = db.add_new_quiz_with_questions("NEW", "", [("nq", ["a", "b", "c", "d"], 1)])
+        db.clear_cache()
+        print(new_id, [quiz["title"] for quiz in db.get_all_quizzes()],
+              [q["question_text"] for q in db.get_quiz_questions(new_id)])
+    """)
+    assert out == "4 ['Quiz 0', 'Quiz 1', 'NEW'] ['nq']"
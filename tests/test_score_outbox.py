@@ -0,0 +1,17 @@
+import json
+
+from score_outbox import ScoreOutbox
+
+
+def test_submit_after_torn_line(tmp_path, monkeypatch):
+    path = tmp_path / "score_outbox.jsonl"
+    path.write_text('{"id": "x", "user_id": 1, "qu')
+    outbox = ScoreOutbox(path)
+    assert outbox.pending == 0
+
+    monkeypatch.setattr(outbox, "start", lambda: None)
+    outbox.submit(1, "ann", 2, 50, 3)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(r["user_id"], r["quiz_id"], r["score"]) for r in records] == [(1, 2, 50)]
+    assert outbox.pending == 1
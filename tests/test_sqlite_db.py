@@ -0,0 +1,152 @@
+from test_excel_db import HAND_TYPED_USERS
+
+
+def test_migration_includes_pending_journal_writes(run):
+    run("""
+        import os
+        import excel_db as db
+        db.init_excel_db()
+        db.add_user("bob", "hash", "student")
+        db.add_quiz("Algebra")
+        os._exit(0)  # no checkpoint at exit
+    """)
+    out = run("""
+        import excel_db as db
+        db.init_excel_db()
+        print(db.get_user("bob")["id"], [quiz["title"] for quiz in db.get_all_quizzes()])
+    """, storage="sqlite")
+    assert out == "1 ['Algebra']"
+
+
+def test_export_drops_stale_journals(run):
+    run("""
+        import os
+        import excel_db as db
+        db.init_excel_db()
+        db.add_user("bob", "old", "student")
+        db.checkpoint()
+        db.update_user_password(1, "new")
+        os._exit(0)
+    """)
+    run("""
+        import sqlite_db
+        sqlite_db.init_excel_db()
+        sqlite_db.update_user_password(1, "newer")
+        sqlite_db.export_to_excel()
+    """, storage="sqlite")
+    out = run("""
+        import excel_db as db
+        print(db.get_user("bob")["password"])
+    """)
+    assert out == "newer"
+
+
+def test_deleted_quiz_id_is_not_reused(run):
+    out = run("""
+        import sqlite_db as db
+        db.init_excel_db()
+        ann = db.add_user("ann", "hash", "student")
+        for title in ("Algebra", "Old"):
+            db.save_score(ann, "ann", db.add_quiz(title), 80, 30)
+        db.delete_quiz(2)
+        new_id = db.add_quiz("Brand new")
+        print(new_id, [entry["quiz_id"] for entry in db.get_user_history(ann)])
+    """, storage="sqlite")
+    assert out == "3 [1]"
+
+
+def test_old_database_is_rebuilt_with_autoincrement(run, tmp_path):
+    import sqlite3
+
+    conn = sqlite3.connect(tmp_path / "quiz.db")
+    conn.executescript("""
+        CREATE TABLE quizzes (id INTEGER PRIMARY KEY, title TEXT, description TEXT);
+        CREATE TABLE leaderboard (id INTEGER PRIMARY KEY, user_id INTEGER, quiz_id INTEGER,
+                                  score NUMERIC, time_taken NUMERIC);
+        INSERT INTO quizzes VALUES (1, 'Algebra', ''), (2, 'Old', '');
+        INSERT INTO leaderboard VALUES (1, 1, 2, 80, 30);
+    """)
+    conn.close()
+    out = run("""
+        import sqlite_db as db
+        db.init_excel_db()
+        db.delete_quiz(2)
+        print(db.add_quiz("Brand new"), [quiz["title"] for quiz in db.get_all_quizzes()],
+              db.get_top_scores())
+    """, storage="sqlite")
+    assert out == "3 ['Algebra', 'Brand new'] []"
+
+
+def test_migration_keeps_excel_id_counters(run):
+    run("""
+        import excel_db as db
+        db.init_excel_db()
+        db.add_quiz("Algebra")
+        db.add_quiz("Old")
+        db.delete_quiz(2)
+    """)
+    assert run("""
+        import excel_db as db
+        db.init_excel_db()
+        print(db.add_quiz("Brand new"))
+    """, storage="sqlite") == "3"
+
+
+def test_round_trip_through_partitioned_folder(run):
+    run("""
+        import excel_db as db
+        db.init_excel_db()
+        ann = db.add_user("ann", "hash", "student")
+        quiz_id = db.add_new_quiz_with_questions("Algebra", "", [("old q", ["a", "b", "c", "d"], 0)])
+        db.save_score(ann, "ann", quiz_id, 50, 30)
+        db.partition_tables()
+    """)
+    run("""
+        import sqlite_db as db
+        db.init_excel_db()
+        db.add_question_to_quiz(1, "new q", ["a", "b", "c", "d"], 1)
+        db.save_score(1, "ann", 1, 99, 20)
+        db.export_to_excel()
+    """, storage="sqlite")
+    out = run("""
+        import excel_db as db
+        db.save_score(1, "ann", 1, 70, 25)
+        db.add_question_to_quiz(1, "third q", ["a", "b", "c", "d"], 2)
+        print([q["question_text"] for q in db.get_quiz_questions(1)],
+              [(row[0], row[3]) for row in db.get_user_scores(1)])
+    """)
+    assert out == "['old q', 'new q', 'third q'] [(1, 50), (2, 99), (3, 70)]"
+
+
+def test_round_trip_through_score_log(run):
+    run("""
+        import excel_db as db
+        db.init_excel_db()
+        ann = db.add_user("ann", "hash", "student")
+        quiz_id = db.add_quiz("Algebra")
+        db.save_score(ann, "ann", quiz_id, 50, 30)
+        db.use_score_log()
+    """)
+    run("""
+        import sqlite_db as db
+        db.init_excel_db()
+        db.save_score(1, "ann", 1, 99, 20)
+        db.export_to_excel()
+    """, storage="sqlite")
+    out = run("""
+        import excel_db as db
+        db.save_score(1, "ann", 1, 70, 25)
+        print([(row[0], row[3]) for row in db.get_user_scores(1)], db.get_top_scores(1, 1)[0][3])
+    """)
+    assert out == "[(1, 50), (2, 99), (3, 70)] 99"
+
+
+def test_login_matches_migrated_numeric_and_padded_usernames(run):
+    run(HAND_TYPED_USERS)
+    out = run("""
+        import auth
+        auth.init_excel_db()
+        users = [auth.login_user(name, "pw") for name in ("1234", "bob", "bob ")]
+        print([user and user["id"] for user in users], auth.register_user("bob", "pw", "student"))
+    """, storage="sqlite", QUIZ_PBKDF2_ITERATIONS="1000")
+    assert out == "[1, 2, 2] False"